@@ -4,14 +4,38 @@ Proxifier Toggler 启动脚本
 支持以下运行模式：
 1. 正常模式（默认）：python run.py - 自动请求管理员权限
 2. 开发模式：python run.py --dev 或 python run.py -d（跳过权限检查，用于开发调试）
+3. 纯托盘模式：python run.py --tray-only（不创建 Tk 界面，主控面板在独立进程中按需打开）
+可选：python run.py --trace trace.json 记录启动与切换时间线，退出时写入 (Chrome trace 格式)
+可选：python run.py --startup-timeline 启动完成后打印各启动步骤的耗时
+可选：python run.py --profile-startup [PATH] 剖析启动过程直到托盘显示，写出报告后退出
+      (加 --profile-keep-running 则继续运行；源码与打包 EXE 均可用)
 """
 import sys
 import os
 import argparse
 
 
+def _absolutize_path_arg(option, path):
+    """把命令行中 option 的路径值改写为绝对路径
+
+    提权时 run_as_admin 以原始 sys.argv 重新启动本程序，提权后的进程工作目录
+    通常是 System32，相对路径会被解析到那里。
+    """
+    argv = sys.argv
+    for i in range(1, len(argv)):
+        if argv[i] == option and i + 1 < len(argv) and not argv[i + 1].startswith("-"):
+            argv[i + 1] = path
+        elif argv[i].startswith(option + "="):
+            argv[i] = f"{option}={path}"
+
+
 def main():
     """主函数"""
+    # 常驻状态探测进程 (由主程序以子进程方式启动，打包环境下复用本 EXE)
+    if len(sys.argv) > 1 and sys.argv[1] == "--probe-worker":
+        from src.core.probe_worker import main as worker_main
+        sys.exit(worker_main(sys.argv[2:]))
+    
     # 解析命令行参数
     parser = argparse.ArgumentParser(
         description="Proxifier Toggler - 系统托盘切换工具"
@@ -22,8 +46,69 @@ def main():
         help="开发模式：跳过管理员权限检查（用于开发调试）"
     )
     
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="记录启动与切换时间线，退出时写入 PATH (可用 Perfetto / chrome://tracing 打开)"
+    )
+    
+    parser.add_argument(
+        "--startup-timeline",
+        action="store_true",
+        help="启动完成后在控制台打印各启动步骤的耗时与所在线程"
+    )
+    
+    parser.add_argument(
+        "--profile-startup",
+        nargs="?",
+        const="",
+        metavar="PATH",
+        help="剖析启动过程 (模块导入耗时 + cProfile) 直到托盘显示，报告写入 PATH "
+             "(默认 config/startup_profile.txt) 后退出"
+    )
+    
+    parser.add_argument(
+        "--profile-keep-running",
+        action="store_true",
+        help="与 --profile-startup 同用：写出报告后继续运行"
+    )
+    
+    mode_group = parser.add_mutually_exclusive_group()
+    mode_group.add_argument(
+        "--tray-only",
+        action="store_true",
+        help="纯托盘模式：托盘占用主线程，不创建 Tk 界面，主控面板在独立进程中按需打开"
+    )
+    mode_group.add_argument(
+        "--panel",
+        action="store_true",
+        help=argparse.SUPPRESS     # 纯托盘模式打开主控面板时内部使用
+    )
+    
     args = parser.parse_args()
     
+    # 路径参数先转为绝对路径并写回 sys.argv：提权重启会重新解析原始参数，
+    # 而提权后的进程工作目录通常不是当前目录
+    if args.profile_startup:
+        args.profile_startup = os.path.abspath(args.profile_startup)
+        _absolutize_path_arg("--profile-startup", args.profile_startup)
+    if args.trace:
+        args.trace = os.path.abspath(args.trace)
+        _absolutize_path_arg("--trace", args.trace)
+    
+    # 启动剖析须尽早开始，之后的导入与调用才会被记录
+    if args.profile_startup is not None:
+        from src.core.startup_profile import StartupProfiler
+        StartupProfiler(args.profile_startup or None, keep_running=args.profile_keep_running).start()
+    
+    if args.trace:
+        from src.core.trace import TRACE_ENV
+        os.environ[TRACE_ENV] = args.trace
+    
+    if args.startup_timeline:
+        from src.core.bootstrap import TIMELINE_ENV
+        os.environ[TIMELINE_ENV] = "1"
+    
     # 开发模式：跳过权限检查
     if args.dev:
         print("=" * 60)
@@ -39,7 +124,12 @@ def main():
     
     # 导入并运行主程序
     from src.main import main as app_main
-    app_main()
+    if args.panel:
+        app_main("panel")
+    elif args.tray_only:
+        app_main("tray-only")
+    else:
+        app_main()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,533 @@
+"""
+性能基准测试
+使用内存后端模拟驱动服务与 Proxifier 进程，可在 Linux 上无界面运行，覆盖：
+  - 状态探测吞吐 (每次枚举 / 已跟踪实例按 PID 检查 / 缓存命中)
+  - 不同驱动启停延迟下的端到端切换耗时
+  - 配置加载与保存耗时
+  - 托盘图标状态同步耗时
+  - 冷启动导入耗时 (src.main 等模块，各自在新的解释器中导入)
+  - 冷启动到托盘出现的耗时 (最小化启动，主界面按需构建)，以及到托盘显示出状态的耗时
+    (无上次记录 / 沿用上次已知状态两种情况，查询延迟可模拟)
+  - 常驻内存：纯托盘模式 (--tray-only) 与默认模式 (最小化 / 已打开主界面) 对比
+结果写入 JSON 文件，可与旧版本的结果对比。
+使用方法:
+  python scripts/benchmark.py                          # 结果写入 bench_results.json
+  python scripts/benchmark.py --output new.json --compare old.json
+  python scripts/benchmark.py --only probe toggle      # 只运行部分基准
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 获取项目根目录 (scripts 目录的上一级)
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# 无桌面环境时 pystray 使用空后端，托盘基准只测量图标状态同步本身
+if sys.platform != "win32" and not os.environ.get("DISPLAY"):
+    os.environ.setdefault("PYSTRAY_BACKEND", "dummy")
+
+from src import __version__  # noqa: E402
+from src.core import process, service, snapshot, status_cache  # noqa: E402
+from src.core.backend import FakeServiceBackend  # noqa: E402
+from src.core.constants import ServiceStatus  # noqa: E402
+from src.core.toggle import DIRECTION_OFF, DIRECTION_ON, TogglePipeline  # noqa: E402
+
+SERVICE_NAME = "proxifierdrv"
+EXE_PATH = r"C:\Program Files (x86)\Proxifier\Proxifier.exe"
+
+# 冷启动导入基准测量的模块
+IMPORT_MODULES = (
+    "src.main", "src.core.monitor", "src.gui.tray_icon", "src.gui.app",
+    # 以下为首次打开主界面时才导入的部分
+    "customtkinter", "src.gui.settings",
+)
+
+BENCHMARKS = ("probe", "toggle", "config", "tray", "import", "startup", "memory")
+
+# 冷启动到托盘出现：在新的解释器中启动 ProxifierApp (内存后端、指定的配置目录)，
+# 托盘图标对象创建完成、以及托盘拿到第一个状态 (实时或上次记录) 时分别记录耗时，然后退出。
+# 参数：项目目录、配置目录 (复用同一目录即沿用上次已知状态)、模拟的服务查询延迟 (秒)
+STARTUP_HARNESS = """
+import sys, threading, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from pathlib import Path
+from src.config import manager
+manager.CONFIG_DIR = Path(sys.argv[2])
+manager.CONFIG_FILE = manager.CONFIG_DIR / "config.json"
+from src.core import process, service
+from src.core.backend import FakeServiceBackend
+service.set_backend(FakeServiceBackend({"proxifierdrv": "STOPPED"}, query_latency=float(sys.argv[3])))
+process.set_process_provider(process.FakeProcessProvider())
+from src.gui import tray_icon
+from src.gui.app import ProxifierApp
+threading.excepthook = lambda args: None   # 空托盘后端无法真正运行消息循环
+app = ProxifierApp()
+def watch():
+    while tray_icon._tray_instance is None or tray_icon._tray_instance.icon is None:
+        time.sleep(0.001)
+    print(time.perf_counter() - start)
+    while app.monitor.last_status is None:
+        time.sleep(0.001)
+    print(time.perf_counter() - start)
+    # 等第一次实时探测写回上次已知状态
+    while app.monitor.stale or not manager.get_last_status_file().exists():
+        time.sleep(0.001)
+    print(int("customtkinter" in sys.modules))
+    app.quit()
+threading.Thread(target=watch, daemon=True).start()
+app.run()
+"""
+
+# 常驻内存对比的运行模式：纯托盘；默认模式最小化启动；默认模式打开过主界面
+MEMORY_MODES = ("tray-only", "default", "default-ui")
+
+# 常驻内存：在新的解释器中以指定模式启动 (内存后端、临时配置目录)，
+# 托盘 (及主界面) 就绪后等待监控轮询若干次，再读取进程常驻内存 (KB)
+MEMORY_HARNESS = """
+import gc, sys, tempfile, threading, time
+sys.path.insert(0, sys.argv[1])
+mode = sys.argv[2]
+from pathlib import Path
+from src.config import manager
+manager.CONFIG_DIR = Path(tempfile.mkdtemp())
+manager.CONFIG_FILE = manager.CONFIG_DIR / "config.json"
+from src.core import process, service
+from src.core.backend import FakeServiceBackend
+service.set_backend(FakeServiceBackend({"proxifierdrv": "STOPPED"}))
+process.set_process_provider(process.FakeProcessProvider())
+from src.gui import tray_icon
+
+def rss_kb():
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+        class Counters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                    "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+        counters = Counters()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        ctypes.windll.psapi.GetProcessMemoryInfo.argtypes = (wintypes.HANDLE, ctypes.POINTER(Counters), wintypes.DWORD)
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb)
+        return counters.WorkingSetSize // 1024
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    raise RuntimeError("无法读取常驻内存")
+
+def wait_for(predicate):
+    while not predicate():
+        time.sleep(0.005)
+
+def report(app):
+    time.sleep(float(sys.argv[3]))
+    gc.collect()
+    print(rss_kb())
+    print(int("tkinter" in sys.modules))
+    app.quit()
+
+threading.excepthook = lambda args: None   # 空托盘后端无法真正运行消息循环
+if mode == "tray-only":
+    from src.gui.tray_only import TrayOnlyApp
+    app = TrayOnlyApp()
+    threading.Thread(target=app.run, daemon=True).start()
+    wait_for(lambda: app.tray is not None and app.tray.icon is not None)
+    report(app)
+else:
+    from src.gui.app import ProxifierApp
+    app = ProxifierApp()
+    if mode == "default-ui":
+        app.show_ui()
+    def watch():
+        wait_for(lambda: tray_icon._tray_instance is not None and tray_icon._tray_instance.icon is not None)
+        if mode == "default-ui":
+            wait_for(lambda: app.settings_window is not None and app.settings_window.window is not None)
+        report(app)
+    threading.Thread(target=watch, daemon=True).start()
+    app.run()
+"""
+
+
+def summarize(samples):
+    """耗时样本 (秒) 的统计，单位毫秒"""
+    ordered = sorted(samples)
+
+    def percentile(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        "n": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": percentile(0.5),
+        "p99_ms": percentile(0.99),
+        "min_ms": ordered[0] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def measure(func, iterations):
+    """重复调用 func，返回统计与吞吐"""
+    samples = []
+    begin = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    total = time.perf_counter() - begin
+    return {**summarize(samples), "ops_per_sec": iterations / total if total else 0.0}
+
+
+def install_fakes(start_latency=0.0, stop_latency=0.0, close_latency=0.0):
+    """安装内存后端，返回 (服务后端, 进程提供者)"""
+    backend = FakeServiceBackend(
+        {SERVICE_NAME: ServiceStatus.STOPPED.value},
+        start_latency=start_latency,
+        stop_latency=stop_latency,
+    )
+    provider = process.FakeProcessProvider(close_latency=close_latency)
+    service.set_backend(backend)
+    process.set_process_provider(provider)
+    status_cache.invalidate()
+    return backend, provider
+
+
+# ============================================================================
+# 基准
+# ============================================================================
+
+def bench_probe(iterations):
+    """状态探测吞吐"""
+    _, provider = install_fakes()
+    # 模拟一张普通桌面机器的进程表
+    for index in range(200):
+        provider.spawn(rf"C:\Windows\System32\svc{index}.exe")
+    provider.spawn(EXE_PATH)
+    exe_name = process.image_name(EXE_PATH)
+
+    results = {}
+    results["untracked_enumerate"] = measure(
+        lambda: snapshot.probe_status([SERVICE_NAME], [exe_name]), iterations
+    )
+    process.get_tracker(EXE_PATH).adopt()
+    results["tracked_per_pid"] = measure(
+        lambda: snapshot.probe_status([SERVICE_NAME], [EXE_PATH]), iterations
+    )
+    status_cache.invalidate()
+    results["cache_hit"] = measure(
+        lambda: status_cache.get_snapshot([SERVICE_NAME], [EXE_PATH]), iterations
+    )
+    results["snapshots_taken"] = provider.snapshots
+    return results
+
+
+def bench_toggle(latencies, rounds):
+    """不同驱动启停延迟下的端到端切换耗时"""
+    results = {}
+    for latency in latencies:
+        install_fakes(start_latency=latency, stop_latency=latency, close_latency=0.01)
+        pipeline = TogglePipeline(SERVICE_NAME, EXE_PATH)
+        samples = {DIRECTION_ON: [], DIRECTION_OFF: []}
+        steps = {}
+        failures = 0
+        for _ in range(rounds):
+            for direction in (DIRECTION_ON, DIRECTION_OFF):
+                result = pipeline.converge(direction)
+                if not result.ok:
+                    failures += 1
+                samples[direction].append(result.elapsed)
+                for name, elapsed in result.timings().items():
+                    steps.setdefault(name, []).append(elapsed)
+        results[f"driver_latency_{latency * 1000:.0f}ms"] = {
+            "on": summarize(samples[DIRECTION_ON]),
+            "off": summarize(samples[DIRECTION_OFF]),
+            "steps_p50_ms": {name: summarize(values)["p50_ms"] for name, values in steps.items()},
+            "failures": failures,
+        }
+    return results
+
+
+def bench_config(iterations):
+    """配置加载与保存耗时 (在临时目录中进行，不影响真实配置)"""
+    from src.config import manager
+
+    original = (manager.CONFIG_DIR, manager.CONFIG_FILE, manager._config_cache)
+    with tempfile.TemporaryDirectory() as tmp:
+        manager.CONFIG_DIR = Path(tmp)
+        manager.CONFIG_FILE = Path(tmp) / "config.json"
+        manager._config_cache = None
+        try:
+            manager.save_config(dict(manager.DEFAULT_CONFIG))
+
+            def cold_load():
+                manager._config_cache = None
+                manager.load_config()
+
+            config = manager.load_config()
+            return {
+                "load_cold": measure(cold_load, iterations),
+                "load_cached": measure(manager.load_config, iterations),
+                "save": measure(lambda: manager.save_config(config), iterations),
+            }
+        finally:
+            manager.CONFIG_DIR, manager.CONFIG_FILE, manager._config_cache = original
+
+
+def bench_tray(iterations):
+    """托盘图标状态同步耗时"""
+    try:
+        import pystray
+        from src.gui.tray_icon import TrayIcon
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+    tray = TrayIcon()
+    tray.icon = pystray.Icon("benchmark", tray._create_image(active=True), "benchmark")
+    statuses = [ServiceStatus.RUNNING.value, ServiceStatus.STOPPED.value]
+    counter = iter(range(iterations * 2))
+    return {
+        "steady": measure(lambda: tray.update_state(ServiceStatus.RUNNING.value), iterations),
+        "alternating": measure(lambda: tray.update_state(statuses[next(counter) % 2]), iterations),
+        "pending": measure(lambda: tray.update_state(ServiceStatus.START_PENDING.value), iterations),
+    }
+
+
+def bench_import(repeats):
+    """冷启动导入耗时：每次在新的解释器中导入模块
+
+    导入 src.gui.settings 会经 ctk_styles 读取 (并创建) 配置文件，
+    因此子进程中的配置目录指向临时目录，与 startup / memory 基准一致。
+    """
+    code = (
+        "import sys, time\n"
+        "from pathlib import Path\n"
+        "start = time.perf_counter()\n"
+        "if sys.argv[1].startswith('src.'):\n"
+        "    from src.config import manager\n"
+        "    manager.CONFIG_DIR = Path(sys.argv[2])\n"
+        "    manager.CONFIG_FILE = manager.CONFIG_DIR / 'config.json'\n"
+        "__import__(sys.argv[1])\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    results = {}
+    for module in IMPORT_MODULES:
+        samples = []
+        error = None
+        for _ in range(repeats):
+            with tempfile.TemporaryDirectory() as config_dir:
+                completed = subprocess.run(
+                    [sys.executable, "-c", code, module, config_dir],
+                    cwd=str(PROJECT_ROOT),
+                    capture_output=True,
+                    text=True,
+                )
+            if completed.returncode != 0:
+                lines = completed.stderr.strip().splitlines()
+                error = lines[-1] if lines else f"returncode {completed.returncode}"
+                break
+            samples.append(float(completed.stdout.strip().splitlines()[-1]))
+        results[module] = {"error": error} if error else summarize(samples)
+    return results
+
+
+def bench_startup(repeats, query_latency):
+    """冷启动到托盘出现、到托盘显示出状态的耗时 (不含解释器自身启动)
+
+    cold 每次使用新的配置目录 (没有上次已知状态，须等第一次查询)；
+    warm 复用同一配置目录 (沿用上次已知状态)。
+    """
+    def launch(config_dir):
+        begin = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-c", STARTUP_HARNESS, str(PROJECT_ROOT), config_dir, str(query_latency)],
+            cwd=str(PROJECT_ROOT),
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        lines = completed.stdout.strip().splitlines()
+        if completed.returncode != 0 or len(lines) < 3:
+            errors = completed.stderr.strip().splitlines()
+            raise RuntimeError(errors[-1] if errors else f"returncode {completed.returncode}")
+        return time.perf_counter() - begin, float(lines[-3]), float(lines[-2]), lines[-1] == "1"
+
+    samples = []
+    wall = []
+    status = {"cold": [], "warm": []}
+    ui_imported = False
+    warm_dir = tempfile.mkdtemp()
+    try:
+        launch(warm_dir)    # 写入上次已知状态
+        for _ in range(repeats):
+            for kind, config_dir in (("cold", tempfile.mkdtemp()), ("warm", warm_dir)):
+                elapsed, to_tray, to_status, imported = launch(config_dir)
+                status[kind].append(to_status)
+                ui_imported = ui_imported or imported
+                if kind == "cold":
+                    wall.append(elapsed)
+                    samples.append(to_tray)
+    except (RuntimeError, subprocess.TimeoutExpired) as e:
+        return {"error": str(e)}
+    return {
+        "time_to_tray": summarize(samples),
+        "process_wall": summarize(wall),
+        "time_to_status": {kind: summarize(values) for kind, values in status.items()},
+        "query_latency_ms": query_latency * 1000,
+        "customtkinter_imported": ui_imported,
+    }
+
+
+def bench_memory(repeats, settle):
+    """各运行模式的常驻内存 (MB)，以及纯托盘模式相对默认模式的差值"""
+    results = {}
+    for mode in MEMORY_MODES:
+        samples = []
+        tk_loaded = False
+        for _ in range(repeats):
+            completed = subprocess.run(
+                [sys.executable, "-c", MEMORY_HARNESS, str(PROJECT_ROOT), mode, str(settle)],
+                cwd=str(PROJECT_ROOT),
+                capture_output=True,
+                text=True,
+                timeout=60,
+            )
+            lines = completed.stdout.strip().splitlines()
+            if completed.returncode != 0 or len(lines) < 2:
+                errors = completed.stderr.strip().splitlines()
+                samples = None
+                results[mode] = {"error": errors[-1] if errors else f"returncode {completed.returncode}"}
+                break
+            samples.append(int(lines[-2]) / 1024)
+            tk_loaded = tk_loaded or lines[-1] == "1"
+        if samples:
+            results[mode] = {
+                "rss_mb": statistics.median(samples),
+                "max_rss_mb": max(samples),
+                "tkinter_imported": tk_loaded,
+            }
+    tray_only = results["tray-only"].get("rss_mb")
+    for mode in ("default", "default-ui"):
+        baseline = results[mode].get("rss_mb")
+        if tray_only is not None and baseline is not None:
+            results[f"saved_vs_{mode}_mb"] = baseline - tray_only
+    return results
+
+
+# ============================================================================
+# 输出与对比
+# ============================================================================
+
+def flatten(data, prefix=""):
+    """嵌套字典展开为 {"a.b.c": 数值}"""
+    items = {}
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            items.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            items[path] = value
+    return items
+
+
+def compare(current, baseline):
+    """打印与基线相比变化超过 5% 的耗时 / 吞吐指标"""
+    old = flatten(baseline.get("results", {}))
+    new = flatten(current["results"])
+    print(f"\n与基线对比 (版本 {baseline.get('version', '?')} → {current['version']})：")
+    changed = 0
+    for key in sorted(new):
+        if key not in old or not old[key]:
+            continue
+        if not key.endswith(("p50_ms", "p99_ms", "ops_per_sec", ".rss_mb")):
+            continue
+        delta = (new[key] - old[key]) / old[key]
+        if abs(delta) < 0.05:
+            continue
+        # 吞吐越大越好，耗时越小越好
+        worse = delta < 0 if key.endswith("ops_per_sec") else delta > 0
+        mark = "❌" if worse else "✅"
+        print(f"  {mark} {key}: {old[key]:.3f} → {new[key]:.3f} ({delta:+.0%})")
+        changed += 1
+    if not changed:
+        print("  无超过 5% 的变化")
+
+
+def print_summary(results):
+    for name, data in results.items():
+        print(f"\n[{name}]")
+        if "error" in data:
+            print(f"  跳过: {data['error']}")
+        for key, value in data.items():
+            if isinstance(value, dict) and "error" in value:
+                print(f"  {key}: 跳过 ({value['error']})")
+        for key, value in flatten(data).items():
+            if key.endswith(("p50_ms", "p99_ms", "ops_per_sec", "_mb")):
+                print(f"  {key}: {value:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="性能基准测试 (内存后端，可无界面运行)")
+    parser.add_argument("--output", default=str(PROJECT_ROOT / "bench_results.json"), help="结果 JSON 文件路径")
+    parser.add_argument("--compare", metavar="BASELINE", help="与之前的结果文件对比")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="只运行指定的基准")
+    parser.add_argument("--iterations", type=int, default=2000, help="探测 / 配置 / 托盘基准的重复次数")
+    parser.add_argument("--rounds", type=int, default=5, help="每种驱动延迟下的切换轮数 (每轮开、关各一次)")
+    parser.add_argument("--latencies", type=float, nargs="+", default=[0.0, 0.05, 0.2],
+                        help="模拟的驱动启停延迟 (秒)")
+    parser.add_argument("--import-repeats", type=int, default=5, help="冷启动导入与启动的重复次数")
+    parser.add_argument("--startup-query-latency", type=float, default=0.2,
+                        help="启动基准中模拟的服务查询延迟 (秒)")
+    parser.add_argument("--memory-settle", type=float, default=1.0,
+                        help="常驻内存基准中，就绪后等待多久再读取内存 (秒)")
+    args = parser.parse_args()
+
+    selected = args.only or BENCHMARKS
+    runners = {
+        "probe": lambda: bench_probe(args.iterations),
+        "toggle": lambda: bench_toggle(args.latencies, args.rounds),
+        "config": lambda: bench_config(args.iterations),
+        "tray": lambda: bench_tray(args.iterations),
+        "import": lambda: bench_import(args.import_repeats),
+        "startup": lambda: bench_startup(args.import_repeats, args.startup_query_latency),
+        "memory": lambda: bench_memory(args.import_repeats, args.memory_settle),
+    }
+    print("=" * 50)
+    print("性能基准测试")
+    print("=" * 50)
+    results = {}
+    for name in BENCHMARKS:
+        if name in selected:
+            print(f"运行 {name} ...")
+            results[name] = runners[name]()
+
+    report = {
+        "version": __version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print_summary(results)
+    print(f"\n✅ 结果已写入 {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
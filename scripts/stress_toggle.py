@@ -0,0 +1,106 @@
+"""
+切换请求压力测试
+用内存后端模拟驱动服务与 Proxifier 进程，以每秒数百次的频率提交切换请求，
+检查期望状态协调器能否合并请求并最终收敛到最后一次意图。
+使用方法: python scripts/stress_toggle.py --rate 500 --duration 3
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# 获取项目根目录 (scripts 目录的上一级)
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.core import process, service  # noqa: E402
+from src.core.backend import FakeServiceBackend  # noqa: E402
+from src.core.constants import ServiceStatus  # noqa: E402
+from src.core.reconciler import ToggleReconciler  # noqa: E402
+from src.core.toggle import DIRECTION_OFF, DIRECTION_ON  # noqa: E402
+
+SERVICE_NAME = "proxifierdrv"
+EXE_PATH = r"C:\Program Files (x86)\Proxifier\Proxifier.exe"
+
+
+def run_stress(rate, duration, start_latency, stop_latency, close_latency, seed):
+    """按固定频率提交随机切换请求，返回统计结果"""
+    backend = FakeServiceBackend(
+        {SERVICE_NAME: ServiceStatus.STOPPED.value},
+        start_latency=start_latency,
+        stop_latency=stop_latency,
+    )
+    provider = process.FakeProcessProvider(close_latency=close_latency)
+    service.set_backend(backend)
+    process.set_process_provider(provider)
+
+    reconciler = ToggleReconciler(lambda: (SERVICE_NAME, EXE_PATH))
+    rng = random.Random(seed)
+    interval = 1.0 / rate
+    last = None
+    begin = time.monotonic()
+    next_at = begin
+    while time.monotonic() - begin < duration:
+        if rng.random() < 0.5:
+            last = reconciler.toggle()
+        else:
+            last = rng.choice((DIRECTION_ON, DIRECTION_OFF))
+            reconciler.request(last)
+        next_at += interval
+        delay = next_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    submitted = time.monotonic() - begin
+
+    settle_start = time.monotonic()
+    idle = reconciler.wait_idle(timeout=30)
+    settle = time.monotonic() - settle_start
+    reconciler.stop()
+
+    status = service.get_service_status(SERVICE_NAME)
+    running = process.is_proxifier_running(EXE_PATH)
+    expected = (ServiceStatus.RUNNING.value, True) if last == DIRECTION_ON else (ServiceStatus.STOPPED.value, False)
+    instances = len(provider.snapshot().find_by_path(EXE_PATH))
+    return {
+        "requests": reconciler.requests,
+        "request_rate": reconciler.requests / submitted,
+        "runs": reconciler.runs,
+        "net_start": backend.calls["start"],
+        "net_stop": backend.calls["stop"],
+        "settle_seconds": settle,
+        "final_intent": last,
+        "converged": idle and (status, running) == expected and instances <= 1,
+        "instances": instances,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="切换请求压力测试")
+    parser.add_argument("--rate", type=float, default=500, help="每秒提交的切换请求数")
+    parser.add_argument("--duration", type=float, default=3.0, help="持续时间 (秒)")
+    parser.add_argument("--start-latency", type=float, default=0.05, help="模拟驱动启动耗时 (秒)")
+    parser.add_argument("--stop-latency", type=float, default=0.05, help="模拟驱动停止耗时 (秒)")
+    parser.add_argument("--close-latency", type=float, default=0.01, help="模拟进程正常退出耗时 (秒)")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    stats = run_stress(args.rate, args.duration, args.start_latency,
+                       args.stop_latency, args.close_latency, args.seed)
+    print("=" * 50)
+    print("切换请求压力测试")
+    print("=" * 50)
+    print(f"  提交请求: {stats['requests']} ({stats['request_rate']:.0f}/s)")
+    print(f"  协调轮次: {stats['runs']}")
+    print(f"  net start / net stop: {stats['net_start']} / {stats['net_stop']}")
+    print(f"  最后意图: {stats['final_intent']}，收敛耗时 {stats['settle_seconds'] * 1000:.0f} ms")
+    print(f"  Proxifier 实例数: {stats['instances']}")
+    if stats["converged"]:
+        print("✅ 已收敛到最后一次意图")
+        return 0
+    print("❌ 未收敛到最后一次意图")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,15 +2,19 @@
 import sys
 import os
 import json
+import time
 from pathlib import Path
 
+from ..core import metrics
+
 # 默认配置
 DEFAULT_CONFIG = {
     "proxifier_exe_path": r"D:\Software\Common\Proxifier\Proxifier.exe",
     "service_name": "proxifierdrv",
     "auto_start": False,  # 是否开机启动
     "start_minimized": True,  # 启动时是否最小化（不最小化则打开设置界面）
-    "appearance_mode": "system"  # 主题模式: "light", "dark", "system"
+    "appearance_mode": "system",  # 主题模式: "light", "dark", "system"
+    "terminate_grace_timeout": 0.5  # 关闭 Proxifier 时等待正常退出的秒数，0 表示直接强制结束
 }
 
 # 获取项目根目录
@@ -47,8 +51,10 @@ def load_config():
     
     # 如果缓存存在，直接返回副本
     if _config_cache is not None:
+        metrics.counter("toggler_config_cache_hits_total", "配置读取命中内存缓存次数").inc()
         return _config_cache.copy()
     
+    start = time.perf_counter()
     _ensure_config_dir()
     
     if not CONFIG_FILE.exists():
@@ -66,12 +72,20 @@ def load_config():
         
         # 缓存配置
         _config_cache = config.copy()
+        metrics.histogram("toggler_config_load_seconds", "从磁盘加载配置耗时").observe(time.perf_counter() - start)
         return config
     except Exception as e:
+        metrics.counter("toggler_errors_total", "被捕获并打印的错误数", {"source": "config"}).inc()
         print(f"加载配置文件失败: {e}")
         return DEFAULT_CONFIG.copy()
 
 
+def invalidate_cache():
+    """丢弃内存缓存，下次读取时重新加载磁盘文件 (配置可能已被其他进程修改)"""
+    global _config_cache
+    _config_cache = None
+
+
 def save_config(config):
     """保存配置到文件
     
@@ -79,6 +93,7 @@ def save_config(config):
     """
     global _config_cache
     
+    start = time.perf_counter()
     _ensure_config_dir()
     
     try:
@@ -87,8 +102,10 @@ def save_config(config):
         
         # 更新缓存
         _config_cache = config.copy()
+        metrics.histogram("toggler_config_save_seconds", "保存配置耗时").observe(time.perf_counter() - start)
         return True
     except Exception as e:
+        metrics.counter("toggler_errors_total", "被捕获并打印的错误数", {"source": "config"}).inc()
         print(f"保存配置文件失败: {e}")
         return False
 
@@ -139,7 +156,23 @@ def get_start_minimized():
     return config.get("start_minimized", DEFAULT_CONFIG["start_minimized"])
 
 
+def get_last_status_file():
+    """上次已知状态文件路径 (见 core.last_status)"""
+    return CONFIG_DIR / "last_status.json"
+
+
 def get_appearance_mode():
     """获取主题模式"""
     config = load_config()
     return config.get("appearance_mode", DEFAULT_CONFIG["appearance_mode"])
+
+
+def get_terminate_grace_timeout():
+    """获取关闭 Proxifier 时等待正常退出的秒数 (0 表示直接强制结束)"""
+    config = load_config()
+    value = config.get("terminate_grace_timeout", DEFAULT_CONFIG["terminate_grace_timeout"])
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        print(f"配置项 terminate_grace_timeout 无效: {value!r}，使用默认值")
+        return DEFAULT_CONFIG["terminate_grace_timeout"]
@@ -0,0 +1,118 @@
+"""asyncio 后台事件循环模块
+
+托盘与主界面的后台工作统一提交到一个后台事件循环线程 (submit)，
+service / process 中的阻塞调用通过 run_blocking 放到共享的有界线程池中执行：
+
+- 切换协调任务 (reconciler) 运行在这个事件循环上，收敛过程复用同步的
+  TogglePipeline，截止时间、取消、指标与追踪只有一份实现
+- 同时进行的阻塞调用数量受信号量限制
+- 取消只让等待方立即返回；需要中止阻塞调用时使用 Deadline / CancelToken
+"""
+import asyncio
+import concurrent.futures
+import functools
+import threading
+import weakref
+
+# 同时进行的阻塞调用数上限
+MAX_CONCURRENCY = 4
+
+# 每个事件循环各自的并发信号量
+_limits = weakref.WeakKeyDictionary()
+
+
+def _limit():
+    loop = asyncio.get_running_loop()
+    semaphore = _limits.get(loop)
+    if semaphore is None:
+        semaphore = _limits[loop] = asyncio.Semaphore(MAX_CONCURRENCY)
+    return semaphore
+
+
+async def run_blocking(func, *args, **kwargs):
+    """在线程池中执行阻塞函数 (计入并发上限)
+
+    取消只会让等待方立即返回，已开始的阻塞调用仍会在线程池中执行完毕。
+    """
+    loop = asyncio.get_running_loop()
+    async with _limit():
+        return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+# ============================================================================
+# 后台事件循环线程
+# ============================================================================
+
+class EventLoopThread:
+    """在单个后台线程中运行的事件循环，托盘与主界面的后台工作都提交到这里"""
+
+    def __init__(self, max_workers=MAX_CONCURRENCY):
+        self.max_workers = max_workers
+        self.loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """启动事件循环线程 (重复调用无副作用)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        # 阻塞调用共用一个有界线程池，而不是每次点击新建线程
+        self.loop.set_default_executor(
+            concurrent.futures.ThreadPoolExecutor(self.max_workers, thread_name_prefix="core")
+        )
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def submit(self, coro):
+        """提交协程 (任意线程可调用)
+
+        Returns:
+            concurrent.futures.Future: 可用于等待结果或 cancel() 取消
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, callback, *args):
+        """在事件循环线程中执行回调 (任意线程可调用)"""
+        self.start()
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self):
+        """停止事件循环"""
+        with self._lock:
+            if self.loop is not None and self.loop.is_running():
+                self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+_loop_thread = None
+_loop_thread_lock = threading.Lock()
+
+
+def get_event_loop_thread():
+    """获取应用共享的后台事件循环线程"""
+    global _loop_thread
+    with _loop_thread_lock:
+        if _loop_thread is None:
+            _loop_thread = EventLoopThread()
+        return _loop_thread
+
+
+def submit(coro):
+    """把协程提交到共享的后台事件循环
+
+    Returns:
+        concurrent.futures.Future
+    """
+    return get_event_loop_thread().submit(coro)
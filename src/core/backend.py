@@ -0,0 +1,285 @@
+"""服务控制后端模块
+
+将服务的 查询 / 启动 / 停止 / 等待 抽象为统一接口，便于替换实现：
+- SubprocessServiceBackend (见 service.py)：基于 sc / net 命令的真实实现
+- FakeServiceBackend：纯内存实现，延迟可配置，可在任意平台上测量切换延迟与监控吞吐
+"""
+import threading
+import time
+from dataclasses import dataclass
+
+from .constants import ServiceStatus
+from .deadline import check as check_cancelled
+from .deadline import clamp
+from .service_state import (
+    STATE_RUNNING, STATE_START_PENDING, STATE_STOP_PENDING, STATE_STOPPED, ServiceState,
+)
+
+
+# 等待状态时的轮询退避参数 (秒)
+WAIT_INITIAL_INTERVAL = 0.05
+WAIT_MAX_INTERVAL = 0.5
+WAIT_BACKOFF_FACTOR = 2.0
+
+
+@dataclass
+class WaitResult:
+    """等待服务状态的结果"""
+    reached: bool       # 是否在截止时间前到达目标状态
+    status: str         # 最后一次观察到的状态
+    elapsed: float      # 实际耗时 (秒)
+    polls: int          # 查询次数
+    timed_out: bool = False     # 是否因截止时间到达 (或查询超时) 而结束
+
+    def __bool__(self):
+        return self.reached
+
+
+class ServiceBackend:
+    """服务控制后端接口"""
+
+    def query_state(self, service_name, deadline=None):
+        """查询服务的完整状态
+
+        Args:
+            service_name: 服务名称
+            deadline: Deadline (可选)；超时返回 TIMEOUT 状态，取消时抛出 OperationCancelled
+
+        Returns:
+            ServiceState: 含 STATE 数值、PID、退出码与 WAIT_HINT 的状态记录
+        """
+        raise NotImplementedError
+
+    def query(self, service_name, deadline=None):
+        """查询服务状态
+
+        Returns:
+            str: ServiceStatus 对应的字符串值
+        """
+        return self.query_state(service_name, deadline).status
+
+    def query_states(self, service_names, deadline=None):
+        """批量查询服务状态
+
+        Returns:
+            dict: {服务名: ServiceState}
+        """
+        return {name: self.query_state(name, deadline) for name in service_names}
+
+    def probe_batch(self, service_names, exe_names, deadline=None):
+        """一次性查询多个服务与进程
+
+        Returns:
+            tuple: ({服务名: ServiceState}, {可执行文件名: 是否运行})；
+                   后端不负责进程查询时第二项为 None
+        """
+        return self.query_states(service_names, deadline), None
+
+    def start(self, service_name, deadline=None):
+        """发起启动请求
+
+        Returns:
+            int: 命令返回码，0 表示请求已被接受
+        """
+        raise NotImplementedError
+
+    def stop(self, service_name, deadline=None):
+        """发起停止请求
+
+        Returns:
+            int: 命令返回码，0 表示请求已被接受
+        """
+        raise NotImplementedError
+
+    def wait(self, service_name, target, timeout,
+             initial_interval=WAIT_INITIAL_INTERVAL, max_interval=WAIT_MAX_INTERVAL, deadline=None):
+        """等待服务进入目标状态
+
+        以指数退避轮询，一旦观察到目标状态立即返回；过渡态下优先按
+        WAIT_HINT 推算下次轮询时间。服务未安装或查询超时时提前结束，不会空等到截止时间。
+
+        Args:
+            service_name: 服务名称
+            target: 目标状态 (ServiceStatus 字符串值)
+            timeout: 最长等待秒数 (与 deadline 取较早者)
+            initial_interval: 首次轮询间隔秒数
+            max_interval: 轮询间隔上限秒数
+            deadline: Deadline (可选)；取消时抛出 OperationCancelled
+
+        Returns:
+            WaitResult: 等待结果 (可直接作为 bool 使用)
+        """
+        start = self._now()
+        end = start + clamp(deadline, timeout)
+        interval = initial_interval
+        polls = 0
+        while True:
+            check_cancelled(deadline)
+            state = self.query_state(service_name, deadline)
+            status = state.status
+            polls += 1
+            now = self._now()
+            if status == target:
+                return WaitResult(True, status, now - start, polls)
+            if status == ServiceStatus.NOT_INSTALLED.value:
+                return WaitResult(False, status, now - start, polls)
+            if status == ServiceStatus.TIMEOUT.value or now >= end:
+                return WaitResult(False, status, now - start, polls, timed_out=True)
+            self._pause(min(state.next_poll_interval(interval), end - now))
+            interval = min(interval * WAIT_BACKOFF_FACTOR, max_interval)
+
+    def _now(self):
+        """单调时钟 (子类可替换为虚拟时钟)"""
+        return time.monotonic()
+
+    def _pause(self, seconds):
+        """休眠 (子类可替换为虚拟休眠)"""
+        time.sleep(seconds)
+
+
+class FakeServiceBackend(ServiceBackend):
+    """内存中的服务后端 (确定性，可配置延迟)
+
+    启动 / 停止请求会立即返回，服务在 start_latency / stop_latency 秒后
+    才真正进入目标状态，期间查询结果为 START_PENDING / STOP_PENDING，
+    并带有与延迟相符的 WAIT_HINT。
+    """
+
+    # 未安装服务时 net start / net stop 的返回码
+    NOT_INSTALLED_RC = 2
+
+    _STATE_CODES = {
+        ServiceStatus.STOPPED.value: STATE_STOPPED,
+        ServiceStatus.START_PENDING.value: STATE_START_PENDING,
+        ServiceStatus.STOP_PENDING.value: STATE_STOP_PENDING,
+        ServiceStatus.RUNNING.value: STATE_RUNNING,
+    }
+
+    def __init__(self, services=None, query_latency=0.0, command_latency=0.0,
+                 start_latency=0.0, stop_latency=0.0, clock=time.monotonic, sleep=time.sleep):
+        """
+        Args:
+            services: 初始服务表 {服务名: ServiceStatus 字符串值}
+            query_latency: 每次查询的耗时 (秒)
+            command_latency: 每次启动/停止命令本身的耗时 (秒)
+            start_latency: 启动请求被接受后到进入 RUNNING 的耗时 (秒)
+            stop_latency: 停止请求被接受后到进入 STOPPED 的耗时 (秒)
+            clock: 单调时钟函数
+            sleep: 休眠函数
+        """
+        self.query_latency = query_latency
+        self.command_latency = command_latency
+        self.start_latency = start_latency
+        self.stop_latency = stop_latency
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._services = {}
+        self.calls = {"query": 0, "batch": 0, "start": 0, "stop": 0}
+        for name, status in (services or {}).items():
+            self.install(name, status)
+
+    def _now(self):
+        return self._clock()
+
+    def _pause(self, seconds):
+        self._sleep(seconds)
+
+    def install(self, service_name, status=ServiceStatus.STOPPED.value):
+        """注册（或重置）一个服务"""
+        with self._lock:
+            self._services[service_name.lower()] = {
+                "status": status,
+                "target": None,
+                "ready_at": None,
+                "wait_hint": 0,
+                "checkpoint": 0,
+            }
+
+    def uninstall(self, service_name):
+        """移除一个服务"""
+        with self._lock:
+            self._services.pop(service_name.lower(), None)
+
+    def _settle(self, entry):
+        """根据时钟推进过渡态，返回当前可见状态"""
+        if entry["target"] is not None and self._clock() >= entry["ready_at"]:
+            entry["status"] = entry["target"]
+            entry["target"] = None
+            entry["ready_at"] = None
+        if entry["target"] is not None:
+            if entry["target"] == ServiceStatus.RUNNING.value:
+                return ServiceStatus.START_PENDING.value
+            return ServiceStatus.STOP_PENDING.value
+        return entry["status"]
+
+    def _delay(self, latency, deadline):
+        """模拟耗时；超过截止时间时只等到截止时间并返回 False"""
+        if not latency:
+            return True
+        remaining = clamp(deadline, latency)
+        self._sleep(remaining)
+        return remaining >= latency
+
+    def _transition(self, service_name, target, latency, deadline=None):
+        if not self._delay(self.command_latency, deadline):
+            return -1
+        with self._lock:
+            entry = self._services.get(service_name.lower())
+            if entry is None:
+                return self.NOT_INSTALLED_RC
+            if self._settle(entry) == target:
+                return 0
+            if latency <= 0:
+                entry["status"] = target
+                entry["target"] = None
+                entry["ready_at"] = None
+            else:
+                entry["target"] = target
+                entry["ready_at"] = self._clock() + latency
+                entry["wait_hint"] = int(latency * 1000)
+                entry["checkpoint"] = 0
+            return 0
+
+    def _state_locked(self, service_name):
+        self.calls["query"] += 1
+        entry = self._services.get(service_name.lower())
+        if entry is None:
+            return ServiceState(name=service_name, status=ServiceStatus.NOT_INSTALLED.value)
+        status = self._settle(entry)
+        state = ServiceState(
+            name=service_name,
+            status=status,
+            state_code=self._STATE_CODES.get(status),
+        )
+        if entry["target"] is not None:
+            entry["checkpoint"] += 1
+            state.checkpoint = entry["checkpoint"]
+            state.wait_hint = entry["wait_hint"]
+        return state
+
+    def query_state(self, service_name, deadline=None):
+        check_cancelled(deadline)
+        if not self._delay(self.query_latency, deadline):
+            return ServiceState(name=service_name, status=ServiceStatus.TIMEOUT.value)
+        with self._lock:
+            return self._state_locked(service_name)
+
+    def query_states(self, service_names, deadline=None):
+        check_cancelled(deadline)
+        # 批量查询只计一次往返延迟
+        if not self._delay(self.query_latency, deadline):
+            return {name: ServiceState(name=name, status=ServiceStatus.TIMEOUT.value) for name in service_names}
+        with self._lock:
+            self.calls["batch"] += 1
+            return {name: self._state_locked(name) for name in service_names}
+
+    def start(self, service_name, deadline=None):
+        with self._lock:
+            self.calls["start"] += 1
+        return self._transition(service_name, ServiceStatus.RUNNING.value, self.start_latency, deadline)
+
+    def stop(self, service_name, deadline=None):
+        with self._lock:
+            self.calls["stop"] += 1
+        return self._transition(service_name, ServiceStatus.STOPPED.value, self.stop_latency, deadline)
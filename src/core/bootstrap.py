@@ -0,0 +1,328 @@
+"""启动依赖图模块
+
+把启动过程拆成带依赖关系的小步骤：主线程步骤按声明顺序执行，
+后台步骤 (首次状态探测、图标解码等) 在依赖满足后立即在独立线程中开始，
+与 Tk 初始化等主线程工作并行。主线程步骤依赖后台步骤时会等待其完成。
+
+每个步骤的起止时间 (相对启动起点)、所在线程与结果都会记录下来：
+- 写入时间线追踪 (trace) 与指标 toggler_startup_step_seconds
+- format_timeline() 生成文本时间线；设置环境变量 PROXIFIER_TOGGLER_STARTUP_TIMELINE
+  (run.py --startup-timeline) 时，report_when_done() 在全部步骤完成后打印到控制台
+
+另有进程级的启动里程碑 (如托盘真正显示出来的 "tray_visible")，
+供启动剖析 (core.startup_profile) 等在其他线程中等待；
+主线程完成启动工作、进入等待或消息循环时调用 main_thread_idle()，
+需要在主线程中收尾的工作 (如停止主线程的 cProfile) 在那里执行。
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from . import metrics, trace
+
+# 设置后在启动完成时打印时间线 (由 run.py --startup-timeline 设置)
+TIMELINE_ENV = "PROXIFIER_TOGGLER_STARTUP_TIMELINE"
+
+# 托盘图标已显示 (托盘消息循环已开始)，附带 TrayIcon 实例
+MILESTONE_TRAY_VISIBLE = "tray_visible"
+# 主线程的启动工作已完成 (见 main_thread_idle)
+MILESTONE_MAIN_THREAD_IDLE = "main_thread_idle"
+
+STEP_OK = "ok"
+STEP_ERROR = "error"
+STEP_SKIPPED = "skipped"
+
+
+def timeline_enabled():
+    return bool(os.environ.get(TIMELINE_ENV))
+
+
+@dataclass
+class Milestone:
+    """一个启动里程碑"""
+    name: str
+    at: float                   # time.perf_counter() 读数
+    payload: object = None
+
+
+_milestones = {}
+_milestones_changed = threading.Condition()
+_idle_callbacks = []
+
+# 本进程创建过的全部 Bootstrap (按创建顺序，供启动剖析报告列出时间线)
+_instances = []
+
+
+def instances():
+    """本进程创建过的全部 Bootstrap"""
+    return list(_instances)
+
+
+def mark(name, payload=None):
+    """记录启动里程碑 (同名只记录第一次)"""
+    with _milestones_changed:
+        if name in _milestones:
+            return
+        _milestones[name] = Milestone(name, time.perf_counter(), payload)
+        _milestones_changed.notify_all()
+    trace.instant(name, "startup")
+
+
+def on_main_thread_idle(callback):
+    """登记在主线程完成启动工作时 (于主线程中) 执行的回调"""
+    with _milestones_changed:
+        _idle_callbacks.append(callback)
+
+
+def main_thread_idle():
+    """主线程的启动工作已完成，即将进入等待或消息循环
+
+    只在主线程中生效：执行 on_main_thread_idle 登记的回调并记录里程碑。
+    重复调用无副作用，可在每个阻塞点之前调用。
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    with _milestones_changed:
+        callbacks = list(_idle_callbacks)
+        _idle_callbacks.clear()
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception as e:
+            print(f"主线程收尾回调失败: {e}")
+    mark(MILESTONE_MAIN_THREAD_IDLE)
+
+
+def wait_for(name, timeout=None):
+    """等待里程碑出现
+
+    Returns:
+        Milestone: 超时时为 None
+    """
+    with _milestones_changed:
+        _milestones_changed.wait_for(lambda: name in _milestones, timeout)
+        return _milestones.get(name)
+
+
+@dataclass
+class StepRecord:
+    """一个步骤的执行记录 (时间为相对启动起点的秒数)"""
+    name: str
+    thread: str = ""
+    start: float = None
+    end: float = None
+    status: str = None          # STEP_OK / STEP_ERROR / STEP_SKIPPED，未完成时为 None
+    error: str = None
+
+    @property
+    def duration(self):
+        if self.start is None or self.end is None:
+            return 0.0
+        return self.end - self.start
+
+
+class _Step:
+    def __init__(self, name, func, after, background):
+        self.name = name
+        self.func = func
+        self.after = tuple(after)
+        self.background = background
+        self.done = threading.Event()
+        self.result = None
+        self.record = StepRecord(name)
+        self.started = False
+
+
+class Bootstrap:
+    """启动步骤依赖图
+
+    用法：
+        boot = Bootstrap("startup")
+        boot.add("monitor", create_monitor)
+        boot.add("probe", first_probe, after=("monitor",), background=True)
+        boot.run()
+    run() 可多次调用，每次执行此前尚未开始的步骤；后声明的步骤可以依赖已完成或正在进行的步骤。
+    """
+
+    def __init__(self, name="startup", origin=None, clock=time.perf_counter):
+        """
+        Args:
+            name: 阶段名称 (用于时间线、追踪与指标标签)
+            origin: 时间线起点 (clock 的读数)，默认为首次 run() 的时刻；
+                    传入另一 Bootstrap 的 origin 可让两段时间线共用同一时间轴
+        """
+        self.name = name
+        self.origin = origin
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._steps = {}
+        self._pending = 0           # 已开始但尚未完成的步骤数
+        self.finished_at = None     # 全部步骤完成的时刻 (相对起点，秒)
+        _instances.append(self)
+
+    def add(self, name, func, after=(), background=False):
+        """声明一个步骤
+
+        Args:
+            func: 无参函数，返回值可通过 result(name) 取得
+            after: 依赖的步骤名 (须已声明)
+            background: 是否在独立线程中执行
+        """
+        with self._lock:
+            if name in self._steps:
+                raise ValueError(f"启动步骤重复: {name}")
+            for dep in after:
+                if dep not in self._steps:
+                    raise ValueError(f"启动步骤 {name} 依赖未声明的步骤: {dep}")
+            self._steps[name] = _Step(name, func, after, background)
+
+    def run(self):
+        """执行尚未开始的步骤：后台步骤启动线程，主线程步骤在当前线程依次执行
+
+        主线程步骤抛出的异常会在记录后继续向上抛出；后台步骤的异常只记录并打印，
+        依赖失败步骤的后续步骤被跳过。
+
+        Returns:
+            self
+        """
+        with self._lock:
+            if self.origin is None:
+                self.origin = self._clock()
+            steps = [step for step in self._steps.values() if not step.started]
+            for step in steps:
+                step.started = True
+            self._pending += len(steps)
+            self.finished_at = None
+        for step in steps:
+            if step.background:
+                threading.Thread(target=self._execute, args=(step, False),
+                                 name=f"bootstrap-{step.name}", daemon=True).start()
+        main = [step for step in steps if not step.background]
+        for index, step in enumerate(main):
+            try:
+                self._execute(step, True)
+            except Exception:
+                # 启动中止：其余主线程步骤不再执行，标记为跳过以免后台步骤一直等待
+                for rest in main[index + 1:]:
+                    self._skip(rest, f"步骤 {step.name} 失败，启动中止")
+                raise
+        return self
+
+    def _skip(self, step, reason):
+        record = step.record
+        record.thread = threading.current_thread().name
+        record.start = record.end = self._clock() - self.origin
+        record.status = STEP_SKIPPED
+        record.error = reason
+        step.done.set()
+        self._step_finished()
+
+    def _execute(self, step, propagate):
+        deps = [self._steps[dep] for dep in step.after]
+        for dep in deps:
+            dep.done.wait()
+        record = step.record
+        record.thread = threading.current_thread().name
+        record.start = self._clock() - self.origin
+        failed = [dep.name for dep in deps if dep.record.status != STEP_OK]
+        if failed:
+            self._skip(step, f"依赖的步骤未成功: {', '.join(failed)}")
+            return
+        error = None
+        try:
+            with trace.span(f"{self.name}.{step.name}", "startup"):
+                step.result = step.func()
+            record.status = STEP_OK
+        except Exception as e:
+            record.status = STEP_ERROR
+            record.error = f"{type(e).__name__}: {e}"
+            metrics.counter("toggler_errors_total", "被捕获并打印的错误数", {"source": "bootstrap"}).inc()
+            print(f"启动步骤 {step.name} 失败: {e}")
+            error = e
+        finally:
+            record.end = self._clock() - self.origin
+            metrics.histogram("toggler_startup_step_seconds", "启动各步骤耗时",
+                              {"phase": self.name, "step": step.name}).observe(record.duration)
+            step.done.set()
+            self._step_finished()
+        if error is not None and propagate:
+            raise error
+
+    def _step_finished(self):
+        with self._lock:
+            self._pending -= 1
+            if self._pending:
+                return
+            self.finished_at = self._clock() - self.origin
+        metrics.gauge("toggler_startup_seconds", "启动阶段全部步骤完成的耗时",
+                      {"phase": self.name}).set(self.finished_at)
+
+    def report_when_done(self):
+        """开启了时间线打印时，在已开始的步骤全部完成后打印时间线 (不阻塞)"""
+        if not timeline_enabled():
+            return
+
+        def report():
+            self.wait()
+            print(self.format_timeline())
+        threading.Thread(target=report, name=f"bootstrap-{self.name}-report", daemon=True).start()
+
+    def wait(self, timeout=None):
+        """等待已开始的步骤全部完成
+
+        Returns:
+            bool: 是否在超时前全部完成
+        """
+        until = None if timeout is None else time.monotonic() + timeout
+        for step in list(self._steps.values()):
+            if not step.started:
+                continue
+            remaining = None if until is None else max(0.0, until - time.monotonic())
+            if not step.done.wait(remaining):
+                return False
+        return True
+
+    def result(self, name, timeout=None):
+        """等待步骤完成并返回其结果 (失败、跳过或超时时为 None)"""
+        step = self._steps[name]
+        if not step.done.wait(timeout) or step.record.status != STEP_OK:
+            return None
+        return step.result
+
+    def timeline(self):
+        """各步骤的执行记录 (按开始时间排序)"""
+        records = [step.record for step in self._steps.values() if step.record.start is not None]
+        return sorted(records, key=lambda record: record.start)
+
+    def to_dict(self):
+        return {
+            "phase": self.name,
+            "total_ms": None if self.finished_at is None else self.finished_at * 1000,
+            "steps": [
+                {
+                    "name": record.name,
+                    "thread": record.thread,
+                    "start_ms": record.start * 1000,
+                    "end_ms": None if record.end is None else record.end * 1000,
+                    "duration_ms": record.duration * 1000,
+                    "status": record.status,
+                    "error": record.error,
+                }
+                for record in self.timeline()
+            ],
+        }
+
+    def format_timeline(self):
+        """文本时间线：每个步骤的起止时间、耗时与线程"""
+        total = "进行中" if self.finished_at is None else f"{self.finished_at * 1000:.1f} ms"
+        lines = [f"启动时间线 [{self.name}] (共 {total})"]
+        width = max((len(record.name) for record in self.timeline()), default=0)
+        for record in self.timeline():
+            end = "…" if record.end is None else f"{record.end * 1000:7.1f}"
+            line = (f"  {record.name:<{width}}  {record.start * 1000:7.1f} → {end} ms"
+                    f"  ({record.duration * 1000:6.1f} ms)  {record.thread}")
+            if record.status != STEP_OK:
+                line += f"  [{record.status or '进行中'}{': ' + record.error if record.error else ''}]"
+            lines.append(line)
+        return "\n".join(lines)
@@ -9,7 +9,10 @@ class ServiceStatus(Enum):
     """服务状态枚举"""
     RUNNING = "RUNNING"
     STOPPED = "STOPPED"
+    START_PENDING = "START_PENDING"
+    STOP_PENDING = "STOP_PENDING"
     NOT_INSTALLED = "NOT_INSTALLED"
+    TIMEOUT = "TIMEOUT"
     UNKNOWN = "UNKNOWN"
     ERROR = "ERROR"
     LOADING = "LOADING"
@@ -29,7 +32,10 @@ class UIStrings:
     STATUS_MAP = {
         ServiceStatus.RUNNING: "运行中",
         ServiceStatus.STOPPED: "已停止",
+        ServiceStatus.START_PENDING: "正在启动",
+        ServiceStatus.STOP_PENDING: "正在停止",
         ServiceStatus.NOT_INSTALLED: "未安装",
+        ServiceStatus.TIMEOUT: "查询超时",
         ServiceStatus.UNKNOWN: "未知状态",
         ServiceStatus.ERROR: "服务错误",
         ServiceStatus.LOADING: "正在获取"
@@ -45,6 +51,7 @@ class UIStrings:
         return f"{cls.APP_TITLE} v{__version__}"
 
     CURRENT_STATUS = "当前状态"
+    STATUS_STALE = "上次记录"     # 启动时沿用的上次已知状态，尚未经实时探测确认
     SERVICE_NAME = "驱动服务"
     PROCESS_STATUS = "进程状态"
     
@@ -58,6 +65,7 @@ class UIStrings:
     TRAY_MAIN_UI = "主界面"
     TRAY_AUTO_START = "开机自启动"
     TRAY_MINIMIZED = "最小化启动"
+    TRAY_EXPORT_METRICS = "导出性能指标"
     TRAY_QUIT = "退出"
     
     # 通知文案
@@ -0,0 +1,104 @@
+"""截止时间与取消模块
+
+核心操作 (服务查询 / 启停 / 等待、进程启动 / 终止、切换) 都可以接收一个 Deadline，
+它同时携带截止时间与可选的 CancelToken，并一路传到子进程层：
+- 截止时间到达时，正在运行的 sc / net 等子进程会被结束，结果标记为超时
+  (服务状态为 ServiceStatus.TIMEOUT，而不是 UNKNOWN / ERROR)
+- CancelToken 被取消时，正在进行的操作尽快停止并抛出 OperationCancelled
+"""
+import threading
+import time
+
+
+class OperationCancelled(Exception):
+    """操作已被取消"""
+
+
+class CancelToken:
+    """可在任意线程中触发的取消标记"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """请求取消"""
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        """等待取消，返回是否已被取消"""
+        return self._event.wait(timeout)
+
+
+class Deadline:
+    """截止时间 (可选) + 取消标记 (可选)"""
+
+    def __init__(self, timeout=None, token=None, clock=time.monotonic):
+        """
+        Args:
+            timeout: 距截止时间的秒数，None 表示不限时
+            token: CancelToken，None 表示不可取消
+            clock: 单调时钟函数
+        """
+        self._clock = clock
+        self.expires_at = None if timeout is None else clock() + timeout
+        self.token = token
+
+    def remaining(self):
+        """剩余秒数 (不小于 0)；不限时返回 None"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - self._clock())
+
+    @property
+    def expired(self):
+        return self.expires_at is not None and self._clock() >= self.expires_at
+
+    @property
+    def cancelled(self):
+        return self.token is not None and self.token.cancelled
+
+    @property
+    def done(self):
+        """已超时或已取消"""
+        return self.expired or self.cancelled
+
+    def clamp(self, timeout):
+        """取 timeout 与剩余时间中较小者 (None 表示不限时)"""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
+
+    def check(self):
+        """已取消时抛出 OperationCancelled"""
+        if self.cancelled:
+            raise OperationCancelled("操作已取消")
+
+    def sleep(self, seconds):
+        """休眠至多 seconds 秒 (不超过截止时间)，取消时提前返回
+
+        Returns:
+            bool: 是否未被取消
+        """
+        seconds = self.clamp(seconds)
+        if self.token is not None:
+            return not self.token.wait(seconds)
+        time.sleep(seconds)
+        return True
+
+
+def clamp(deadline, timeout):
+    """deadline 可为 None 的 Deadline.clamp"""
+    return timeout if deadline is None else deadline.clamp(timeout)
+
+
+def check(deadline):
+    """deadline 可为 None 的 Deadline.check"""
+    if deadline is not None:
+        deadline.check()
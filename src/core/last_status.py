@@ -0,0 +1,87 @@
+"""上次已知状态持久化模块
+
+每次启动都要等第一次 sc query 返回后托盘与主界面才能显示真实状态。
+这里把最近一次确认的服务 / 进程状态连同时间戳保存到磁盘，
+下次启动时先用它渲染托盘与状态面板 (标记为"上次记录")，
+第一次实时探测返回后再替换为确认的状态。
+
+只保存稳定状态 (运行中 / 已停止 / 未安装)；启停过渡与查询超时不写入。
+记录同时保存服务名称与 Proxifier 路径，配置变化后旧记录自动失效。
+"""
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+
+from .constants import ServiceStatus
+
+# 可作为上次已知状态保存的服务状态
+PERSISTED_STATUSES = (
+    ServiceStatus.RUNNING.value,
+    ServiceStatus.STOPPED.value,
+    ServiceStatus.NOT_INSTALLED.value,
+)
+
+
+@dataclass
+class LastStatus:
+    """一条上次已知状态记录"""
+    service_name: str
+    exe_path: str
+    service_status: str
+    process_running: bool
+    observed_at: float          # 观测时间 (time.time())
+
+    @property
+    def status(self):
+        """(service_status, process_running)，与 StatusMonitor.last_status 格式一致"""
+        return (self.service_status, self.process_running)
+
+
+class LastStatusStore:
+    """上次已知状态的文件存储"""
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self._clock = clock
+
+    def load(self, service_name, exe_path):
+        """读取与当前配置匹配的记录
+
+        Returns:
+            LastStatus: 文件不存在、损坏或与当前配置不匹配时为 None
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                record = LastStatus(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"读取上次状态失败: {e}")
+            return None
+        if record.service_name != service_name or record.exe_path != exe_path:
+            return None
+        if record.service_status not in PERSISTED_STATUSES:
+            return None
+        return record
+
+    def save(self, service_name, exe_path, service_status, process_running):
+        """保存一次确认的状态 (非稳定状态忽略)
+
+        Returns:
+            bool: 是否写入
+        """
+        if service_status not in PERSISTED_STATUSES:
+            return False
+        record = LastStatus(service_name, exe_path, service_status, bool(process_running), self._clock())
+        # 先写临时文件再替换，避免退出或断电时留下半个文件
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(asdict(record), f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            return True
+        except Exception as e:
+            print(f"保存上次状态失败: {e}")
+            return False
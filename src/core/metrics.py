@@ -0,0 +1,304 @@
+"""进程内指标模块
+
+轻量的计数器 (Counter)、仪表 (Gauge) 与固定分桶直方图 (Histogram)，
+用于记录状态探测、切换、配置读写与界面刷新等热点路径的次数与耗时。
+全部指标登记在共享的 MetricsRegistry 中，可随时导出为 JSON 或
+Prometheus 文本格式，便于在用户机器上查看每分钟创建的子进程数、
+切换耗时的 p50 / p99 以及界面刷新开销。
+"""
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# 默认分桶上界 (秒)，覆盖从亚毫秒级的界面刷新到十几秒的驱动启停
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(key, extra=()):
+    items = list(key) + list(extra)
+    if not items:
+        return ""
+    parts = []
+    for name, value in items:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """只增不减的计数器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def reset(self):
+        with self._lock:
+            self.value = 0
+
+
+class Gauge:
+    """可任意设置的瞬时值"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def reset(self):
+        self.set(0)
+
+
+class Histogram:
+    """固定分桶直方图 (记录耗时等分布)"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets) + 1)     # 最后一个为 +Inf 桶
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.sum = 0.0
+            self.max = 0.0
+
+    @contextmanager
+    def time(self):
+        """with 块计时，耗时 (秒) 计入直方图"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def quantile(self, q):
+        """按分桶线性插值估算分位数 (无数据时返回 None)"""
+        with self._lock:
+            counts = list(self._counts)
+            total = self.count
+            observed_max = self.max
+        if total == 0:
+            return None
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if count and cumulative + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else observed_max
+                upper = min(upper, observed_max)
+                if upper <= lower:
+                    return upper
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return observed_max
+
+    def cumulative_counts(self):
+        """[(上界, 累计次数)]，最后一项上界为 +Inf"""
+        with self._lock:
+            counts = list(self._counts)
+        result = []
+        running = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "buckets": {_format_value(bound): count for bound, count in self.cumulative_counts()},
+        }
+
+
+class _Family:
+    """同名指标按标签区分的一组实例"""
+
+    def __init__(self, kind, name, help_text, factory):
+        self.kind = kind
+        self.name = name
+        self.help = help_text
+        self.factory = factory
+        self.children = {}      # 标签键 -> 指标实例
+
+
+class MetricsRegistry:
+    """指标登记表"""
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._families = {}
+        self.started_at = clock()
+
+    def _get(self, kind, name, help_text, labels, factory):
+        key = _label_key(labels)
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = _Family(kind, name, help_text, factory)
+            elif family.kind != kind:
+                raise ValueError(f"指标 {name} 已登记为 {family.kind}")
+            metric = family.children.get(key)
+            if metric is None:
+                metric = family.children[key] = family.factory()
+            return metric
+
+    def counter(self, name, help_text="", labels=None):
+        """获取 (或创建) 计数器"""
+        return self._get("counter", name, help_text, labels, Counter)
+
+    def gauge(self, name, help_text="", labels=None):
+        """获取 (或创建) 仪表"""
+        return self._get("gauge", name, help_text, labels, Gauge)
+
+    def histogram(self, name, help_text="", labels=None, buckets=DEFAULT_BUCKETS):
+        """获取 (或创建) 直方图 (同名指标共用首次登记时的分桶)"""
+        return self._get("histogram", name, help_text, labels, lambda: Histogram(buckets))
+
+    def _snapshot(self):
+        with self._lock:
+            return [
+                (family, sorted(family.children.items()))
+                for _, family in sorted(self._families.items())
+            ]
+
+    def to_dict(self):
+        """导出全部指标 {名称: {"type", "help", "values": [{"labels", ...}]}}"""
+        result = {"uptime_seconds": self._clock() - self.started_at, "metrics": {}}
+        for family, children in self._snapshot():
+            values = []
+            for key, metric in children:
+                entry = {"labels": dict(key)}
+                if family.kind == "histogram":
+                    entry.update(metric.to_dict())
+                else:
+                    entry["value"] = metric.value
+                values.append(entry)
+            result["metrics"][family.name] = {"type": family.kind, "help": family.help, "values": values}
+        return result
+
+    def to_json(self, path=None):
+        """导出为 JSON 字符串，给出 path 时同时写入文件"""
+        text = json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return text
+
+    def to_prometheus(self):
+        """导出为 Prometheus 文本格式"""
+        lines = []
+        for family, children in self._snapshot():
+            if family.help:
+                lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for key, metric in children:
+                if family.kind != "histogram":
+                    lines.append(f"{family.name}{_format_labels(key)} {_format_value(metric.value)}")
+                    continue
+                for bound, count in metric.cumulative_counts():
+                    le = _format_labels(key, [("le", _format_value(bound))])
+                    lines.append(f"{family.name}_bucket{le} {count}")
+                lines.append(f"{family.name}_sum{_format_labels(key)} {_format_value(metric.sum)}")
+                lines.append(f"{family.name}_count{_format_labels(key)} {metric.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """把全部指标归零 (已登记的指标实例仍然有效)"""
+        with self._lock:
+            metrics = [metric for family in self._families.values() for metric in family.children.values()]
+            self.started_at = self._clock()
+        for metric in metrics:
+            metric.reset()
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry():
+    """获取共享的指标登记表"""
+    return _registry
+
+
+def counter(name, help_text="", labels=None):
+    """共享登记表中的计数器"""
+    return _registry.counter(name, help_text, labels)
+
+
+def gauge(name, help_text="", labels=None):
+    """共享登记表中的仪表"""
+    return _registry.gauge(name, help_text, labels)
+
+
+def histogram(name, help_text="", labels=None, buckets=DEFAULT_BUCKETS):
+    """共享登记表中的直方图"""
+    return _registry.histogram(name, help_text, labels, buckets)
+
+
+def timed(name, help_text="", labels=None):
+    """计时上下文管理器：with metrics.timed("..."): ..."""
+    return _registry.histogram(name, help_text, labels).time()
+
+
+def dump(directory):
+    """把共享登记表导出到目录下的 metrics.json 与 metrics.prom
+
+    Returns:
+        (json 路径, prom 路径)
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    json_path = directory / "metrics.json"
+    prom_path = directory / "metrics.prom"
+    _registry.to_json(json_path)
+    with open(prom_path, "w", encoding="utf-8") as f:
+        f.write(_registry.to_prometheus())
+    return json_path, prom_path
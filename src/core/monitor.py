@@ -0,0 +1,213 @@
+"""应用级状态监控模块
+
+由 ProxifierApp 持有唯一的监控线程：统一轮询服务与进程状态，
+状态变化时通知所有订阅者 (托盘图标、主界面状态面板等)。
+轮询间隔由 AdaptivePollScheduler 决定：切换过程中快速轮询，
+仅托盘运行时逐步退避，保证托盘图标始终正确且空闲时开销很低。
+
+给出 LastStatusStore 时，创建监控即载入上次已知状态 (stale = True)，
+订阅者可以在第一次实时探测返回前就渲染出来；之后每次状态变化都会写回。
+"""
+import threading
+import time
+
+from . import metrics, status_cache, trace
+from .constants import ServiceStatus
+from .deadline import Deadline
+from .scheduler import MODE_TRANSITION, AdaptivePollScheduler
+
+PENDING_STATUSES = (ServiceStatus.START_PENDING.value, ServiceStatus.STOP_PENDING.value)
+
+# 单次轮询的截止时间 (秒)：服务控制管理器无响应时发布 TIMEOUT，而不是一直卡住
+POLL_TIMEOUT = 5.0
+
+
+class StatusMonitor:
+    """单线程状态监控与变化发布"""
+
+    def __init__(self, targets, scheduler=None, watch_services=(), watch_processes=(), store=None):
+        """
+        Args:
+            targets: 无参函数，返回 (服务名称, Proxifier 路径)
+            scheduler: 轮询调度器，默认使用 AdaptivePollScheduler
+            watch_services: 额外关注的服务名称 (结果见 last_snapshot)
+            watch_processes: 额外关注的可执行文件名 (结果见 last_snapshot)
+            store: LastStatusStore，用于启动时载入并持续保存上次已知状态 (可选)
+        """
+        self._targets = targets
+        self.watch_services = tuple(watch_services)
+        self.watch_processes = tuple(watch_processes)
+        self.scheduler = scheduler or AdaptivePollScheduler()
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._force_publish = False
+        self.last_status = None     # (service_status, process_running)
+        self.last_snapshot = None   # 最近一次完整的 StatusSnapshot
+        self.last_status_at = None  # last_status 的观测时间 (time.time())
+        self.stale = False          # last_status 是否为尚未经实时探测确认的上次记录
+        self.poll_interval = None   # 当前轮询间隔 (秒)，监控线程未运行时为 None
+        self.polls = 0
+        self.store = store
+        if store is not None:
+            self._restore()
+
+    def _restore(self):
+        """载入上次已知状态作为初始状态 (标记为 stale)"""
+        try:
+            record = self.store.load(*self._targets())
+        except Exception as e:
+            print(f"载入上次状态失败: {e}")
+            return
+        if record is None:
+            return
+        with self._lock:
+            if self.last_status is not None:
+                return
+            self.last_status = record.status
+            self.last_status_at = record.observed_at
+            self.stale = True
+        trace.instant("monitor.restore", "monitor", status=record.service_status,
+                      age_s=time.time() - record.observed_at)
+
+    def subscribe(self, callback):
+        """订阅状态变化
+
+        Args:
+            callback: callback(service_status, process_running)，在监控线程中调用；
+                      若已有状态，订阅时会立即收到一次当前状态 (可能是上次记录，
+                      回调中读取 monitor.stale 判断)；上次记录经实时探测确认后
+                      即使状态未变也会再通知一次
+
+        Returns:
+            取消订阅的无参函数
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+            last_status = self.last_status
+        if last_status is not None:
+            self._notify(callback, last_status)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def set_ui_active(self, active):
+        """标记主界面是否可见"""
+        self.scheduler.set_ui_visible(active)
+        if active:
+            self._wake.set()
+
+    def set_ui_focused(self, focused):
+        """标记主界面是否拥有焦点"""
+        self.scheduler.set_ui_focused(focused)
+
+    def notify_interaction(self):
+        """用户有操作：恢复快速轮询并立即刷新"""
+        self.scheduler.notify_interaction()
+        self._wake.set()
+
+    def notify_transition(self):
+        """发起了切换：切换期间快速轮询"""
+        self.scheduler.notify_transition()
+        self._wake.set()
+
+    def finish_transition(self):
+        """切换已完成：结束快速轮询并立即刷新 (服务仍在 PENDING 时会继续快速轮询)"""
+        self.scheduler.end_transition()
+        self._wake.set()
+
+    def refresh(self, force_publish=False):
+        """立即轮询一次
+
+        Args:
+            force_publish: 即使状态未变化也通知订阅者
+        """
+        if force_publish:
+            self._force_publish = True
+        self._wake.set()
+
+    def start(self):
+        """启动监控线程 (重复调用无副作用)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止监控线程"""
+        self.poll_interval = None
+        self._stopped.set()
+        self._wake.set()
+
+    def stats(self):
+        """导出监控统计 (轮询次数、调度场景、每小时唤醒次数)"""
+        return {"polls": self.polls, **self.scheduler.stats()}
+
+    def _run(self):
+        while not self._stopped.is_set():
+            changed = self.poll_once()
+            pending = self.last_status is not None and self.last_status[0] in PENDING_STATUSES
+            interval = self.scheduler.next_interval(changed=changed, pending=pending)
+            self.poll_interval = interval
+            metrics.gauge("toggler_monitor_interval_seconds", "监控当前轮询间隔").set(interval)
+            self._wake.wait(interval)
+            self._wake.clear()
+
+    @trace.traced("monitor.poll", "monitor")
+    def poll_once(self):
+        """执行一次轮询，状态变化时发布
+
+        Returns:
+            bool: 是否发生了状态变化
+        """
+        start = time.perf_counter()
+        try:
+            service_name, exe_path = self._targets()
+            # 切换期间的快速轮询不能被 1 秒的缓存有效期稀释：缓存年龄不超过当前轮询间隔
+            max_age = None
+            if self.scheduler.mode() == MODE_TRANSITION:
+                max_age = self.scheduler.transition_interval
+            # 一次批量探测同时回答服务与进程状态
+            snapshot = status_cache.get_snapshot(
+                (service_name,) + self.watch_services,
+                (exe_path,) + self.watch_processes,
+                deadline=Deadline(POLL_TIMEOUT),
+                max_age=max_age,
+            )
+            status = (snapshot.service_status(service_name), snapshot.is_running(exe_path))
+        except Exception as e:
+            metrics.counter("toggler_errors_total", "被捕获并打印的错误数", {"source": "monitor"}).inc()
+            print(f"监控错误: {e}")
+            return False
+        metrics.histogram("toggler_monitor_poll_seconds", "监控单次轮询耗时").observe(time.perf_counter() - start)
+        self.polls += 1
+        self.last_snapshot = snapshot
+
+        with self._lock:
+            changed = status != self.last_status
+            confirmed = self.stale
+            publish = changed or confirmed or self._force_publish
+            self._force_publish = False
+            self.last_status = status
+            self.last_status_at = time.time()
+            self.stale = False
+            subscribers = list(self._subscribers)
+        if publish:
+            for callback in subscribers:
+                self._notify(callback, status)
+        if self.store is not None and (changed or confirmed):
+            self.store.save(service_name, exe_path, *status)
+        return changed
+
+    @staticmethod
+    def _notify(callback, status):
+        try:
+            callback(*status)
+        except Exception as e:
+            print(f"状态订阅者处理失败: {e}")
@@ -0,0 +1,428 @@
+"""常驻状态探测进程模块
+
+状态查询不再为每次请求创建 sc / tasklist 子进程，而是交给一个常驻的
+探测进程处理，主进程与其通过管道按行交换 JSON 消息：
+
+    请求: {"id": 1, "op": "service", "name": "proxifierdrv"}
+    响应: {"id": 1, "ok": true, "state": {...ServiceState 字段...}}
+
+    请求: {"id": 2, "op": "process", "exe": "Proxifier.exe"}
+    响应: {"id": 2, "ok": true, "running": true}
+
+    请求: {"id": 3, "op": "processes"}
+    响应: {"id": 3, "ok": true, "processes": [[pid, 映像名, 路径或 null], ...]}
+
+    请求: {"id": 4, "op": "batch", "services": [...], "exes": [...]}
+    响应: {"id": 4, "ok": true, "services": {名称: {...}}, "processes": {名称: bool}}
+
+    请求: {"id": 5, "op": "ping"}
+    响应: {"id": 5, "ok": true}
+
+exe / exes 给出完整路径时按路径匹配 (与终止进程的规则一致)，只给出映像名时按名称匹配。
+失败时响应 {"id": n, "ok": false, "error": "..."}。探测进程崩溃或无响应时，
+客户端会自动重启它。LocalTransport 在当前进程的线程中运行同样的协议，
+可作为测试用的替身。
+"""
+import argparse
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+from dataclasses import asdict
+from pathlib import Path
+
+from . import process, runner, service, win32
+from .backend import FakeServiceBackend, ServiceBackend
+from .constants import ServiceStatus
+from .deadline import check as check_cancelled, clamp
+from .service_state import ServiceState
+
+# 单次请求的默认超时 (秒)
+REQUEST_TIMEOUT = 5.0
+
+
+class ProbeWorkerError(Exception):
+    """探测进程通信失败"""
+
+
+# ============================================================================
+# 探测进程端
+# ============================================================================
+
+class NativeProbeSource:
+    """基于 Win32 API 的探测源 (仅 Windows)"""
+
+    def __init__(self):
+        self._scm = None
+        self.process_provider = process.WindowsProcessProvider()
+
+    def query_service(self, service_name):
+        if self._scm is None:
+            self._scm = win32.ServiceControlManager()
+        return self._scm.query(service_name)
+
+
+class BackendProbeSource:
+    """基于服务后端与进程表提供者的探测源 (测试替身)"""
+
+    def __init__(self, service_backend, process_provider=None):
+        self.service_backend = service_backend
+        self.process_provider = process_provider or process.FakeProcessProvider()
+
+    def query_service(self, service_name):
+        return self.service_backend.query_state(service_name)
+
+
+def handle_request(source, request):
+    """处理单个请求，返回响应字典"""
+    response = {"id": request.get("id")}
+    try:
+        op = request.get("op")
+        if op == "ping":
+            pass
+        elif op == "service":
+            response["state"] = asdict(source.query_service(request["name"]))
+        elif op == "process":
+            response["running"] = source.process_provider.snapshot().is_running_exact(request["exe"])
+        elif op == "processes":
+            response["processes"] = [
+                [info.pid, info.name, info.path] for info in source.process_provider.snapshot().processes
+            ]
+        elif op == "batch":
+            response["services"] = {
+                name: asdict(source.query_service(name)) for name in request.get("services", [])
+            }
+            # 全部进程共享一次枚举
+            snapshot = source.process_provider.snapshot()
+            response["processes"] = {exe: snapshot.is_running_exact(exe) for exe in request.get("exes", [])}
+        else:
+            raise ValueError(f"未知操作: {op}")
+        response["ok"] = True
+    except Exception as e:
+        response["ok"] = False
+        response["error"] = str(e)
+    return response
+
+
+def serve(reader, writer, source):
+    """按行读取请求并写回响应，直到输入结束"""
+    for line in reader:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            response = {"id": None, "ok": False, "error": f"无效请求: {e}"}
+        else:
+            response = handle_request(source, request)
+        writer.write(json.dumps(response, ensure_ascii=False) + "\n")
+        writer.flush()
+
+
+def _parse_services(values):
+    services = {}
+    for item in values or []:
+        name, _, status = item.partition("=")
+        services[name] = status or ServiceStatus.STOPPED.value
+    return services
+
+
+def main(argv=None):
+    """探测进程入口"""
+    parser = argparse.ArgumentParser(description="Proxifier Toggler 状态探测进程")
+    parser.add_argument("--fake", action="store_true", help="使用内存后端 (测试用)")
+    parser.add_argument("--service", action="append", help="内存后端的服务，格式 name=STATUS")
+    parser.add_argument("--process", action="append", help="内存后端中运行的进程路径")
+    args = parser.parse_args(argv)
+
+    if args.fake:
+        source = BackendProbeSource(
+            FakeServiceBackend(_parse_services(args.service)),
+            process.FakeProcessProvider(args.process or ())
+        )
+    else:
+        source = NativeProbeSource()
+
+    # 直接使用文件描述符：打包后的窗口程序中 sys.stdin / sys.stdout 可能为 None
+    stdin = open(0, "r", encoding="utf-8", closefd=False)
+    stdout = open(1, "w", encoding="utf-8", closefd=False)
+    serve(stdin, stdout, source)
+    return 0
+
+
+# ============================================================================
+# 主进程端
+# ============================================================================
+
+def worker_command():
+    """返回启动探测进程的命令行与工作目录
+
+    打包环境下通过 `--probe-worker` 参数复用主程序 EXE (见 run.py)。
+    """
+    if getattr(sys, 'frozen', False):
+        return [sys.executable, "--probe-worker"], None
+    project_root = Path(__file__).parent.parent.parent
+    return [sys.executable, "-m", "src.core.probe_worker"], str(project_root)
+
+
+class SubprocessTransport:
+    """以子进程方式运行的探测进程"""
+
+    def __init__(self, argv=None, cwd=None):
+        if argv is None:
+            argv, cwd = worker_command()
+        self._process = runner.get_runner().spawn(
+            argv,
+            kind="probe_worker",
+            cwd=cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            bufsize=1
+        )
+        self.reader = self._process.stdout
+
+    def send(self, line):
+        self._process.stdin.write(line)
+        self._process.stdin.flush()
+
+    def close(self):
+        try:
+            self._process.stdin.close()
+        except Exception:
+            pass
+        try:
+            self._process.wait(timeout=1)
+        except Exception:
+            self._process.kill()
+
+
+class LocalTransport:
+    """在当前进程线程中运行探测协议的替身，便于测试"""
+
+    def __init__(self, source):
+        request_r, request_w = os.pipe()
+        response_r, response_w = os.pipe()
+        self._request_writer = open(request_w, "w", encoding="utf-8")
+        self.reader = open(response_r, "r", encoding="utf-8")
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(open(request_r, "r", encoding="utf-8"), open(response_w, "w", encoding="utf-8"), source),
+            daemon=True
+        )
+        self._thread.start()
+
+    @staticmethod
+    def _run(reader, writer, source):
+        try:
+            serve(reader, writer, source)
+        except (OSError, ValueError):
+            pass
+        finally:
+            for stream in (reader, writer):
+                try:
+                    stream.close()
+                except OSError:
+                    pass
+
+    def send(self, line):
+        self._request_writer.write(line)
+        self._request_writer.flush()
+
+    def close(self):
+        """关闭管道 (也可用于模拟探测进程崩溃)"""
+        try:
+            self._request_writer.close()
+        except OSError:
+            pass
+
+
+class ProbeWorkerClient:
+    """探测进程客户端
+
+    负责按需启动探测进程、收发请求，并在其崩溃或超时时自动重启。
+    """
+
+    def __init__(self, transport_factory=SubprocessTransport, timeout=REQUEST_TIMEOUT):
+        self._transport_factory = transport_factory
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._transport = None
+        self._responses = None
+        self._next_id = 0
+        self.requests = 0
+        self.restarts = 0
+
+    def _start(self):
+        self._transport = self._transport_factory()
+        self._responses = queue.Queue()
+        threading.Thread(
+            target=self._read_loop,
+            args=(self._transport.reader, self._responses),
+            daemon=True
+        ).start()
+
+    @staticmethod
+    def _read_loop(reader, responses):
+        try:
+            for line in reader:
+                try:
+                    responses.put(json.loads(line))
+                except ValueError:
+                    continue
+        except (OSError, ValueError):
+            pass
+        # None 表示探测进程已退出
+        responses.put(None)
+
+    def _stop(self):
+        if self._transport is not None:
+            self._transport.close()
+        self._transport = None
+        self._responses = None
+
+    def _roundtrip(self, request, deadline=None):
+        if self._transport is None:
+            self._start()
+        self._transport.send(json.dumps(request, ensure_ascii=False) + "\n")
+        timeout = clamp(deadline, self.timeout)
+        while True:
+            try:
+                response = self._responses.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError("探测进程无响应")
+            if response is None:
+                raise BrokenPipeError("探测进程已退出")
+            if response.get("id") == request["id"]:
+                return response
+
+    def request(self, op, deadline=None, **params):
+        """发送请求并返回响应字典
+
+        Args:
+            op: 操作名
+            deadline: Deadline (可选)，等待响应的时间不超过其剩余时间
+
+        Raises:
+            ProbeWorkerError: 探测进程重启后仍然失败、截止时间已到，或返回错误
+        """
+        with self._lock:
+            self._next_id += 1
+            self.requests += 1
+            request = {"id": self._next_id, "op": op, **params}
+            try:
+                response = self._roundtrip(request, deadline)
+            except (OSError, ValueError, TimeoutError) as e:
+                # 探测进程崩溃或卡死：重启后重试一次 (截止时间已到则不再重试)
+                self._stop()
+                self.restarts += 1
+                if deadline is not None and deadline.done:
+                    raise ProbeWorkerError(f"探测进程通信失败: {e}") from e
+                try:
+                    response = self._roundtrip(request, deadline)
+                except (OSError, ValueError, TimeoutError) as e:
+                    self._stop()
+                    raise ProbeWorkerError(f"探测进程通信失败: {e}") from e
+            if not response.get("ok"):
+                raise ProbeWorkerError(response.get("error", "未知错误"))
+            return response
+
+    def close(self):
+        with self._lock:
+            self._stop()
+
+
+class ProbeWorkerBackend(ServiceBackend):
+    """通过常驻探测进程查询状态的服务后端
+
+    启动 / 停止等写操作较少，仍交给 command_backend 执行；
+    探测进程不可用时查询也回退到 command_backend。
+    """
+
+    def __init__(self, client, command_backend):
+        self.client = client
+        self.command_backend = command_backend
+
+    def query_state(self, service_name, deadline=None):
+        check_cancelled(deadline)
+        try:
+            response = self.client.request("service", deadline=deadline, name=service_name)
+            return ServiceState(**response["state"])
+        except ProbeWorkerError as e:
+            check_cancelled(deadline)
+            if deadline is not None and deadline.expired:
+                return ServiceState(name=service_name, status=ServiceStatus.TIMEOUT.value)
+            print(f"探测进程查询失败，回退到命令查询: {e}")
+            return self.command_backend.query_state(service_name, deadline)
+
+    def probe_batch(self, service_names, exe_names, deadline=None):
+        """一次往返同时查询全部服务与进程"""
+        check_cancelled(deadline)
+        try:
+            response = self.client.request(
+                "batch", deadline=deadline, services=list(service_names), exes=list(exe_names)
+            )
+        except ProbeWorkerError as e:
+            check_cancelled(deadline)
+            if deadline is not None and deadline.expired:
+                states = {
+                    name: ServiceState(name=name, status=ServiceStatus.TIMEOUT.value) for name in service_names
+                }
+                return states, None
+            print(f"探测进程批量查询失败，回退到命令查询: {e}")
+            return self.command_backend.query_states(service_names, deadline), None
+        states = {name: ServiceState(**state) for name, state in response["services"].items()}
+        return states, response["processes"]
+
+    def start(self, service_name, deadline=None):
+        return self.command_backend.start(service_name, deadline)
+
+    def stop(self, service_name, deadline=None):
+        return self.command_backend.stop(service_name, deadline)
+
+
+class WorkerProcessProvider(process.ProcessProvider):
+    """通过常驻探测进程枚举进程表"""
+
+    def __init__(self, client, fallback):
+        self.client = client
+        self.fallback = fallback
+
+    def snapshot(self):
+        try:
+            response = self.client.request("processes")
+        except ProbeWorkerError as e:
+            print(f"探测进程枚举失败，回退到本地枚举: {e}")
+            return self.fallback.snapshot()
+        processes = [process.ProcessInfo(pid, name, path) for pid, name, path in response["processes"]]
+        resolver = win32.query_process_path if win32.is_available() else None
+        return process.ProcessSnapshot(processes, path_resolver=resolver)
+
+    def process_info(self, pid):
+        # 按 PID 查询本身很廉价，直接在本进程内完成
+        return self.fallback.process_info(pid)
+
+
+def install(client=None):
+    """启用常驻探测进程：替换全局服务后端与进程表提供者
+
+    Returns:
+        ProbeWorkerClient: 使用中的客户端；当前平台不支持时返回 None
+    """
+    if client is None:
+        if not win32.is_available():
+            return None
+        client = ProbeWorkerClient()
+    backend = ProbeWorkerBackend(client, service.SubprocessServiceBackend())
+    service.set_backend(backend)
+    process.set_process_provider(WorkerProcessProvider(client, process.get_process_provider()))
+    return client
+
+
+if __name__ == "__main__":
+    sys.exit(main())
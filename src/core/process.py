@@ -1,48 +1,739 @@
 """Proxifier 进程管理模块"""
+import csv
+import ntpath
 import os
-import subprocess
+import signal
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+from . import metrics, runner, trace, win32
+from .deadline import check as check_cancelled, clamp
 from .service import run_command_admin
 
+# 启动就绪判定：连续 LAUNCH_STABLE_PROBES 次观察到进程存活即视为就绪
+LAUNCH_TIMEOUT = 10.0
+LAUNCH_STABLE_PROBES = 3
+LAUNCH_PROBE_INTERVAL = 0.1
+
+# 终止进程：先请求正常退出，超过宽限期仍未退出的再强制结束。
+# 不带 /f 的 taskkill 只是向窗口发送 WM_CLOSE，Proxifier 设置为关闭即最小化到托盘时
+# 宽限期会被整段等完，此时可在配置中把 terminate_grace_timeout 设为 0，直接强制结束
+TERMINATE_GRACE_TIMEOUT = 0.5
+TERMINATE_FORCE_TIMEOUT = 2.0
+TERMINATE_POLL_INTERVAL = 0.05
+
+
+def image_name(exe_path):
+    """从完整路径中取出映像名 (同时兼容 / 与 \\ 分隔符)"""
+    return ntpath.basename(exe_path)
+
+
+def normalize_path(path):
+    """路径归一化，用于按完整路径比较"""
+    return os.path.normcase(os.path.normpath(path))
+
+
+def is_full_path(exe_name_or_path):
+    """是否给出了完整路径 (而不只是映像名)"""
+    return exe_name_or_path != image_name(exe_name_or_path)
+
+
+@dataclass
+class ProcessInfo:
+    """进程表中的一项"""
+    pid: int
+    name: str
+    path: str = None    # 完整映像路径，未知时为 None
+    create_time: object = None  # 进程创建时间 (平台相关的不透明值)，与 PID 一起唯一标识进程实例
+
+
+class ProcessSnapshot:
+    """一次进程枚举的结果
+
+    按小写映像名建立索引，查询为 O(1)；完整路径在首次按路径查询时
+    才对同名候选进程解析 (Windows 上获取路径需要逐个打开进程)。
+    """
+
+    def __init__(self, processes, path_resolver=None, taken_at=None):
+        self.processes = list(processes)
+        self.taken_at = time.monotonic() if taken_at is None else taken_at
+        self._path_resolver = path_resolver
+        self.by_name = {}
+        for info in self.processes:
+            self.by_name.setdefault(info.name.lower(), []).append(info)
+        self._by_path = None
+
+    def _resolve_path(self, info):
+        if info.path is None and self._path_resolver is not None:
+            try:
+                info.path = self._path_resolver(info.pid)
+            except Exception:
+                info.path = None
+        return info.path
+
+    @property
+    def by_path(self):
+        """按归一化完整路径建立的索引 (首次访问时构建)"""
+        if self._by_path is None:
+            self._by_path = {}
+            for info in self.processes:
+                path = self._resolve_path(info)
+                if path:
+                    self._by_path.setdefault(normalize_path(path), []).append(info)
+        return self._by_path
+
+    def find_by_name(self, exe_name_or_path):
+        """按映像名精确匹配 (不区分大小写)"""
+        return list(self.by_name.get(image_name(exe_name_or_path).lower(), []))
+
+    def find_by_path(self, exe_path):
+        """按完整路径精确匹配
+
+        只解析同名候选进程的路径，不会为整张进程表逐个打开进程。
+        """
+        target = normalize_path(exe_path)
+        return [
+            info for info in self.find_by_name(exe_path)
+            if self._resolve_path(info) and normalize_path(info.path) == target
+        ]
+
+    def is_running(self, exe_name_or_path):
+        """是否存在同名进程"""
+        return image_name(exe_name_or_path).lower() in self.by_name
+
+    def is_running_exact(self, exe_name_or_path):
+        """给出完整路径时按路径匹配 (与终止进程的规则一致)，只给出映像名时按名称匹配"""
+        if is_full_path(exe_name_or_path):
+            return bool(self.find_by_path(exe_name_or_path))
+        return self.is_running(exe_name_or_path)
+
+
+class ProcessProvider:
+    """进程表提供者接口"""
+
+    def snapshot(self):
+        """枚举一次进程表
+
+        Returns:
+            ProcessSnapshot
+        """
+        raise NotImplementedError
+
+    def process_info(self, pid):
+        """按 PID 查询单个进程 (含路径与创建时间)
+
+        默认实现退回一次完整枚举，子类应提供按 PID 的直接查询。
+
+        Returns:
+            ProcessInfo | None: 进程不存在时返回 None
+        """
+        for info in self.snapshot().processes:
+            if info.pid == pid:
+                return info
+        return None
+
+    def launch(self, exe_path):
+        """启动可执行文件 (不经过 shell)
+
+        Returns:
+            int: 新进程的 PID
+        """
+        return runner.get_runner().spawn([exe_path], kind="launch").pid
+
+    def terminate(self, pids, force=False, deadline=None):
+        """请求一组进程退出 (一条命令同时发给全部 PID)
+
+        Args:
+            pids: PID 列表
+            force: False 时请求正常关闭 (taskkill 不带 /f)，True 时强制结束
+            deadline: Deadline (可选)
+
+        Returns:
+            int: 命令返回码
+        """
+        argv = ["taskkill"] + (["/f"] if force else [])
+        for pid in pids:
+            argv += ["/pid", str(pid)]
+        return run_command_admin(argv, deadline=deadline)
+
+    def is_alive(self, pid, create_time=None):
+        """PID 对应的进程实例是否仍然存活
+
+        create_time 不为 None 时同时比较创建时间，避免 PID 被复用后误判。
+        """
+        info = self.process_info(pid)
+        if info is None:
+            return False
+        return create_time is None or info.create_time == create_time
+
+
+class ProcFsProcessProvider(ProcessProvider):
+    """基于 /proc 的进程表 (Linux)"""
+
+    def __init__(self, proc_root="/proc"):
+        self.proc_root = proc_root
+
+    def process_info(self, pid):
+        base = os.path.join(self.proc_root, str(pid))
+        try:
+            with open(os.path.join(base, "stat"), encoding="utf-8", errors="replace") as f:
+                stat = f.read()
+        except OSError:
+            return None
+        # 格式: pid (comm) state ...，comm 中可能含空格与括号
+        comm = stat[stat.find("(") + 1:stat.rfind(")")]
+        fields = stat[stat.rfind(")") + 2:].split()
+        if not fields or fields[0] in ("Z", "X"):
+            return None
+        create_time = int(fields[19]) if len(fields) > 19 else None   # starttime (第 22 项)
+        try:
+            path = os.readlink(os.path.join(base, "exe"))
+        except OSError:
+            path = None
+        name = os.path.basename(path) if path else comm
+        return ProcessInfo(pid=pid, name=name, path=path, create_time=create_time)
+
+    def terminate(self, pids, force=False, deadline=None):
+        sig = signal.SIGKILL if force else signal.SIGTERM
+        rc = 0
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except OSError:
+                rc = 1
+        return rc
+
+    def snapshot(self):
+        processes = []
+        for entry in os.listdir(self.proc_root):
+            if not entry.isdigit():
+                continue
+            base = os.path.join(self.proc_root, entry)
+            try:
+                path = os.readlink(os.path.join(base, "exe"))
+            except OSError:
+                path = None
+            if path:
+                name = os.path.basename(path)
+            else:
+                # 无权限读取 exe 链接时退回 comm (最多 15 个字符)
+                try:
+                    with open(os.path.join(base, "comm"), encoding="utf-8", errors="replace") as f:
+                        name = f.read().strip()
+                except OSError:
+                    continue
+            processes.append(ProcessInfo(pid=int(entry), name=name, path=path))
+        return ProcessSnapshot(processes)
+
+
+class WindowsProcessProvider(ProcessProvider):
+    """基于 ToolHelp 快照的进程表 (Windows，无需创建子进程)"""
+
+    def snapshot(self):
+        processes = [ProcessInfo(pid=pid, name=name) for pid, name in win32.list_processes()]
+        return ProcessSnapshot(processes, path_resolver=win32.query_process_path)
+
+    def process_info(self, pid):
+        result = win32.query_process(pid)
+        if result is None:
+            return None
+        path, create_time = result
+        name = image_name(path) if path else ""
+        return ProcessInfo(pid=pid, name=name, path=path, create_time=create_time)
+
+
+class TasklistProcessProvider(ProcessProvider):
+    """基于一次 tasklist 枚举的进程表 (原生 API 不可用时的回退)"""
+
+    def snapshot(self):
+        result = runner.run(["tasklist", "/NH", "/FO", "CSV"])
+        if not result.ok:
+            raise OSError(f"tasklist 执行失败: {result.error or result.stderr.strip() or result.returncode}")
+        processes = []
+        for row in csv.reader(result.stdout.splitlines()):
+            if len(row) >= 2 and row[1].isdigit():
+                processes.append(ProcessInfo(pid=int(row[1]), name=row[0]))
+        return ProcessSnapshot(processes)
+
+
+class FakeProcessProvider(ProcessProvider):
+    """内存中的进程表 (测试 / 基准使用)"""
+
+    def __init__(self, processes=(), snapshot_latency=0.0, close_latency=0.0, clock=time.monotonic):
+        """
+        Args:
+            processes: 初始进程的完整路径列表
+            snapshot_latency: 每次枚举的耗时 (秒)
+            close_latency: 收到正常关闭请求后到进程退出的耗时 (秒)
+            clock: 单调时钟函数
+        """
+        self.snapshot_latency = snapshot_latency
+        self.close_latency = close_latency
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._processes = {}
+        self._closing = {}      # PID -> 退出时刻
+        self.ignore_close = set()   # 忽略正常关闭请求的 PID (模拟卡死)
+        self.terminations = []  # (PID 列表, 是否强制)
+        self._next_pid = 1000
+        self.snapshots = 0
+        self.lookups = 0
+        for path in processes:
+            self.spawn(path)
+
+    def spawn(self, exe_path):
+        """加入一个进程，返回其 PID"""
+        with self._lock:
+            self._next_pid += 4
+            pid = self._next_pid
+            self._processes[pid] = ProcessInfo(
+                pid=pid, name=image_name(exe_path), path=exe_path, create_time=pid
+            )
+            return pid
+
+    def launch(self, exe_path):
+        return self.spawn(exe_path)
+
+    def exit(self, pid):
+        """移除一个进程"""
+        with self._lock:
+            self._processes.pop(pid, None)
+            self._closing.pop(pid, None)
+
+    def terminate(self, pids, force=False, deadline=None):
+        with self._lock:
+            self.terminations.append((list(pids), force))
+            rc = 0
+            for pid in pids:
+                if pid not in self._processes:
+                    rc = 128
+                elif force:
+                    self._processes.pop(pid, None)
+                    self._closing.pop(pid, None)
+                elif pid not in self.ignore_close:
+                    self._closing.setdefault(pid, self._clock() + self.close_latency)
+            self._settle_locked()
+            return rc
+
+    def _settle_locked(self):
+        """移除已到退出时刻的进程"""
+        now = self._clock()
+        for pid, exit_at in list(self._closing.items()):
+            if now >= exit_at:
+                self._processes.pop(pid, None)
+                del self._closing[pid]
+
+    def snapshot(self):
+        if self.snapshot_latency:
+            time.sleep(self.snapshot_latency)
+        with self._lock:
+            self.snapshots += 1
+            self._settle_locked()
+            processes = [
+                ProcessInfo(info.pid, info.name, info.path, info.create_time)
+                for info in self._processes.values()
+            ]
+        return ProcessSnapshot(processes)
+
+    def process_info(self, pid):
+        with self._lock:
+            self.lookups += 1
+            self._settle_locked()
+            info = self._processes.get(pid)
+            if info is None:
+                return None
+            return ProcessInfo(info.pid, info.name, info.path, info.create_time)
+
+
+def _default_provider():
+    if win32.is_available():
+        return WindowsProcessProvider()
+    if sys.platform.startswith("linux"):
+        return ProcFsProcessProvider()
+    return TasklistProcessProvider()
+
+
+# 当前使用的进程表提供者 (默认按平台延迟创建)
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_process_provider():
+    """获取当前进程表提供者"""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = _default_provider()
+        return _provider
 
-def is_proxifier_running(proxifier_exe_path):
-    """检查 Proxifier 进程是否在运行"""
+
+def set_process_provider(provider):
+    """替换进程表提供者 (例如常驻探测进程、测试用 FakeProcessProvider)
+
+    Returns:
+        ProcessProvider: 之前使用的提供者
+    """
+    global _provider
+    with _provider_lock:
+        previous = _provider
+        _provider = provider
+        return previous
+
+
+def take_snapshot():
+    """枚举一次进程表；同一监控周期内的所有进程查询应共享这一结果"""
+    return get_process_provider().snapshot()
+
+
+@dataclass
+class LaunchResult:
+    """启动 Proxifier 的结果"""
+    ok: bool                        # 是否在截止时间前稳定运行
+    pid: int = None                 # 就绪 (或最后观察到) 的进程 PID
+    time_to_ready: float = None     # 从发起启动到判定就绪的耗时 (秒)
+    probes: int = 0                 # 存活检查次数
+    error: str = None               # 失败原因
+
+    def __bool__(self):
+        return self.ok
+
+
+@dataclass
+class ProcessExit:
+    """单个进程的终止结果"""
+    pid: int
+    exited: bool                # 是否已确认退出
+    elapsed: float = None       # 从发起终止到确认退出的耗时 (秒)
+    forced: bool = False        # 是否经过强制结束
+
+
+@dataclass
+class TerminateResult:
+    """终止 Proxifier 的结果"""
+    ok: bool                    # 所有进程是否都已确认退出
+    exits: list                 # ProcessExit 列表
+    elapsed: float = 0.0        # 总耗时 (秒)
+
+    def __bool__(self):
+        return self.ok
+
+    @property
+    def forced(self):
+        """被强制结束的 PID"""
+        return [item.pid for item in self.exits if item.forced]
+
+
+@dataclass
+class ProcessHandle:
+    """已跟踪的进程实例 (PID + 创建时间)"""
+    pid: int
+    create_time: object = None
+    path: str = None
+
+
+class ProcessTracker:
+    """跟踪本程序启动或接管的 Proxifier 实例
+
+    持有句柄时存活检查只需按 PID 查询一次；仅在句柄丢失 (进程退出)
+    后才枚举整张进程表，并且只接管完整路径一致的进程。
+    """
+
+    def __init__(self, exe_path):
+        self.exe_path = exe_path
+        self.handle = None
+        self._lock = threading.Lock()
+        self.checks = 0     # 按 PID 的存活检查次数
+        self.scans = 0      # 完整枚举次数
+
+    def track(self, pid):
+        """记录一个已知 PID (例如刚启动的进程)
+
+        Returns:
+            ProcessHandle | None: 进程已不存在时返回 None
+        """
+        info = get_process_provider().process_info(pid)
+        with self._lock:
+            if info is None:
+                self.handle = None
+            else:
+                self.handle = ProcessHandle(pid, info.create_time, info.path or self.exe_path)
+            return self.handle
+
+    def release(self):
+        """放弃当前句柄"""
+        with self._lock:
+            self.handle = None
+
+    def check_handle(self):
+        """按 PID 检查已跟踪的进程是否存活；已退出时清除句柄"""
+        with self._lock:
+            handle = self.handle
+        if handle is None:
+            return False
+        self.checks += 1
+        try:
+            alive = get_process_provider().is_alive(handle.pid, handle.create_time)
+        except Exception:
+            alive = False
+        if not alive:
+            with self._lock:
+                if self.handle is handle:
+                    self.handle = None
+        return alive
+
+    def adopt(self, snapshot=None):
+        """从进程表中接管与路径完全一致的进程
+
+        Args:
+            snapshot: 已有的进程快照，为 None 时枚举一次
+
+        Returns:
+            ProcessHandle | None
+        """
+        if snapshot is None:
+            self.scans += 1
+            snapshot = take_snapshot()
+        for info in snapshot.find_by_path(self.exe_path):
+            handle = self.track(info.pid)
+            if handle is not None:
+                return handle
+        return None
+
+    def is_alive(self):
+        """已跟踪的实例是否存活；句柄丢失时才重新枚举并尝试接管"""
+        return self.check_handle() or self.adopt() is not None
+
+    def pids(self, snapshot=None):
+        """需要终止的 PID：已跟踪实例与所有完整路径一致的进程
+
+        同名但路径不同的进程 (其他工具自带的 Proxifier.exe) 不在其中。
+        """
+        pids = []
+        handle = self.handle
+        if handle is not None and self.check_handle():
+            pids.append(handle.pid)
+        if snapshot is None:
+            self.scans += 1
+            snapshot = take_snapshot()
+        for info in snapshot.find_by_path(self.exe_path):
+            if info.pid not in pids:
+                pids.append(info.pid)
+        return pids
+
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+
+def get_tracker(proxifier_exe_path):
+    """获取指定路径的进程跟踪器 (按归一化路径共享)"""
+    key = normalize_path(proxifier_exe_path)
+    with _trackers_lock:
+        tracker = _trackers.get(key)
+        if tracker is None:
+            tracker = _trackers[key] = ProcessTracker(proxifier_exe_path)
+        return tracker
+
+
+def processes_running(exe_names, snapshot=None):
+    """批量检查多个进程是否在运行 (共享一次枚举)
+
+    Args:
+        exe_names: 可执行文件名或完整路径列表
+        snapshot: 已有的进程快照，为 None 时枚举一次
+
+    Returns:
+        dict: {可执行文件名: 是否运行}
+    """
+    names = [image_name(name) for name in exe_names]
+    try:
+        snapshot = snapshot or take_snapshot()
+        return {name: snapshot.is_running(name) for name in names}
+    except Exception:
+        return {name: False for name in names}
+
+
+def is_proxifier_running(proxifier_exe_path, snapshot=None):
+    """检查 Proxifier 进程是否在运行
+
+    持有已跟踪的句柄时只做一次按 PID 的检查；否则枚举进程表，
+    并接管路径一致的实例，后续检查不再需要枚举。
+    与终止进程的规则一致，只认完整路径一致的进程：同名但路径不同的
+    Proxifier.exe 不算运行中 (否则切换时既不会启动也无法停止它)。
+    """
     try:
-        exe_name = os.path.basename(proxifier_exe_path)
-        startupinfo = subprocess.STARTUPINFO()
-        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-        startupinfo.wShowWindow = subprocess.SW_HIDE
-        
-        # 使用过滤器加速查询
-        output = subprocess.check_output(
-            f'tasklist /FI "IMAGENAME eq {exe_name}" /NH',
-            shell=True,
-            text=True,
-            startupinfo=startupinfo,
-            stderr=subprocess.DEVNULL
-        )
-        return exe_name.lower() in output.lower()
+        tracker = get_tracker(proxifier_exe_path)
+        if snapshot is None and tracker.check_handle():
+            return True
+        if snapshot is None:
+            tracker.scans += 1
+            snapshot = take_snapshot()
+        return tracker.adopt(snapshot) is not None
     except Exception:
         return False
 
 
-def start_proxifier(proxifier_exe_path):
-    """启动 Proxifier 进程"""
+def _sleep(seconds, deadline):
+    """休眠；deadline 被取消时提前醒来并抛出 OperationCancelled"""
+    if deadline is None:
+        time.sleep(seconds)
+    elif not deadline.sleep(seconds):
+        deadline.check()
+
+
+def launch_proxifier(proxifier_exe_path, timeout=LAUNCH_TIMEOUT,
+                     stable_probes=LAUNCH_STABLE_PROBES, probe_interval=LAUNCH_PROBE_INTERVAL,
+                     deadline=None):
+    """启动 Proxifier 并等待其稳定运行
+
+    启动后按 PID 连续检查存活，连续 stable_probes 次存活才视为就绪，
+    启动即崩溃的情况不会被误报为运行中。新进程若把启动请求转交给
+    已运行的实例后退出 (单实例程序)，则接管路径一致的已有实例。
+
+    Args:
+        proxifier_exe_path: Proxifier 可执行文件路径
+        timeout: 最长等待秒数
+        stable_probes: 判定就绪所需的连续存活次数
+        probe_interval: 两次检查之间的间隔秒数
+        deadline: Deadline (可选)，等待时间不超过其剩余时间，取消时抛出 OperationCancelled
+
+    Returns:
+        LaunchResult: 启动结果 (可直接作为 bool 使用)，含启动到就绪的耗时
+    """
+    with trace.span("process.launch", "process") as span:
+        result = _launch_and_wait(proxifier_exe_path, timeout, stable_probes, probe_interval, deadline)
+        span.annotate(ok=result.ok, pid=result.pid, probes=result.probes)
+    metrics.counter("toggler_launches_total", "启动 Proxifier 次数 (按结果)",
+                    {"result": "ok" if result.ok else "failed"}).inc()
+    if result.ok:
+        metrics.histogram("toggler_launch_ready_seconds", "Proxifier 启动到就绪耗时").observe(result.time_to_ready)
+    return result
+
+
+def _launch_and_wait(proxifier_exe_path, timeout, stable_probes, probe_interval, deadline):
+    check_cancelled(deadline)
+    tracker = get_tracker(proxifier_exe_path)
+    start = time.monotonic()
+    until = start + clamp(deadline, timeout)
     try:
-        startupinfo = subprocess.STARTUPINFO()
-        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-        startupinfo.wShowWindow = subprocess.SW_HIDE
-        
-        subprocess.Popen(
-            f'"{proxifier_exe_path}"',
-            shell=True,
-            startupinfo=startupinfo
-        )
-        return True
+        pid = get_process_provider().launch(proxifier_exe_path)
     except Exception as e:
         print(f"启动 Proxifier 失败: {e}")
-        return False
+        return LaunchResult(False, error=str(e))
+    tracker.track(pid)
+
+    consecutive = 0
+    probes = 0
+    while True:
+        check_cancelled(deadline)
+        probes += 1
+        if tracker.check_handle():
+            consecutive += 1
+        else:
+            tracker.scans += 1
+            snapshot = take_snapshot()
+            handle = tracker.adopt(snapshot)
+            if handle is None:
+                # 单实例程序把启动请求转交给了其他路径的实例：明确报告，而不是笼统的"已退出"
+                if snapshot.is_running(proxifier_exe_path):
+                    return LaunchResult(False, pid, probes=probes, error="已有其他路径的 Proxifier 在运行")
+                return LaunchResult(False, pid, probes=probes, error="进程在就绪前退出")
+            pid = handle.pid
+            consecutive = 1
+        now = time.monotonic()
+        if consecutive >= stable_probes:
+            return LaunchResult(True, pid, now - start, probes)
+        if now >= until:
+            return LaunchResult(False, pid, probes=probes, error="等待进程就绪超时")
+        _sleep(min(probe_interval, until - now), deadline)
+
+
+def start_proxifier(proxifier_exe_path):
+    """启动 Proxifier 进程并等待就绪
+
+    Returns:
+        bool: 进程是否稳定运行
+    """
+    return launch_proxifier(proxifier_exe_path).ok
+
+
+def _wait_exits(provider, pending, exits, start, until, forced, poll_interval, deadline=None):
+    """等待 pending 中的进程退出，记录每个 PID 的退出耗时"""
+    while pending:
+        check_cancelled(deadline)
+        for pid, create_time in list(pending.items()):
+            try:
+                alive = provider.is_alive(pid, create_time)
+            except Exception:
+                alive = False
+            if not alive:
+                exits[pid] = ProcessExit(pid, True, time.monotonic() - start, forced)
+                del pending[pid]
+        now = time.monotonic()
+        if not pending or now >= until:
+            return
+        _sleep(min(poll_interval, until - now), deadline)
+
+
+@trace.traced("process.terminate", "process")
+def terminate_proxifier(proxifier_exe_path, grace_timeout=TERMINATE_GRACE_TIMEOUT,
+                        force_timeout=TERMINATE_FORCE_TIMEOUT, poll_interval=TERMINATE_POLL_INTERVAL,
+                        deadline=None):
+    """终止 Proxifier：先请求全部进程正常关闭，宽限期后只强制结束未退出的进程
+
+    只处理已跟踪的实例与完整路径一致的进程，不会误杀同名的其他程序。
+    全部 PID 同时收到关闭请求并被并行等待，一旦最后一个进程确认退出立即返回。
+
+    Args:
+        proxifier_exe_path: Proxifier 可执行文件路径
+        grace_timeout: 等待正常退出的秒数，为 0 时跳过正常关闭，直接强制结束
+        force_timeout: 强制结束后等待确认的秒数
+        poll_interval: 检查间隔秒数
+        deadline: Deadline (可选)，宽限期与确认等待都不超过其剩余时间
+                  (到期后仍会发出强制结束)，取消时抛出 OperationCancelled
+
+    Returns:
+        TerminateResult: 终止结果 (可直接作为 bool 使用)，含每个 PID 的退出耗时
+    """
+    check_cancelled(deadline)
+    tracker = get_tracker(proxifier_exe_path)
+    provider = get_process_provider()
+    start = time.monotonic()
+    pending = {}
+    for pid in tracker.pids():
+        info = provider.process_info(pid)
+        if info is not None:
+            pending[pid] = info.create_time
+    exits = {}
+    if pending and grace_timeout > 0:
+        provider.terminate(list(pending), force=False, deadline=deadline)
+        until = start + clamp(deadline, grace_timeout)
+        _wait_exits(provider, pending, exits, start, until, False, poll_interval, deadline)
+    if pending:
+        # 强制结束本身很快，不受已到期的截止时间限制，避免留下半关闭的进程
+        provider.terminate(list(pending), force=True)
+        until = time.monotonic() + clamp(deadline, force_timeout)
+        _wait_exits(provider, pending, exits, start, until, True, poll_interval, deadline)
+        for pid in pending:
+            exits[pid] = ProcessExit(pid, False, forced=True)
+    tracker.release()
+    result = TerminateResult(not pending, list(exits.values()), time.monotonic() - start)
+    if result.exits:
+        metrics.histogram("toggler_terminate_seconds", "终止 Proxifier 耗时").observe(result.elapsed)
+        if result.forced:
+            metrics.counter("toggler_forced_kills_total", "宽限期后被强制结束的进程数").inc(len(result.forced))
+    return result
 
 
 def kill_proxifier(proxifier_exe_path):
-    """终止 Proxifier 进程"""
-    run_command_admin(f"taskkill /f /im {os.path.basename(proxifier_exe_path)}")
+    """终止 Proxifier 进程
+
+    Returns:
+        TerminateResult: 终止结果
+    """
+    result = terminate_proxifier(proxifier_exe_path)
+    if not result:
+        print(f"终止 Proxifier 失败: 进程 {[item.pid for item in result.exits if not item.exited]} 仍在运行")
+    return result
@@ -0,0 +1,244 @@
+"""期望状态协调模块
+
+托盘双击或连续点击"切换服务状态"时，不再为每次点击各开一个线程去抢
+net start / net stop。每次点击只更新期望状态 ("on" / "off")，由运行在
+共享后台事件循环上的唯一协调任务把驱动与进程收敛到最新的期望状态：
+
+- 连续的请求合并为最后一次意图 (on → off → on 只会收敛到 on)
+- 正在执行的步骤总会完整结束；期望状态改变后，剩余步骤不再执行
+- 每轮只执行从当前实际状态出发所必需的步骤
+- stop() 会取消正在进行的一轮，正在运行的 sc / net 命令随之结束
+"""
+import asyncio
+import threading
+import time
+
+from . import aio, service, trace
+from .constants import ServiceStatus
+from .deadline import CancelToken, Deadline
+from .toggle import DIRECTION_OFF, DIRECTION_ON, TogglePipeline
+
+# 监控结果不够新时查询实际状态的截止时间 (秒)
+OBSERVE_TIMEOUT = 5.0
+# 退出时等待进行中的切换完成的最长时间 (秒)
+SHUTDOWN_TIMEOUT = 30.0
+
+
+class ToggleReconciler:
+    """期望状态协调器 (单个协调任务)"""
+
+    def __init__(self, targets, monitor=None, loop_thread=None, grace_timeout=None):
+        """
+        Args:
+            targets: 无参函数，返回 (服务名称, Proxifier 路径)
+            monitor: StatusMonitor，协调期间通知其快速轮询 (可选)
+            loop_thread: 运行协调任务的 EventLoopThread，默认使用共享的后台事件循环
+            grace_timeout: 无参函数，返回终止进程时等待正常退出的秒数 (可选，每轮重新读取)
+        """
+        self._targets = targets
+        self._grace_timeout = grace_timeout
+        self.monitor = monitor
+        self._loop_thread = loop_thread or aio.get_event_loop_thread()
+        self._cond = threading.Condition()
+        self._toggle_lock = threading.Lock()   # 串行化 toggle() 的"读取方向 + 提交请求"
+        self._listeners = []
+        self._task = None
+        self._wakeup = None
+        self._token = None          # 正在进行的一轮的取消标记
+        self._stopped = False
+        self.desired = None         # 尚未收敛的期望状态；空闲时为 None
+        self._generation = 0        # 每次请求递增
+        self._applied = 0           # 已处理到的请求序号
+        self.last_result = None     # 最近一轮的 ToggleResult
+        self.requests = 0
+        self.runs = 0
+
+    def subscribe(self, callback):
+        """订阅协调结果
+
+        Args:
+            callback: callback(result, idle)，在后台事件循环线程中调用；
+                      idle 为 True 表示已没有待处理的请求 (可据此只通知最终结果)
+
+        Returns:
+            取消订阅的无参函数
+        """
+        with self._cond:
+            self._listeners.append(callback)
+
+        def unsubscribe():
+            with self._cond:
+                if callback in self._listeners:
+                    self._listeners.remove(callback)
+        return unsubscribe
+
+    def request(self, desired):
+        """设置期望状态 (立即返回)
+
+        Args:
+            desired: DIRECTION_ON / DIRECTION_OFF
+
+        Returns:
+            int: 本次请求的序号
+        """
+        if desired not in (DIRECTION_ON, DIRECTION_OFF):
+            raise ValueError(f"未知的期望状态: {desired}")
+        with self._cond:
+            self.desired = desired
+            self._generation += 1
+            self.requests += 1
+            generation = self._generation
+            trace.instant("reconciler.request", "toggle", desired=desired, generation=generation)
+            self._ensure_task()
+            self._cond.notify_all()
+        self._loop_thread.call_soon(self._wake)
+        if self.monitor:
+            self.monitor.notify_transition()
+        return generation
+
+    def toggle(self):
+        """切换：以尚未收敛的期望状态为准取反，空闲时以实际状态为准
+
+        监控结果不够新时会实时查询一次服务状态 (阻塞，最长 OBSERVE_TIMEOUT 秒)，
+        界面线程中应放到后台执行。并发调用依次进行，每次都以上一次的结果为准。
+
+        Returns:
+            str: 新的期望状态
+        """
+        with self._toggle_lock:
+            with self._cond:
+                current = self.desired
+            if current is None:
+                current = self._observed()
+            desired = DIRECTION_OFF if current == DIRECTION_ON else DIRECTION_ON
+            self.request(desired)
+            return desired
+
+    def is_busy(self):
+        """是否有尚未处理完的请求"""
+        with self._cond:
+            return self._applied != self._generation
+
+    def wait_idle(self, timeout=None):
+        """等待所有请求处理完毕
+
+        Returns:
+            bool: 是否在超时前进入空闲
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self._applied == self._generation, timeout)
+
+    def stop(self):
+        """停止协调任务，并取消正在进行的一轮"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            started = self._task is not None
+            token = self._token
+        if token is not None:
+            token.cancel()
+        if started:
+            self._loop_thread.call_soon(self._wake)
+
+    def shutdown(self, timeout=SHUTDOWN_TIMEOUT):
+        """退出时调用：先等待进行中的切换完成，超时后才取消
+
+        取消会跳过回滚，直接 stop() 可能让驱动与进程停在半途
+        (例如驱动已启动而 Proxifier 尚未启动)。
+
+        Returns:
+            bool: 是否在超时前进入空闲
+        """
+        idle = self.wait_idle(timeout)
+        if not idle:
+            print("等待切换完成超时，取消进行中的切换")
+        self.stop()
+        return idle
+
+    def _observed(self):
+        """当前实际状态对应的方向
+
+        监控结果只在足够新时直接使用：托盘空闲退避时它可能已是 30 秒前的结果，
+        启动时甚至是上次运行留下的记录，而驱动可能已在程序外被启停，
+        按旧状态取反会让切换变成"成功"的空操作。此时实时查询一次，
+        只有查询超时才退回监控结果。
+        """
+        cached = None
+        if self.monitor and self.monitor.last_status is not None:
+            cached = self.monitor.last_status[0]
+        status = cached if self._monitor_fresh() else None
+        if status is None:
+            service_name, _ = self._targets()
+            status = service.get_service_status(service_name, Deadline(OBSERVE_TIMEOUT))
+            trace.instant("reconciler.observe", "toggle", status=status, cached=cached)
+            if status == ServiceStatus.TIMEOUT.value and cached is not None:
+                status = cached
+        if status in (ServiceStatus.RUNNING.value, ServiceStatus.START_PENDING.value):
+            return DIRECTION_ON
+        return DIRECTION_OFF
+
+    def _monitor_fresh(self):
+        """监控结果是否已经实时确认，且不早于当前轮询间隔"""
+        monitor = self.monitor
+        if monitor is None or monitor.stale or monitor.last_status_at is None:
+            return False
+        interval = monitor.poll_interval
+        if interval is None:
+            return False
+        return time.time() - monitor.last_status_at <= interval
+
+    def _ensure_task(self):
+        if self._task is None:
+            self._task = self._loop_thread.submit(self._run())
+
+    def _wake(self):
+        """在事件循环线程中唤醒协调任务"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        self._wakeup = asyncio.Event()
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                pending = self._applied != self._generation
+                desired = self.desired
+                generation = self._generation
+            if not pending:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            def superseded():
+                # 只有意图真正改变才中止；同向的重复请求不打断当前这一轮
+                with self._cond:
+                    return self.desired != desired
+
+            service_name, exe_path = self._targets()
+            pipeline = TogglePipeline(service_name, exe_path, self.monitor)
+            if self._grace_timeout is not None:
+                pipeline.grace_timeout = self._grace_timeout()
+            token = CancelToken()
+            with self._cond:
+                self._token = token
+            # 各步骤本身是阻塞调用，放在共享线程池中执行，事件循环保持空闲
+            result = await aio.run_blocking(
+                pipeline.converge, desired, cancelled=superseded, deadline=Deadline(token=token)
+            )
+
+            with self._cond:
+                self._token = None
+                self.runs += 1
+                self.last_result = result
+                self._applied = generation
+                idle = self._applied == self._generation
+                if idle:
+                    self.desired = None
+                listeners = list(self._listeners)
+                self._cond.notify_all()
+            for callback in listeners:
+                try:
+                    callback(result, idle)
+                except Exception as e:
+                    print(f"切换结果订阅者处理失败: {e}")
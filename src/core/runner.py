@@ -0,0 +1,264 @@
+"""外部命令执行模块
+
+所有外部命令 (sc / net / taskkill / tasklist / 启动 Proxifier) 统一经由 CommandRunner：
+- 以 argv 列表直接创建进程，不经过 cmd.exe，也不拼接命令字符串
+- 强制超时，超时或调用方取消 (见 deadline.py) 后结束子进程
+- 限制同时运行的命令数
+- 记录返回码与 stderr，并按命令类型统计创建次数与耗时
+"""
+import ntpath
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+
+from . import metrics, trace
+from .deadline import OperationCancelled
+
+# 单条命令的默认超时 (秒)
+DEFAULT_TIMEOUT = 15.0
+# 同时运行的命令数上限
+MAX_CONCURRENT_COMMANDS = 4
+
+CREATE_NO_WINDOW = 0x08000000
+
+# 可取消的命令检查取消标记的间隔 (秒)
+CANCEL_CHECK_INTERVAL = 0.05
+
+
+@dataclass
+class CommandResult:
+    """一条命令的执行结果"""
+    argv: list
+    returncode: int = None      # 未正常结束 (超时 / 取消 / 无法创建进程) 时为 None
+    stdout: str = ""
+    stderr: str = ""
+    elapsed: float = 0.0        # 耗时 (秒)
+    timed_out: bool = False
+    cancelled: bool = False
+    error: str = None           # 无法创建进程时的错误信息
+
+    @property
+    def ok(self):
+        """返回码是否为 0"""
+        return self.returncode == 0
+
+    def __bool__(self):
+        return self.ok
+
+
+@dataclass
+class CommandStats:
+    """某一类命令的累计统计"""
+    spawns: int = 0             # 创建进程次数
+    failures: int = 0           # 返回码非 0 或无法创建进程的次数
+    timeouts: int = 0
+    cancellations: int = 0
+    total_time: float = 0.0     # 累计耗时 (秒)
+    max_time: float = 0.0
+    returncodes: dict = field(default_factory=dict)    # 返回码 -> 次数
+
+    def to_dict(self):
+        return {
+            "spawns": self.spawns,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "cancellations": self.cancellations,
+            "total_time": self.total_time,
+            "avg_time": self.total_time / self.spawns if self.spawns else 0.0,
+            "max_time": self.max_time,
+            "returncodes": dict(self.returncodes),
+        }
+
+
+def command_kind(argv):
+    """默认的命令类型：映像名 (去掉扩展名)，sc / net 再加上子命令"""
+    name = ntpath.basename(argv[0]).lower()
+    if name.endswith(".exe"):
+        name = name[:-4]
+    if name in ("sc", "net") and len(argv) > 1:
+        return f"{name} {argv[1].lower()}"
+    return name
+
+
+def hidden_window_kwargs():
+    """Windows 上隐藏控制台窗口所需的 Popen 参数"""
+    if sys.platform != 'win32':
+        return {}
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    startupinfo.wShowWindow = subprocess.SW_HIDE
+    return {"startupinfo": startupinfo, "creationflags": CREATE_NO_WINDOW}
+
+
+class CommandRunner:
+    """外部命令执行器"""
+
+    def __init__(self, max_concurrency=MAX_CONCURRENT_COMMANDS, default_timeout=DEFAULT_TIMEOUT):
+        self.default_timeout = default_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def run(self, argv, timeout=None, kind=None, deadline=None):
+        """执行命令并等待结束
+
+        Args:
+            argv: 命令行参数列表
+            timeout: 超时秒数，None 时使用 default_timeout
+            kind: 统计用的命令类型，默认由 command_kind 推断
+            deadline: Deadline，超时取二者中较早者；其取消标记被触发时结束子进程
+
+        Returns:
+            CommandResult: 超时、取消与无法创建进程均体现在结果中，不会抛出异常
+        """
+        argv = [str(arg) for arg in argv]
+        timeout = self.default_timeout if timeout is None else timeout
+        if deadline is not None:
+            timeout = deadline.clamp(timeout)
+        result = CommandResult(argv)
+        start = time.monotonic()
+        # 排队等待执行名额也计入超时
+        if not self._slots.acquire(timeout=timeout):
+            result.timed_out = True
+            result.elapsed = time.monotonic() - start
+            self.record(kind or command_kind(argv), result, spawned=False)
+            return result
+        spawned = False
+        try:
+            if deadline is not None and deadline.done:
+                result.cancelled = deadline.cancelled
+                result.timed_out = not deadline.cancelled
+                return result
+            with trace.span(kind or command_kind(argv), "command", argv=" ".join(argv)) as span:
+                try:
+                    proc = subprocess.Popen(
+                        argv,
+                        stdin=subprocess.DEVNULL,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
+                        text=True,
+                        errors="replace",
+                        **hidden_window_kwargs()
+                    )
+                except OSError as e:
+                    result.error = str(e)
+                else:
+                    spawned = True
+                    self._communicate(proc, result, start + timeout, deadline)
+                span.annotate(returncode=result.returncode, timed_out=result.timed_out)
+        finally:
+            self._slots.release()
+            result.elapsed = time.monotonic() - start
+            self.record(kind or command_kind(argv), result, spawned)
+        return result
+
+    @staticmethod
+    def _communicate(proc, result, end, deadline):
+        """等待子进程结束；超时或取消时结束子进程"""
+        cancellable = deadline is not None and deadline.token is not None
+        while True:
+            wait = max(0.0, end - time.monotonic())
+            if cancellable:
+                wait = min(wait, CANCEL_CHECK_INTERVAL)
+            try:
+                result.stdout, result.stderr = proc.communicate(timeout=wait)
+                result.returncode = proc.returncode
+                return
+            except subprocess.TimeoutExpired:
+                if cancellable and deadline.cancelled:
+                    result.cancelled = True
+                elif time.monotonic() >= end:
+                    result.timed_out = True
+                else:
+                    continue
+            proc.kill()
+            proc.communicate()
+            return
+
+    def spawn(self, argv, kind=None, **popen_kwargs):
+        """创建不等待结束的进程 (启动 Proxifier、常驻探测进程等)
+
+        Returns:
+            subprocess.Popen
+        """
+        argv = [str(arg) for arg in argv]
+        kwargs = hidden_window_kwargs()
+        kwargs.update(popen_kwargs)
+        start = time.monotonic()
+        result = CommandResult(argv)
+        try:
+            return subprocess.Popen(argv, **kwargs)
+        except OSError as e:
+            result.error = str(e)
+            raise
+        finally:
+            result.elapsed = time.monotonic() - start
+            # 只统计创建耗时；进程仍在运行，不记返回码
+            result.returncode = None if result.error else 0
+            self.record(kind or command_kind(argv), result)
+
+    def record(self, kind, result, spawned=None):
+        """记录一次命令执行
+
+        Args:
+            spawned: 是否实际创建了进程，None 时按 result.error 判断
+        """
+        if spawned is None:
+            spawned = result.error is None
+        with self._lock:
+            stats = self._stats.get(kind)
+            if stats is None:
+                stats = self._stats[kind] = CommandStats()
+            if spawned:
+                stats.spawns += 1
+            if result.timed_out:
+                stats.timeouts += 1
+            elif result.cancelled:
+                stats.cancellations += 1
+            elif not result.ok:
+                stats.failures += 1
+            if result.returncode is not None:
+                stats.returncodes[result.returncode] = stats.returncodes.get(result.returncode, 0) + 1
+            stats.total_time += result.elapsed
+            stats.max_time = max(stats.max_time, result.elapsed)
+        labels = {"kind": kind}
+        if spawned:
+            metrics.counter("toggler_command_spawns_total", "外部命令创建进程次数", labels).inc()
+        if result.timed_out:
+            metrics.counter("toggler_command_timeouts_total", "外部命令超时次数", labels).inc()
+        elif not result.ok and not result.cancelled:
+            metrics.counter("toggler_command_failures_total", "外部命令失败次数", labels).inc()
+        metrics.histogram("toggler_command_seconds", "外部命令耗时", labels).observe(result.elapsed)
+
+    def stats(self):
+        """按命令类型导出统计 {类型: {...}}"""
+        with self._lock:
+            return {kind: stats.to_dict() for kind, stats in self._stats.items()}
+
+    def reset_stats(self):
+        """清空统计"""
+        with self._lock:
+            self._stats.clear()
+
+
+_runner = CommandRunner()
+
+
+def get_runner():
+    """获取共享的命令执行器"""
+    return _runner
+
+
+def run(argv, timeout=None, kind=None, deadline=None):
+    """使用共享执行器执行命令 (见 CommandRunner.run)"""
+    return _runner.run(argv, timeout=timeout, kind=kind, deadline=deadline)
+
+
+def run_checked(argv, timeout=None, kind=None, deadline=None):
+    """执行命令；被取消时抛出 OperationCancelled，其余情况同 run"""
+    result = run(argv, timeout=timeout, kind=kind, deadline=deadline)
+    if result.cancelled:
+        raise OperationCancelled(f"命令已取消: {' '.join(result.argv)}")
+    return result
@@ -0,0 +1,157 @@
+"""自适应轮询调度模块
+
+根据当前场景决定状态监控的下一次轮询间隔：
+- 过渡期 (刚发起切换 / 服务处于 PENDING / 用户刚操作过)：快速轮询
+- 主界面有焦点：正常频率
+- 主界面可见但无焦点：稍慢
+- 仅托盘运行：从 idle_min 起逐次翻倍退避到 idle_max
+"""
+import threading
+import time
+from collections import deque
+
+# 各场景的轮询间隔 (秒)
+TRANSITION_INTERVAL = 0.2
+FOCUSED_INTERVAL = 2.0
+VISIBLE_INTERVAL = 5.0
+IDLE_MIN_INTERVAL = 5.0
+IDLE_MAX_INTERVAL = 30.0
+
+# 发起切换后保持快速轮询的最长时间 (秒)
+TRANSITION_WINDOW = 15.0
+# 用户操作后保持快速轮询的时间 (秒)
+INTERACTION_WINDOW = 3.0
+
+MODE_TRANSITION = "transition"
+MODE_FOCUSED = "focused"
+MODE_VISIBLE = "visible"
+MODE_TRAY = "tray"
+
+
+class AdaptivePollScheduler:
+    """根据界面状态与用户操作计算轮询间隔，并统计唤醒次数"""
+
+    def __init__(self, transition_interval=TRANSITION_INTERVAL, focused_interval=FOCUSED_INTERVAL,
+                 visible_interval=VISIBLE_INTERVAL, idle_min_interval=IDLE_MIN_INTERVAL,
+                 idle_max_interval=IDLE_MAX_INTERVAL, clock=time.monotonic):
+        self.transition_interval = transition_interval
+        self.focused_interval = focused_interval
+        self.visible_interval = visible_interval
+        self.idle_min_interval = idle_min_interval
+        self.idle_max_interval = idle_max_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._fast_until = 0.0
+        self._pending = False
+        self._idle_interval = idle_min_interval
+        self._wakeups = deque()         # 最近一小时内的唤醒时间
+        self._started_at = clock()
+        self.ui_visible = False
+        self.ui_focused = False
+        self.total_wakeups = 0
+
+    # ------------------------------------------------------------------
+    # 事件输入
+    # ------------------------------------------------------------------
+
+    def notify_transition(self, window=TRANSITION_WINDOW):
+        """发起了切换操作：在 window 秒内快速轮询"""
+        with self._lock:
+            self._fast_until = max(self._fast_until, self._clock() + window)
+            self._idle_interval = self.idle_min_interval
+
+    def end_transition(self):
+        """切换已完成：提前结束快速轮询"""
+        with self._lock:
+            self._fast_until = 0.0
+
+    def notify_interaction(self):
+        """用户有操作 (点击托盘菜单、按钮等)：短暂恢复快速轮询"""
+        with self._lock:
+            self._fast_until = max(self._fast_until, self._clock() + INTERACTION_WINDOW)
+            self._idle_interval = self.idle_min_interval
+
+    def set_ui_visible(self, visible):
+        with self._lock:
+            self.ui_visible = visible
+            if not visible:
+                self.ui_focused = False
+            self._idle_interval = self.idle_min_interval
+
+    def set_ui_focused(self, focused):
+        with self._lock:
+            self.ui_focused = focused
+            if focused:
+                self.ui_visible = True
+
+    # ------------------------------------------------------------------
+    # 调度
+    # ------------------------------------------------------------------
+
+    def mode(self):
+        """当前调度场景"""
+        with self._lock:
+            return self._mode_locked(self._clock())
+
+    def _mode_locked(self, now):
+        if self._pending or now < self._fast_until:
+            return MODE_TRANSITION
+        if self.ui_focused:
+            return MODE_FOCUSED
+        if self.ui_visible:
+            return MODE_VISIBLE
+        return MODE_TRAY
+
+    def next_interval(self, changed=False, pending=False):
+        """记录一次唤醒并返回距下次轮询的间隔
+
+        Args:
+            changed: 本次轮询是否观察到状态变化
+            pending: 服务是否处于启动/停止过渡态
+        """
+        with self._lock:
+            now = self._clock()
+            self._record_wakeup(now)
+            self._pending = pending
+            if changed:
+                # 状态刚变化，可能还有后续变化，退避重新开始
+                self._idle_interval = self.idle_min_interval
+
+            mode = self._mode_locked(now)
+            if mode == MODE_TRANSITION:
+                return self.transition_interval
+            if mode == MODE_FOCUSED:
+                return self.focused_interval
+            if mode == MODE_VISIBLE:
+                return self.visible_interval
+
+            interval = self._idle_interval
+            self._idle_interval = min(self._idle_interval * 2, self.idle_max_interval)
+            return interval
+
+    # ------------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------------
+
+    def _record_wakeup(self, now):
+        self.total_wakeups += 1
+        self._wakeups.append(now)
+        while self._wakeups and self._wakeups[0] < now - 3600:
+            self._wakeups.popleft()
+
+    def wakeups_per_hour(self):
+        """最近一小时的唤醒次数 (运行不足一小时时按比例折算，至少按一分钟计)"""
+        with self._lock:
+            now = self._clock()
+            while self._wakeups and self._wakeups[0] < now - 3600:
+                self._wakeups.popleft()
+            window = min(3600.0, max(60.0, now - self._started_at))
+            return len(self._wakeups) * 3600.0 / window
+
+    def stats(self):
+        """导出调度统计"""
+        return {
+            "mode": self.mode(),
+            "wakeups_per_hour": round(self.wakeups_per_hour(), 1),
+            "total_wakeups": self.total_wakeups,
+        }
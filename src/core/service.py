@@ -1,66 +1,161 @@
 """Proxifier 服务管理模块"""
-import subprocess
+import threading
 import time
 
+from . import metrics, runner, trace
+from .backend import ServiceBackend
+from .constants import ServiceStatus
+from .service_state import ServiceState, parse_sc_query
 
-def run_command_admin(command):
-    """执行命令（需要管理员权限）"""
-    try:
-        # 使用 CREATE_NO_WINDOW 标志隐藏窗口
-        startupinfo = subprocess.STARTUPINFO()
-        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-        startupinfo.wShowWindow = subprocess.SW_HIDE
-        
-        process = subprocess.Popen(
-            command,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            startupinfo=startupinfo
-        )
-        stdout, stderr = process.communicate()
-        return process.returncode
-    except Exception as e:
-        print(f"执行命令失败: {command}\n错误: {e}")
+# 启动 / 停止服务时等待目标状态的截止时间 (秒)
+START_TIMEOUT = 15.0
+STOP_TIMEOUT = 15.0
+
+
+def run_command_admin(argv, timeout=None, deadline=None):
+    """执行命令（需要管理员权限）
+
+    Args:
+        argv: 命令行参数列表 (不经过 shell)
+        timeout: 超时秒数，None 时使用执行器的默认超时
+        deadline: Deadline (可选)；取消时抛出 OperationCancelled
+
+    Returns:
+        int: 返回码；无法执行或超时时为 -1
+    """
+    result = runner.run_checked(argv, timeout=timeout, deadline=deadline)
+    if result.error is not None or result.timed_out:
+        print(f"执行命令失败: {' '.join(result.argv)}\n错误: {result.error or '超时'}")
         return -1
+    return result.returncode
+
+
+class SubprocessServiceBackend(ServiceBackend):
+    """基于 sc / net 命令的服务后端 (Windows)"""
+
+    def query_state(self, service_name, deadline=None):
+        # queryex 额外输出 PID，其余字段与 query 一致
+        result = runner.run_checked(["sc", "queryex", service_name], deadline=deadline)
+        if result.timed_out:
+            print(f"获取服务状态超时: {service_name}")
+            return ServiceState(name=service_name, status=ServiceStatus.TIMEOUT.value)
+        if result.error is not None:
+            print(f"获取服务状态失败: {result.error}")
+            return ServiceState(name=service_name, status=ServiceStatus.ERROR.value)
+        if not result.ok:
+            return ServiceState(name=service_name, status=ServiceStatus.NOT_INSTALLED.value)
+        try:
+            return parse_sc_query(result.stdout, service_name)
+        except Exception as e:
+            print(f"获取服务状态失败: {e}")
+            return ServiceState(name=service_name, status=ServiceStatus.ERROR.value)
+
+    def start(self, service_name, deadline=None):
+        return run_command_admin(["net", "start", service_name], deadline=deadline)
+
+    def stop(self, service_name, deadline=None):
+        return run_command_admin(["net", "stop", service_name], deadline=deadline)
+
+
+# 当前使用的服务后端 (默认延迟创建 SubprocessServiceBackend)
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """获取当前服务后端"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = SubprocessServiceBackend()
+        return _backend
+
+
+def set_backend(backend):
+    """替换服务后端 (例如测试/基准中使用 FakeServiceBackend)
+
+    Returns:
+        ServiceBackend: 之前使用的后端
+    """
+    global _backend
+    with _backend_lock:
+        previous = _backend
+        _backend = backend
+        return previous
+
+
+def _record_query(start, status):
+    metrics.histogram("toggler_service_query_seconds", "驱动服务状态查询耗时").observe(time.perf_counter() - start)
+    metrics.counter("toggler_service_queries_total", "驱动服务状态查询次数 (按结果)", {"status": status}).inc()
+
+
+def get_service_status(service_name, deadline=None):
+    """获取服务状态 (超时返回 ServiceStatus.TIMEOUT)"""
+    start = time.perf_counter()
+    status = get_backend().query(service_name, deadline)
+    _record_query(start, status)
+    return status
+
+
+def get_service_state(service_name, deadline=None):
+    """获取服务的完整状态 (STATE 数值、PID、退出码、WAIT_HINT)"""
+    start = time.perf_counter()
+    state = get_backend().query_state(service_name, deadline)
+    _record_query(start, state.status)
+    return state
+
+
+def wait_for_state(service_name, target, timeout, deadline=None):
+    """等待服务进入目标状态 (指数退避轮询)
+
+    Args:
+        service_name: 服务名称
+        target: 目标状态 (ServiceStatus 或其字符串值)
+        timeout: 最长等待秒数
+        deadline: Deadline (可选)，与 timeout 取较早者；取消时抛出 OperationCancelled
+
+    Returns:
+        WaitResult: 是否到达、最后状态、实际耗时以及是否超时
+    """
+    if isinstance(target, ServiceStatus):
+        target = target.value
+    return get_backend().wait(service_name, target, timeout, deadline=deadline)
+
+
+def _control(verb, service_name, target, timeout, deadline):
+    """发出启停命令并等待目标状态，记录耗时与失败次数"""
+    labels = {"action": verb}
+    with metrics.histogram("toggler_service_control_seconds", "驱动启停 (到达目标状态) 耗时", labels).time():
+        with trace.span(f"service.{verb}", "service", service=service_name) as span:
+            rc = getattr(get_backend(), verb)(service_name, deadline)
+            span.annotate(rc=rc)
+        reached = None
+        if rc != 0:
+            # net start / net stop 是同步的：返回非零且服务不在过渡态 (拒绝访问、驱动启动失败、
+            # 服务被禁用等) 时结果已确定，无需等满截止时间；已处于目标状态则视为成功
+            state = get_service_state(service_name, deadline)
+            if state.status == target.value:
+                reached = True
+            elif not state.is_pending:
+                action = "启动" if verb == "start" else "停止"
+                print(f"{action}服务失败: {service_name} (返回码 {rc}，状态 {state.status})")
+                reached = False
+        if reached is None:
+            with trace.span("service.wait", "service", target=target.value) as span:
+                result = wait_for_state(service_name, target, timeout, deadline)
+                span.annotate(polls=result.polls, status=result.status)
+            reached = result.reached
+    if not reached:
+        metrics.counter("toggler_service_control_failures_total", "驱动启停失败次数 (按命令返回码)",
+                        {**labels, "rc": str(rc)}).inc()
+    return reached
+
+
+def start_service(service_name, timeout=START_TIMEOUT, deadline=None):
+    """启动服务，服务进入 RUNNING 后立即返回"""
+    return _control("start", service_name, ServiceStatus.RUNNING, timeout, deadline)
 
 
-def get_service_status(service_name):
-    """获取服务状态"""
-    try:
-        startupinfo = subprocess.STARTUPINFO()
-        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-        startupinfo.wShowWindow = subprocess.SW_HIDE
-        
-        output = subprocess.check_output(
-            f'sc query "{service_name}"',
-            shell=True,
-            text=True,
-            startupinfo=startupinfo,
-            stderr=subprocess.DEVNULL
-        )
-        if "RUNNING" in output:
-            return "RUNNING"
-        elif "STOPPED" in output:
-            return "STOPPED"
-        else:
-            return "UNKNOWN"
-    except subprocess.CalledProcessError:
-        return "NOT_INSTALLED"
-    except Exception as e:
-        print(f"获取服务状态失败: {e}")
-        return "ERROR"
-
-
-def start_service(service_name):
-    """启动服务"""
-    run_command_admin(f"net start {service_name}")
-    time.sleep(2)
-    return get_service_status(service_name) == "RUNNING"
-
-
-def stop_service(service_name):
-    """停止服务"""
-    run_command_admin(f"net stop {service_name}")
-    time.sleep(1)
-    return get_service_status(service_name) == "STOPPED"
+def stop_service(service_name, timeout=STOP_TIMEOUT, deadline=None):
+    """停止服务，服务进入 STOPPED 后立即返回"""
+    return _control("stop", service_name, ServiceStatus.STOPPED, timeout, deadline)
@@ -0,0 +1,106 @@
+"""服务状态记录与 `sc queryex` 输出解析模块"""
+from dataclasses import dataclass
+
+from .constants import ServiceStatus
+
+
+# SERVICE_STATUS.dwCurrentState 数值
+STATE_STOPPED = 1
+STATE_START_PENDING = 2
+STATE_STOP_PENDING = 3
+STATE_RUNNING = 4
+STATE_CONTINUE_PENDING = 5
+STATE_PAUSE_PENDING = 6
+STATE_PAUSED = 7
+
+STATE_CODE_MAP = {
+    STATE_STOPPED: ServiceStatus.STOPPED,
+    STATE_START_PENDING: ServiceStatus.START_PENDING,
+    STATE_STOP_PENDING: ServiceStatus.STOP_PENDING,
+    STATE_RUNNING: ServiceStatus.RUNNING,
+}
+
+PENDING_STATUSES = (ServiceStatus.START_PENDING.value, ServiceStatus.STOP_PENDING.value)
+
+# 根据 WAIT_HINT 推算下次轮询间隔时的上下限 (秒)
+MIN_HINT_INTERVAL = 0.05
+MAX_HINT_INTERVAL = 1.0
+
+
+@dataclass
+class ServiceState:
+    """一次服务查询的完整结果"""
+    name: str
+    status: str                     # ServiceStatus 字符串值
+    state_code: int = None          # 原始 STATE 数值，未安装/出错时为 None
+    pid: int = 0
+    win32_exit_code: int = 0
+    service_exit_code: int = 0
+    checkpoint: int = 0
+    wait_hint: int = 0              # 毫秒
+
+    @property
+    def is_pending(self):
+        """是否处于启动/停止过渡态"""
+        return self.status in PENDING_STATUSES
+
+    def next_poll_interval(self, default):
+        """根据 WAIT_HINT 计算下次轮询间隔
+
+        过渡态下按照 SCM 约定取 WAIT_HINT 的 1/10，并限制在合理范围内；
+        其他情况返回 default。
+        """
+        if not self.is_pending or self.wait_hint <= 0:
+            return default
+        interval = self.wait_hint / 1000 / 10
+        return max(MIN_HINT_INTERVAL, min(interval, MAX_HINT_INTERVAL))
+
+
+def status_from_code(state_code):
+    """将 STATE 数值映射为 ServiceStatus 字符串值"""
+    return STATE_CODE_MAP.get(state_code, ServiceStatus.UNKNOWN).value
+
+
+def _parse_int(text):
+    """解析 `0  (0x0)` / `0x7d0` / `1077` 等形式的数值"""
+    token = text.split()[0] if text.split() else ""
+    try:
+        return int(token, 16) if token.lower().startswith("0x") else int(token)
+    except ValueError:
+        return 0
+
+
+def parse_sc_query(output, service_name=""):
+    """解析 `sc query` / `sc queryex` 的输出
+
+    Args:
+        output: 命令的标准输出文本
+        service_name: 输出中缺少 SERVICE_NAME 时使用的名称
+
+    Returns:
+        ServiceState: 解析结果；找不到 STATE 字段时状态为 UNKNOWN
+    """
+    fields = {}
+    for line in output.splitlines():
+        key, sep, value = line.partition(":")
+        if not sep:
+            continue
+        key = key.strip().upper()
+        if key and key not in fields:
+            fields[key] = value.strip()
+
+    name = fields.get("SERVICE_NAME") or service_name
+    if "STATE" not in fields:
+        return ServiceState(name=name, status=ServiceStatus.UNKNOWN.value)
+
+    state_code = _parse_int(fields["STATE"])
+    return ServiceState(
+        name=name,
+        status=status_from_code(state_code),
+        state_code=state_code,
+        pid=_parse_int(fields.get("PID", "0")),
+        win32_exit_code=_parse_int(fields.get("WIN32_EXIT_CODE", "0")),
+        service_exit_code=_parse_int(fields.get("SERVICE_EXIT_CODE", "0")),
+        checkpoint=_parse_int(fields.get("CHECKPOINT", "0")),
+        wait_hint=_parse_int(fields.get("WAIT_HINT", "0")),
+    )
@@ -0,0 +1,82 @@
+"""批量状态探测模块
+
+一次后端往返同时回答多个服务与进程的状态，返回 StatusSnapshot。
+监控每个周期只需一次探测，额外关注的驱动或辅助进程不会线性增加开销。
+"""
+import time
+from dataclasses import dataclass, field
+
+from . import process, service
+from .constants import ServiceStatus
+from .service_state import ServiceState
+
+
+@dataclass
+class StatusSnapshot:
+    """某一时刻的服务与进程状态"""
+    services: dict = field(default_factory=dict)    # 服务名 -> ServiceState
+    processes: dict = field(default_factory=dict)   # 查询时给出的可执行文件名或完整路径 -> 是否运行
+    taken_at: float = 0.0                           # time.monotonic() 时间戳
+
+    def service_state(self, service_name):
+        """获取服务状态记录，不在快照中时返回 UNKNOWN"""
+        state = self.services.get(service_name)
+        if state is None:
+            return ServiceState(name=service_name, status=ServiceStatus.UNKNOWN.value)
+        return state
+
+    def service_status(self, service_name):
+        """获取服务状态字符串"""
+        return self.service_state(service_name).status
+
+    def is_running(self, exe_name_or_path):
+        """进程是否在运行
+
+        完整路径只认按该路径探测的结果；映像名则任一同名条目在运行即可。
+        """
+        running = self.processes.get(exe_name_or_path)
+        if running is not None or process.is_full_path(exe_name_or_path):
+            return bool(running)
+        exe_name = exe_name_or_path.lower()
+        return any(process.image_name(name).lower() == exe_name and running
+                   for name, running in self.processes.items())
+
+
+def probe_status(service_names, exe_names, deadline=None):
+    """批量探测服务与进程状态
+
+    Args:
+        service_names: 服务名称列表
+        exe_names: 可执行文件名或完整路径列表；完整路径按路径匹配 (与终止进程的规则一致)，
+                   并使用进程跟踪器，已跟踪的实例只做按 PID 的存活检查
+        deadline: Deadline (可选)，到期时未得到结果的服务状态为 ServiceStatus.TIMEOUT
+
+    Returns:
+        StatusSnapshot
+    """
+    tracked = {}
+    untracked = []
+    for exe in exe_names:
+        # 完整路径且持有存活句柄：按 PID 检查即可，无需进入枚举
+        if process.is_full_path(exe) and process.get_tracker(exe).check_handle():
+            tracked[exe] = True
+        else:
+            untracked.append(exe)
+
+    states, processes = service.get_backend().probe_batch(list(service_names), untracked, deadline)
+    if processes is None:
+        try:
+            snapshot = process.take_snapshot() if untracked else None
+        except Exception:
+            snapshot = None
+        processes = {exe: bool(snapshot and snapshot.is_running_exact(exe)) for exe in untracked}
+        for exe in untracked:
+            if processes[exe] and process.is_full_path(exe):
+                process.get_tracker(exe).adopt(snapshot)
+    else:
+        # 探测进程只回答是否运行；发现路径一致但未跟踪的实例时接管一次，之后不再枚举
+        for exe in untracked:
+            if processes.get(exe) and process.is_full_path(exe):
+                process.get_tracker(exe).adopt()
+    processes.update(tracked)
+    return StatusSnapshot(services=states, processes=processes, taken_at=time.monotonic())
@@ -0,0 +1,237 @@
+"""启动剖析模块 (run.py --profile-startup)
+
+从 run.py 的 main() 开始，到托盘图标真正显示出来为止，记录：
+- 每个模块的导入耗时 (与 python -X importtime 相同的 self / cumulative 口径)。
+  通过插在 sys.meta_path 最前面的计时查找器实现，不依赖解释器参数，
+  因此源码运行与 PyInstaller 打包后的 EXE 行为一致
+- 主线程的 cProfile (按累计耗时排序)，到主线程完成启动工作、进入等待或消息循环为止
+  (bootstrap.main_thread_idle)。cProfile 只能在启用它的线程中停止，
+  因此由主线程自己停止，保持运行时程序不会一直处于剖析状态
+- 启动依赖图的时间线 (后台线程中的步骤见这里)
+
+托盘显示后写出文本报告 (同时写出 .prof 原始数据，可用 pstats / snakeviz 查看)，
+默认随后退出程序；keep_running 时继续正常运行。
+"""
+import cProfile
+import io
+import os
+import platform
+import pstats
+import sys
+import threading
+import time
+
+from . import bootstrap
+
+# 等待托盘显示的最长时间 (秒)，超时后照常写出报告
+PROFILE_TIMEOUT = 120.0
+# 托盘显示后等待主线程停止 cProfile 的最长时间 (秒)
+MAIN_THREAD_IDLE_TIMEOUT = 10.0
+# 报告中列出的导入 / 函数条数
+TOP_IMPORTS = 40
+TOP_FUNCTIONS = 60
+
+DEFAULT_REPORT_NAME = "startup_profile.txt"
+
+
+class _TimedLoader:
+    """包装原加载器，记录 exec_module 的耗时"""
+
+    def __init__(self, timer, loader):
+        self._timer = timer
+        self._loader = loader
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # 模块执行期间恢复原加载器，避免其他代码看到包装对象
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        self._timer._enter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._timer._leave(module.__name__)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class ImportTimer:
+    """计时查找器：委托 sys.meta_path 中的其余查找器找到模块，再为其加载器计时"""
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.records = []       # [(模块名, self 秒, cumulative 秒, 嵌套深度)]，按完成顺序
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in list(sys.meta_path):
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is None:
+                continue
+            loader = spec.loader
+            if loader is not None and hasattr(loader, "exec_module") and not isinstance(loader, _TimedLoader):
+                spec.loader = _TimedLoader(self, loader)
+            return spec
+        return None
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self):
+        # [开始时间, 子模块累计耗时]
+        self._stack().append([self._clock(), 0.0])
+
+    def _leave(self, name):
+        stack = self._stack()
+        start, children = stack.pop()
+        cumulative = self._clock() - start
+        if stack:
+            stack[-1][1] += cumulative
+        with self._lock:
+            self.records.append((name, cumulative - children, cumulative, len(stack)))
+
+    def format_importtime(self):
+        """-X importtime 格式的明细 (微秒)"""
+        lines = ["import time: self [us] | cumulative | imported package"]
+        with self._lock:
+            records = list(self.records)
+        for name, own, cumulative, depth in records:
+            lines.append(f"import time: {own * 1e6:9.0f} | {cumulative * 1e6:10.0f} | {'  ' * depth}{name}")
+        return "\n".join(lines)
+
+    def format_top(self, limit=TOP_IMPORTS):
+        """按累计耗时排序的前 limit 个模块 (毫秒)"""
+        with self._lock:
+            records = sorted(self.records, key=lambda record: record[2], reverse=True)[:limit]
+        lines = [f"{'self [ms]':>10} | {'cumulative [ms]':>15} | module"]
+        for name, own, cumulative, _ in records:
+            lines.append(f"{own * 1000:10.1f} | {cumulative * 1000:15.1f} | {name}")
+        return "\n".join(lines)
+
+
+def default_report_path():
+    """默认报告路径：配置目录下的 startup_profile.txt (打包环境下位于 EXE 旁)"""
+    from ..config import manager as config_manager
+    return config_manager.CONFIG_DIR / DEFAULT_REPORT_NAME
+
+
+class StartupProfiler:
+    """启动剖析：导入计时 + 主线程 cProfile，托盘显示后写出报告"""
+
+    def __init__(self, report_path=None, keep_running=False, timeout=PROFILE_TIMEOUT):
+        """
+        Args:
+            report_path: 报告路径，None 时使用 default_report_path()
+            keep_running: 写出报告后是否继续运行 (否则退出程序)
+            timeout: 等待托盘显示的最长时间 (秒)
+        """
+        self.report_path = report_path
+        self.keep_running = keep_running
+        self.timeout = timeout
+        self.imports = ImportTimer()
+        self.profile = cProfile.Profile()
+        self.started_at = None
+        self.main_stopped_at = None     # 主线程停止 cProfile 的时刻 (time.perf_counter())
+        self._main_stopped = threading.Event()
+
+    def start(self):
+        """在主线程中调用：开始计时导入与 cProfile，并在后台等待托盘显示"""
+        self.started_at = time.perf_counter()
+        self.imports.install()
+        bootstrap.on_main_thread_idle(self._stop_main_thread)
+        self.profile.enable()
+        threading.Thread(target=self._wait_and_report, name="startup-profiler", daemon=True).start()
+
+    def _stop_main_thread(self):
+        """由主线程在 main_thread_idle() 中调用：停止本线程的 cProfile"""
+        self.profile.disable()
+        self.main_stopped_at = time.perf_counter()
+        self._main_stopped.set()
+
+    def _wait_and_report(self):
+        milestone = bootstrap.wait_for(bootstrap.MILESTONE_TRAY_VISIBLE, self.timeout)
+        self.imports.uninstall()
+        # 主线程可能还在构建界面：等它进入等待 / 消息循环并自行停止 cProfile
+        if not self._main_stopped.wait(MAIN_THREAD_IDLE_TIMEOUT):
+            print("主线程未在预期时间内停止 cProfile，报告中的主线程数据截至此刻")
+        try:
+            path = self.write_report(milestone)
+        except Exception as e:
+            print(f"写入启动剖析报告失败: {e}")
+            return
+        tray = milestone.payload if milestone is not None else None
+        if tray is None:
+            print(f"托盘未在 {self.timeout:.0f} 秒内显示，启动剖析报告已写入: {path}")
+            return
+        if self.keep_running:
+            tray.notify(f"启动剖析报告已写入: {path}")
+        else:
+            print(f"启动剖析报告已写入: {path}，程序退出")
+            tray.quit_app(tray.icon, None)
+
+    def write_report(self, milestone):
+        """写出文本报告与 .prof 原始数据
+
+        Returns:
+            str: 报告路径
+        """
+        path = str(self.report_path or default_report_path())
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.profile.create_stats()
+        self.profile.dump_stats(path + ".prof")
+
+        stats_text = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=stats_text)
+        stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+
+        from .. import __version__
+        if milestone is not None:
+            time_to_tray = f"{(milestone.at - self.started_at) * 1000:.1f} ms"
+        else:
+            time_to_tray = f"未在 {self.timeout:.0f} 秒内显示"
+        if self.main_stopped_at is not None:
+            main_stopped = f"{(self.main_stopped_at - self.started_at) * 1000:.1f} ms (主线程进入等待 / 消息循环)"
+        else:
+            main_stopped = "主线程仍在运行启动代码，数据截至写出报告时"
+        sections = [
+            "Proxifier Toggler 启动剖析报告",
+            f"版本: {__version__}  Python: {platform.python_version()}  平台: {platform.platform()}",
+            f"运行方式: {'打包 EXE' if getattr(sys, 'frozen', False) else '源码'}  "
+            f"时间: {time.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"托盘显示耗时 (自 run.py main 起): {time_to_tray}",
+            f"主线程 cProfile 采集至: {main_stopped}",
+            "注: 剖析期间 cProfile 与导入计时本身有开销，绝对耗时会偏高，宜看相对占比",
+            "",
+            "== 启动时间线 ==",
+            "\n\n".join(boot.format_timeline() for boot in bootstrap.instances()) or "(无)",
+            "",
+            f"== 模块导入耗时 (按累计耗时排序，前 {TOP_IMPORTS}) ==",
+            self.imports.format_top(),
+            "",
+            f"== cProfile 主线程 (按累计耗时排序，前 {TOP_FUNCTIONS}) ==",
+            stats_text.getvalue().strip(),
+            "",
+            "== 模块导入明细 (-X importtime 格式) ==",
+            self.imports.format_importtime(),
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(sections) + "\n")
+        return path
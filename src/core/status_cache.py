@@ -0,0 +1,173 @@
+"""共享状态缓存模块
+
+托盘与主界面会在同一秒内多次查询服务/进程状态。此处提供一个带 TTL 的
+中心缓存：并发调用者共享同一次正在进行的查询 (single-flight)，结果在 TTL
+内直接复用，切换操作完成后显式失效。
+
+查询可携带 Deadline：等待他人正在进行的查询时同样不超过截止时间，
+因此一次卡住的查询不会把其他调用者一起挂住。
+"""
+import threading
+import time
+
+from . import process, service, snapshot
+from .constants import ServiceStatus
+from .deadline import clamp
+from .service_state import ServiceState
+
+# 默认缓存有效期 (秒)
+DEFAULT_TTL = 1.0
+
+
+class _Flight:
+    """一次正在进行的查询"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class StatusCache:
+    """带 TTL 与 single-flight 合并的键值缓存"""
+
+    def __init__(self, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}      # key -> (value, loaded_at)
+        self._flights = {}      # key -> _Flight
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key, loader, deadline=None, max_age=None):
+        """获取缓存值，过期或不存在时调用 loader 加载
+
+        同一 key 的并发调用只会触发一次 loader，其余调用等待并共享结果。
+
+        Args:
+            max_age: 本次调用可接受的最大缓存年龄 (秒)，与 TTL 取较小者；
+                     需要更高时间分辨率的调用者 (如切换期间的监控) 用它收紧有效期
+
+        Raises:
+            TimeoutError: 等待他人正在进行的查询时到达 deadline
+        """
+        ttl = self.ttl if max_age is None else min(self.ttl, max_age)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._clock() - entry[1] < ttl:
+                self.hits += 1
+                return entry[0]
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                self.misses += 1
+                flight = self._flights[key] = _Flight()
+                generation = self._generation
+                leader = True
+
+        if not leader:
+            if not flight.done.wait(clamp(deadline, None)):
+                raise TimeoutError("等待正在进行的查询超时")
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+                # 查询期间发生过失效则不缓存 (结果可能早于切换操作)
+                if flight.error is None and generation == self._generation:
+                    self._entries[key] = (flight.value, self._clock())
+            flight.done.set()
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def invalidate(self, key=None):
+        """使缓存失效 (key 为 None 时清空全部)"""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """返回命中统计"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+            }
+
+
+# 托盘与主界面共享的缓存实例
+_cache = StatusCache()
+
+
+def get_status_cache():
+    """获取共享缓存实例"""
+    return _cache
+
+
+def set_ttl(ttl):
+    """设置共享缓存的有效期 (秒)"""
+    _cache.ttl = ttl
+
+
+def get_service_status(service_name, deadline=None):
+    """带缓存的服务状态查询"""
+    try:
+        return _cache.get(
+            ("service", service_name),
+            lambda: service.get_service_status(service_name, deadline),
+            deadline
+        )
+    except TimeoutError:
+        return ServiceStatus.TIMEOUT.value
+
+
+def is_proxifier_running(proxifier_exe_path):
+    """带缓存的进程状态查询"""
+    return _cache.get(
+        ("process", proxifier_exe_path),
+        lambda: process.is_proxifier_running(proxifier_exe_path)
+    )
+
+
+def get_snapshot(service_names, exe_names, deadline=None, max_age=None):
+    """带缓存的批量状态探测 (一次后端往返)
+
+    到达 deadline 时，未得到结果的服务状态为 ServiceStatus.TIMEOUT。
+    max_age 见 StatusCache.get。
+    """
+    service_names = tuple(service_names)
+    exe_names = tuple(exe_names)
+    try:
+        return _cache.get(
+            ("snapshot", service_names, exe_names),
+            lambda: snapshot.probe_status(service_names, exe_names, deadline),
+            deadline,
+            max_age
+        )
+    except TimeoutError:
+        return snapshot.StatusSnapshot(
+            services={name: ServiceState(name=name, status=ServiceStatus.TIMEOUT.value) for name in service_names},
+            taken_at=time.monotonic(),
+        )
+
+
+def invalidate():
+    """切换操作后调用，确保下一次查询拿到最新状态"""
+    _cache.invalidate()
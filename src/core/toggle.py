@@ -0,0 +1,267 @@
+"""切换流水线模块
+
+托盘与主界面共用的切换逻辑：根据驱动服务的实时状态决定方向，
+按固定步骤执行 (终止进程 → 停止驱动 / 启动驱动 → 启动进程)，
+只执行收敛到目标状态所必需的步骤，记录每一步耗时，
+后续步骤失败时回滚已完成的步骤，使驱动与进程保持一致。
+"""
+import time
+from dataclasses import dataclass, field
+
+from . import metrics, process, service, status_cache, trace
+from .constants import ServiceStatus
+from .deadline import Deadline, OperationCancelled, check as check_cancelled
+
+# 切换方向
+DIRECTION_ON = "on"
+DIRECTION_OFF = "off"
+
+# 步骤名称
+STEP_KILL_PROCESS = "kill_process"
+STEP_STOP_DRIVER = "stop_driver"
+STEP_START_DRIVER = "start_driver"
+STEP_LAUNCH_PROCESS = "launch_process"
+
+# 步骤失败时的说明
+STEP_ERRORS = {
+    STEP_KILL_PROCESS: "Proxifier 进程未能全部退出",
+    STEP_STOP_DRIVER: "驱动停止失败",
+    STEP_START_DRIVER: "驱动启动失败",
+    STEP_LAUNCH_PROCESS: "启动 Proxifier 失败",
+}
+
+# 步骤失败时需要回滚的已完成步骤：{失败步骤: (已完成步骤, 回滚步骤)}
+ROLLBACKS = {
+    # 驱动停不下：重新拉起进程，避免驱动开着却没有代理进程
+    STEP_STOP_DRIVER: (STEP_KILL_PROCESS, STEP_LAUNCH_PROCESS),
+    # 进程起不来：停止刚启动的驱动，恢复到切换前的状态
+    STEP_LAUNCH_PROCESS: (STEP_START_DRIVER, STEP_STOP_DRIVER),
+}
+
+PENDING_TARGETS = {
+    ServiceStatus.START_PENDING.value: ServiceStatus.RUNNING,
+    ServiceStatus.STOP_PENDING.value: ServiceStatus.STOPPED,
+}
+
+
+@dataclass
+class StepResult:
+    """单个步骤的执行结果"""
+    name: str
+    ok: bool
+    elapsed: float              # 耗时 (秒)
+    detail: object = None       # 步骤返回的详细结果 (LaunchResult / TerminateResult 等)
+    rollback: bool = False      # 是否为回滚步骤
+
+
+@dataclass
+class ToggleResult:
+    """一次切换的结果"""
+    initial_status: str                         # 切换前的驱动服务状态
+    direction: str = None                       # DIRECTION_ON / DIRECTION_OFF；无法切换时为 None
+    ok: bool = False
+    steps: list = field(default_factory=list)   # StepResult 列表 (含回滚步骤)
+    elapsed: float = 0.0                        # 总耗时 (秒)
+    error: str = None
+    cancelled: bool = False                     # 是否因目标状态变化或取消而提前结束
+    timed_out: bool = False                     # 是否因截止时间到达而未完成
+
+    def __bool__(self):
+        return self.ok
+
+    @property
+    def failed_step(self):
+        """第一个失败的正向步骤名称"""
+        for step in self.steps:
+            if not step.ok and not step.rollback:
+                return step.name
+        return None
+
+    @property
+    def rolled_back(self):
+        """是否执行过回滚"""
+        return any(step.rollback for step in self.steps)
+
+    @property
+    def outcome(self):
+        """结果分类：ok / cancelled / timeout / failed"""
+        if self.ok:
+            return "ok"
+        if self.cancelled:
+            return "cancelled"
+        if self.timed_out:
+            return "timeout"
+        return "failed"
+
+    def timings(self):
+        """各步骤耗时 {步骤名: 秒}，回滚步骤以 rollback: 为前缀"""
+        return {
+            (f"rollback:{step.name}" if step.rollback else step.name): step.elapsed
+            for step in self.steps
+        }
+
+
+class TogglePipeline:
+    """驱动服务与 Proxifier 进程的切换流水线"""
+
+    def __init__(self, service_name, proxifier_exe_path, monitor=None,
+                 grace_timeout=process.TERMINATE_GRACE_TIMEOUT):
+        """
+        Args:
+            service_name: 驱动服务名称
+            proxifier_exe_path: Proxifier 可执行文件路径
+            monitor: StatusMonitor，切换期间通知其快速轮询 (可选)
+            grace_timeout: 终止进程时等待正常退出的秒数，为 0 时直接强制结束
+        """
+        self.service_name = service_name
+        self.proxifier_exe_path = proxifier_exe_path
+        self.monitor = monitor
+        self.grace_timeout = grace_timeout
+
+    def decide(self, status):
+        """根据驱动服务状态决定切换方向，无法切换时返回 None"""
+        if status == ServiceStatus.RUNNING.value:
+            return DIRECTION_OFF
+        if status in (ServiceStatus.STOPPED.value, ServiceStatus.NOT_INSTALLED.value):
+            return DIRECTION_ON
+        return None
+
+    def run(self):
+        """根据驱动服务的实时状态执行一次切换
+
+        Returns:
+            ToggleResult: 切换结果 (可直接作为 bool 使用)
+        """
+        status = service.get_service_status(self.service_name)
+        direction = self.decide(status)
+        if direction is None:
+            return ToggleResult(initial_status=status, error=f"当前状态无法切换: {status}")
+        return self.converge(direction, status=status)
+
+    def plan(self, desired, status, process_running):
+        """计算收敛到目标状态所需的最少步骤"""
+        steps = []
+        if desired == DIRECTION_OFF:
+            if process_running:
+                steps.append(STEP_KILL_PROCESS)
+            if status not in (ServiceStatus.STOPPED.value, ServiceStatus.NOT_INSTALLED.value):
+                steps.append(STEP_STOP_DRIVER)
+        else:
+            if status != ServiceStatus.RUNNING.value:
+                steps.append(STEP_START_DRIVER)
+            if not process_running:
+                steps.append(STEP_LAUNCH_PROCESS)
+        return steps
+
+    @trace.traced("toggle.converge", "toggle")
+    def converge(self, desired, status=None, cancelled=None, deadline=None):
+        """将驱动与进程收敛到目标状态
+
+        Args:
+            desired: DIRECTION_ON / DIRECTION_OFF
+            status: 已知的驱动服务状态，为 None 时实时查询
+            cancelled: 无参函数，返回 True 时在下一步骤开始前停止；
+                       已开始的步骤总会完整执行，不会留下半途的 net start / net stop
+            deadline: Deadline (可选)，传给每个步骤；到期后不再开始新的步骤，
+                      其取消标记被触发时正在运行的命令也会被结束
+
+        Returns:
+            ToggleResult: 切换结果 (可直接作为 bool 使用)
+        """
+        if self.monitor:
+            self.monitor.notify_transition()
+        start = time.monotonic()
+        result = ToggleResult(initial_status=status, direction=desired)
+        try:
+            if status is None:
+                status = result.initial_status = service.get_service_status(self.service_name, deadline)
+            if status in PENDING_TARGETS:
+                # 上一次操作尚未完成：先等它落定，再决定还需要做什么
+                service.wait_for_state(self.service_name, PENDING_TARGETS[status], service.START_TIMEOUT, deadline)
+                status = service.get_service_status(self.service_name, deadline)
+            if status == ServiceStatus.TIMEOUT.value:
+                result.timed_out = True
+                result.error = "查询驱动状态超时"
+                return result
+            running = process.is_proxifier_running(self.proxifier_exe_path)
+            self._execute(result, self.plan(desired, status, running), cancelled, deadline)
+        except OperationCancelled as e:
+            result.ok = False
+            result.cancelled = True
+            result.error = str(e)
+        except Exception as e:
+            result.ok = False
+            result.error = str(e)
+            metrics.counter("toggler_errors_total", "被捕获并打印的错误数", {"source": "toggle"}).inc()
+            print(f"切换失败: {e}")
+        finally:
+            result.elapsed = time.monotonic() - start
+            metrics.histogram("toggler_toggle_seconds", "切换总耗时", {"direction": desired}).observe(result.elapsed)
+            metrics.counter("toggler_toggles_total", "切换次数 (按结果)", {"outcome": result.outcome}).inc()
+            # 状态已变化，丢弃缓存后立即刷新
+            status_cache.invalidate()
+            if self.monitor:
+                self.monitor.finish_transition()
+        return result
+
+    def _execute(self, result, steps, cancelled, deadline=None):
+        actions = {
+            STEP_KILL_PROCESS: self._kill_process,
+            STEP_STOP_DRIVER: self._stop_driver,
+            STEP_START_DRIVER: self._start_driver,
+            STEP_LAUNCH_PROCESS: self._launch_process,
+        }
+        done = []
+        for name in steps:
+            if cancelled is not None and cancelled():
+                result.cancelled = True
+                result.error = "已被新的切换请求取代"
+                return
+            check_cancelled(deadline)
+            if deadline is not None and deadline.expired:
+                result.timed_out = True
+                result.error = "操作超时"
+                return
+            if not self._step(result, name, actions[name], deadline):
+                result.error = STEP_ERRORS[name]
+                detail_error = getattr(result.steps[-1].detail, "error", None)
+                if deadline is not None and deadline.expired:
+                    result.timed_out = True
+                    detail_error = detail_error or "操作超时"
+                if detail_error:
+                    result.error += f": {detail_error}"
+                completed, rollback = ROLLBACKS.get(name, (None, None))
+                if completed in done:
+                    # 回滚不受已到期的截止时间限制，但仍可被取消
+                    rollback_deadline = None if deadline is None else Deadline(token=deadline.token)
+                    self._step(result, rollback, actions[rollback], rollback_deadline, rollback=True)
+                return
+            done.append(name)
+        result.ok = True
+
+    def _step(self, result, name, action, deadline=None, rollback=False):
+        """执行一个步骤并记录耗时，返回是否成功"""
+        step_start = time.monotonic()
+        with trace.span(f"toggle.{name}", "toggle", rollback=rollback):
+            detail = action(deadline)
+        step = StepResult(name, bool(detail), time.monotonic() - step_start, detail, rollback)
+        metrics.histogram("toggler_toggle_step_seconds", "切换各步骤耗时", {"step": name}).observe(step.elapsed)
+        result.steps.append(step)
+        return step.ok
+
+    def _kill_process(self, deadline=None):
+        return process.terminate_proxifier(self.proxifier_exe_path, self.grace_timeout, deadline=deadline)
+
+    def _stop_driver(self, deadline=None):
+        return service.stop_service(self.service_name, deadline=deadline)
+
+    def _start_driver(self, deadline=None):
+        return service.start_service(self.service_name, deadline=deadline)
+
+    def _launch_process(self, deadline=None):
+        return process.launch_proxifier(self.proxifier_exe_path, deadline=deadline)
+
+
+def toggle(service_name, proxifier_exe_path, monitor=None):
+    """执行一次切换 (TogglePipeline 的便捷入口)"""
+    return TogglePipeline(service_name, proxifier_exe_path, monitor).run()
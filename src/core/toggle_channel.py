@@ -0,0 +1,192 @@
+"""主控面板与托盘进程之间的切换通道
+
+纯托盘模式下主控面板运行在独立子进程中。面板不持有自己的切换协调器，
+而是把切换请求转交给托盘进程中唯一的 ToggleReconciler，保证两处发起的
+切换仍合并为同一个期望状态，不会在两个进程里交错执行 net start / net stop。
+
+通道复用面板子进程的标准输入输出，按行交换 JSON 消息 (与常驻探测进程相同)：
+
+    面板 → 托盘: {"op": "toggle"}
+    托盘 → 面板: {"event": "result", "idle": true, "result": {...ToggleResult 字段...}}
+
+面板进程中的 print 改写到标准错误，标准输出只用于通道。
+"""
+import json
+import os
+import sys
+import threading
+from dataclasses import asdict
+
+from . import status_cache, trace
+from .toggle import StepResult, ToggleResult
+
+# 由托盘进程设置：面板进程据此通过标准输入输出连接托盘中的协调器
+CHANNEL_ENV = "PROXIFIER_TOGGLER_PANEL_CHANNEL"
+
+
+def channel_enabled():
+    return bool(os.environ.get(CHANNEL_ENV))
+
+
+def _encode_result(result):
+    data = asdict(result)
+    # 步骤详情 (LaunchResult 等) 只在托盘进程内有意义
+    for step in data["steps"]:
+        step["detail"] = None
+    return data
+
+
+def _decode_result(data):
+    steps = [StepResult(**step) for step in data.pop("steps", [])]
+    return ToggleResult(steps=steps, **data)
+
+
+def _send(writer, lock, message):
+    """写入一行消息；对端已退出时返回 False"""
+    try:
+        with lock:
+            writer.write(json.dumps(message, ensure_ascii=False) + "\n")
+            writer.flush()
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+class PanelChannel:
+    """托盘进程端：把面板子进程的切换请求交给本进程的协调器，并回传结果"""
+
+    def __init__(self, panel, reconciler):
+        """
+        Args:
+            panel: 面板子进程 (subprocess.Popen，stdin / stdout 为文本管道)
+            reconciler: 托盘进程中的 ToggleReconciler
+        """
+        self.panel = panel
+        self.reconciler = reconciler
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._unsubscribe = reconciler.subscribe(self._on_result)
+        threading.Thread(target=self._read_loop, name="panel-channel", daemon=True).start()
+
+    def _read_loop(self):
+        try:
+            for line in self.panel.stdout:
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                if message.get("op") == "toggle":
+                    self.requests += 1
+                    trace.instant("panel.toggle", "toggle")
+                    self.reconciler.toggle()
+        except (OSError, ValueError):
+            pass
+        self.close()
+
+    def _on_result(self, result, idle):
+        message = {"event": "result", "idle": idle, "result": _encode_result(result)}
+        if not _send(self.panel.stdin, self._lock, message):
+            self.close()
+
+    def close(self):
+        """停止回传结果 (面板退出时调用，可重复调用)"""
+        self._unsubscribe()
+
+
+class RemoteReconciler:
+    """面板进程端：与 ToggleReconciler 接口一致，切换请求转交给托盘进程
+
+    请求只是写入一行消息，立即返回；结果由托盘进程回传后通知订阅者。
+    切换在托盘进程中执行，面板关闭不会打断进行中的切换。
+    """
+
+    def __init__(self, monitor=None, reader=None, writer=None):
+        """
+        Args:
+            monitor: 面板进程的 StatusMonitor，请求期间通知其快速轮询 (可选)
+            reader / writer: 通道两端，默认使用本进程的标准输入输出
+        """
+        if writer is None:
+            # 直接使用文件描述符：打包后的窗口程序中 sys.stdin / sys.stdout 可能为 None；
+            # 其余输出改写到标准错误，避免混入通道
+            writer = open(1, "w", encoding="utf-8", closefd=False)
+            sys.stdout = sys.stderr if sys.stderr is not None else open(os.devnull, "w")
+        if reader is None:
+            reader = open(0, "r", encoding="utf-8", closefd=False)
+        self.monitor = monitor
+        self._writer = writer
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._listeners = []
+        self._busy = False
+        self.connected = True
+        threading.Thread(target=self._read_loop, args=(reader,), name="panel-channel", daemon=True).start()
+
+    def subscribe(self, callback):
+        """订阅切换结果 (callback(result, idle)，在通道读取线程中调用)"""
+        with self._cond:
+            self._listeners.append(callback)
+
+        def unsubscribe():
+            with self._cond:
+                if callback in self._listeners:
+                    self._listeners.remove(callback)
+        return unsubscribe
+
+    def toggle(self):
+        """请求托盘进程切换 (方向由托盘进程中的协调器决定)"""
+        with self._cond:
+            self._busy = True
+        if not _send(self._writer, self._lock, {"op": "toggle"}):
+            print("切换请求发送失败: 托盘进程已退出")
+            self._finish()
+            return
+        if self.monitor:
+            self.monitor.notify_transition()
+
+    def is_busy(self):
+        with self._cond:
+            return self._busy
+
+    def wait_idle(self, timeout=None):
+        """切换在托盘进程中执行，面板退出无需等待"""
+        return True
+
+    def stop(self):
+        pass
+
+    def shutdown(self, timeout=None):
+        """切换在托盘进程中执行，面板退出无需等待"""
+        return True
+
+    def _finish(self):
+        with self._cond:
+            self._busy = False
+            self._cond.notify_all()
+
+    def _read_loop(self, reader):
+        try:
+            for line in reader:
+                try:
+                    message = json.loads(line)
+                    result = _decode_result(message["result"])
+                except (ValueError, KeyError, TypeError):
+                    continue
+                idle = message.get("idle", True)
+                if idle:
+                    # 状态已在托盘进程中改变：面板进程的缓存与快速轮询随之结束
+                    status_cache.invalidate()
+                    if self.monitor:
+                        self.monitor.finish_transition()
+                    self._finish()
+                with self._cond:
+                    listeners = list(self._listeners)
+                for callback in listeners:
+                    try:
+                        callback(result, idle)
+                    except Exception as e:
+                        print(f"切换结果订阅者处理失败: {e}")
+        except (OSError, ValueError):
+            pass
+        self.connected = False
+        self._finish()
@@ -0,0 +1,210 @@
+"""时间线追踪模块
+
+按需开启的嵌套 span 记录器，用于回答"一次切换 / 一次启动的时间花在哪里"：
+taskkill、net stop、等待服务落定，还是排队到 Tk 主线程。
+
+- 每个 span 记录名称、分类、起止时间与线程 ID，导出为 Chrome trace_event JSON，
+  可直接在 Perfetto (ui.perfetto.dev) 或 chrome://tracing 中打开
+- 事件保存在固定容量的环形缓冲区中，长期开启也只保留最近的记录
+- 未开启时 span() 返回共享的空上下文，几乎没有开销
+
+开启方式：python run.py --trace trace.json (退出时写入)，
+或在代码中调用 trace.enable()，之后用 trace.export(path) 导出。
+"""
+import collections
+import functools
+import json
+import os
+import threading
+import time
+
+# 环形缓冲区默认容量 (事件数)
+DEFAULT_CAPACITY = 50000
+
+# 指定导出路径即开启追踪的环境变量 (由 run.py --trace 设置)
+TRACE_ENV = "PROXIFIER_TOGGLER_TRACE"
+
+
+def _now_us():
+    return time.perf_counter() * 1_000_000
+
+
+class _NullSpan:
+    """追踪关闭时使用的空上下文"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def annotate(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """一个正在进行的 span，结束时写入一条完整事件 (ph = "X")"""
+
+    def __init__(self, tracer, name, category, args):
+        self._tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self._start = None
+
+    def __enter__(self):
+        self._start = _now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = f"{exc_type.__name__}: {exc}"
+        self._tracer._complete(self.name, self.category, self._start, _now_us() - self._start, self.args)
+        return False
+
+    def annotate(self, **args):
+        """在 span 结束前补充参数 (如结果、返回码)"""
+        self.args.update(args)
+
+
+class Tracer:
+    """span 记录器 (线程安全，环形缓冲区)"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.enabled = False
+        self._events = collections.deque(maxlen=capacity)
+        self._threads = {}      # 线程 ID -> 线程名
+        self._lock = threading.Lock()
+        self.pid = os.getpid()
+
+    def enable(self, capacity=None):
+        """开启追踪 (可同时调整缓冲区容量，已有事件保留)"""
+        with self._lock:
+            if capacity is not None and capacity != self._events.maxlen:
+                self._events = collections.deque(self._events, maxlen=capacity)
+            self.enabled = True
+
+    def disable(self):
+        """关闭追踪 (已记录的事件保留，仍可导出)"""
+        self.enabled = False
+
+    def clear(self):
+        """清空已记录的事件"""
+        with self._lock:
+            self._events.clear()
+
+    def span(self, name, category="core", **args):
+        """记录一个 span：with tracer.span("toggle.converge", desired="on"): ..."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, args)
+
+    def instant(self, name, category="core", **args):
+        """记录一个瞬时事件 (ph = "i")"""
+        if not self.enabled:
+            return
+        self._append({"name": name, "cat": category, "ph": "i", "s": "t", "ts": _now_us(), "args": args})
+
+    def _complete(self, name, category, start, duration, args):
+        self._append({"name": name, "cat": category, "ph": "X", "ts": start, "dur": duration, "args": args})
+
+    def _append(self, event):
+        thread = threading.current_thread()
+        tid = threading.get_native_id()
+        event["pid"] = self.pid
+        event["tid"] = tid
+        with self._lock:
+            self._threads[tid] = thread.name
+            self._events.append(event)
+
+    def events(self):
+        """当前缓冲区中的事件 (按记录顺序)"""
+        with self._lock:
+            return list(self._events)
+
+    def to_dict(self):
+        """Chrome trace_event 格式 {"traceEvents": [...]}"""
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": "Proxifier Toggler"}}
+        ]
+        metadata += [
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        return {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+
+    def export(self, path):
+        """写入 Chrome trace_event JSON 文件"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        return path
+
+
+_tracer = Tracer()
+
+
+def get_tracer():
+    """获取共享的追踪器"""
+    return _tracer
+
+
+def enable(capacity=None):
+    """开启共享追踪器"""
+    _tracer.enable(capacity)
+
+
+def disable():
+    """关闭共享追踪器"""
+    _tracer.disable()
+
+
+def is_enabled():
+    return _tracer.enabled
+
+
+def span(name, category="core", **args):
+    """共享追踪器上的 span (见 Tracer.span)"""
+    if not _tracer.enabled:
+        return _NULL_SPAN
+    return _Span(_tracer, name, category, args)
+
+
+def instant(name, category="core", **args):
+    """共享追踪器上的瞬时事件"""
+    _tracer.instant(name, category, **args)
+
+
+def traced(name, category="core"):
+    """装饰器：整个函数调用记录为一个 span"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _tracer.enabled:
+                return func(*args, **kwargs)
+            with _Span(_tracer, name, category, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def export(path):
+    """导出共享追踪器的事件"""
+    return _tracer.export(path)
+
+
+def enable_from_env():
+    """环境变量 PROXIFIER_TOGGLER_TRACE 指定了导出路径时开启追踪
+
+    Returns:
+        str: 导出路径；未开启时为 None
+    """
+    path = os.environ.get(TRACE_ENV)
+    if path:
+        _tracer.enable()
+    return path or None
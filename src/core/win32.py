@@ -0,0 +1,209 @@
+"""Win32 原生查询模块 (ctypes)
+
+直接调用 SCM、ToolHelp 与进程 API 获取服务状态、进程列表和进程路径，
+无需为每次查询创建 sc / tasklist 子进程。仅在 Windows 上可用。
+"""
+import ctypes
+import sys
+from ctypes import wintypes
+from functools import lru_cache
+
+from .constants import ServiceStatus
+from .service_state import ServiceState, status_from_code
+
+SC_MANAGER_CONNECT = 0x0001
+SERVICE_QUERY_STATUS = 0x0004
+SC_STATUS_PROCESS_INFO = 0
+ERROR_SERVICE_DOES_NOT_EXIST = 1060
+
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+STILL_ACTIVE = 259
+
+TH32CS_SNAPPROCESS = 0x00000002
+INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+MAX_PATH = 260
+
+
+class SERVICE_STATUS_PROCESS(ctypes.Structure):
+    _fields_ = [
+        ("dwServiceType", wintypes.DWORD),
+        ("dwCurrentState", wintypes.DWORD),
+        ("dwControlsAccepted", wintypes.DWORD),
+        ("dwWin32ExitCode", wintypes.DWORD),
+        ("dwServiceSpecificExitCode", wintypes.DWORD),
+        ("dwCheckPoint", wintypes.DWORD),
+        ("dwWaitHint", wintypes.DWORD),
+        ("dwProcessId", wintypes.DWORD),
+        ("dwServiceFlags", wintypes.DWORD),
+    ]
+
+
+class PROCESSENTRY32W(ctypes.Structure):
+    _fields_ = [
+        ("dwSize", wintypes.DWORD),
+        ("cntUsage", wintypes.DWORD),
+        ("th32ProcessID", wintypes.DWORD),
+        ("th32DefaultHeapID", ctypes.c_void_p),
+        ("th32ModuleID", wintypes.DWORD),
+        ("cntThreads", wintypes.DWORD),
+        ("th32ParentProcessID", wintypes.DWORD),
+        ("pcPriClassBase", ctypes.c_long),
+        ("dwFlags", wintypes.DWORD),
+        ("szExeFile", wintypes.WCHAR * MAX_PATH),
+    ]
+
+
+def is_available():
+    """当前平台是否支持原生查询"""
+    return sys.platform == 'win32'
+
+
+@lru_cache(maxsize=None)
+def _advapi32():
+    advapi32 = ctypes.WinDLL("advapi32", use_last_error=True)
+    advapi32.OpenSCManagerW.argtypes = [wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.DWORD]
+    advapi32.OpenSCManagerW.restype = wintypes.HANDLE
+    advapi32.OpenServiceW.argtypes = [wintypes.HANDLE, wintypes.LPCWSTR, wintypes.DWORD]
+    advapi32.OpenServiceW.restype = wintypes.HANDLE
+    advapi32.QueryServiceStatusEx.argtypes = [
+        wintypes.HANDLE, ctypes.c_int, ctypes.c_void_p, wintypes.DWORD, ctypes.POINTER(wintypes.DWORD)
+    ]
+    advapi32.QueryServiceStatusEx.restype = wintypes.BOOL
+    advapi32.CloseServiceHandle.argtypes = [wintypes.HANDLE]
+    advapi32.CloseServiceHandle.restype = wintypes.BOOL
+    return advapi32
+
+
+@lru_cache(maxsize=None)
+def _kernel32():
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.CreateToolhelp32Snapshot.argtypes = [wintypes.DWORD, wintypes.DWORD]
+    kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+    kernel32.Process32FirstW.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESSENTRY32W)]
+    kernel32.Process32FirstW.restype = wintypes.BOOL
+    kernel32.Process32NextW.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESSENTRY32W)]
+    kernel32.Process32NextW.restype = wintypes.BOOL
+    kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+    kernel32.CloseHandle.restype = wintypes.BOOL
+    kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.QueryFullProcessImageNameW.argtypes = [
+        wintypes.HANDLE, wintypes.DWORD, wintypes.LPWSTR, ctypes.POINTER(wintypes.DWORD)
+    ]
+    kernel32.QueryFullProcessImageNameW.restype = wintypes.BOOL
+    kernel32.GetExitCodeProcess.argtypes = [wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD)]
+    kernel32.GetExitCodeProcess.restype = wintypes.BOOL
+    kernel32.GetProcessTimes.argtypes = [wintypes.HANDLE] + [ctypes.POINTER(wintypes.FILETIME)] * 4
+    kernel32.GetProcessTimes.restype = wintypes.BOOL
+    return kernel32
+
+
+class ServiceControlManager:
+    """持有 SCM 连接句柄，重复查询时无需重新连接"""
+
+    def __init__(self):
+        self._advapi32 = _advapi32()
+        self._handle = self._advapi32.OpenSCManagerW(None, None, SC_MANAGER_CONNECT)
+        if not self._handle:
+            raise ctypes.WinError(ctypes.get_last_error())
+
+    def query(self, service_name):
+        """查询服务状态，返回 ServiceState"""
+        service = self._advapi32.OpenServiceW(self._handle, service_name, SERVICE_QUERY_STATUS)
+        if not service:
+            error = ctypes.get_last_error()
+            if error == ERROR_SERVICE_DOES_NOT_EXIST:
+                return ServiceState(name=service_name, status=ServiceStatus.NOT_INSTALLED.value)
+            raise ctypes.WinError(error)
+        try:
+            status = SERVICE_STATUS_PROCESS()
+            needed = wintypes.DWORD(0)
+            ok = self._advapi32.QueryServiceStatusEx(
+                service, SC_STATUS_PROCESS_INFO, ctypes.byref(status),
+                ctypes.sizeof(status), ctypes.byref(needed)
+            )
+            if not ok:
+                raise ctypes.WinError(ctypes.get_last_error())
+            return ServiceState(
+                name=service_name,
+                status=status_from_code(status.dwCurrentState),
+                state_code=status.dwCurrentState,
+                pid=status.dwProcessId,
+                win32_exit_code=status.dwWin32ExitCode,
+                service_exit_code=status.dwServiceSpecificExitCode,
+                checkpoint=status.dwCheckPoint,
+                wait_hint=status.dwWaitHint,
+            )
+        finally:
+            self._advapi32.CloseServiceHandle(service)
+
+    def close(self):
+        if self._handle:
+            self._advapi32.CloseServiceHandle(self._handle)
+            self._handle = None
+
+
+def list_processes():
+    """枚举当前进程
+
+    Returns:
+        list[tuple[int, str]]: (PID, 映像名) 列表
+    """
+    kernel32 = _kernel32()
+    snapshot = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
+    if snapshot == INVALID_HANDLE_VALUE:
+        raise ctypes.WinError(ctypes.get_last_error())
+    try:
+        entry = PROCESSENTRY32W()
+        entry.dwSize = ctypes.sizeof(PROCESSENTRY32W)
+        processes = []
+        ok = kernel32.Process32FirstW(snapshot, ctypes.byref(entry))
+        while ok:
+            processes.append((entry.th32ProcessID, entry.szExeFile))
+            ok = kernel32.Process32NextW(snapshot, ctypes.byref(entry))
+        return processes
+    finally:
+        kernel32.CloseHandle(snapshot)
+
+
+def query_process_path(pid):
+    """获取进程的完整映像路径，无权限或进程已退出时返回 None"""
+    kernel32 = _kernel32()
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return None
+    try:
+        size = wintypes.DWORD(1024)
+        buffer = ctypes.create_unicode_buffer(size.value)
+        if not kernel32.QueryFullProcessImageNameW(handle, 0, buffer, ctypes.byref(size)):
+            return None
+        return buffer.value
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def query_process(pid):
+    """按 PID 查询单个进程 (无需枚举整张进程表)
+
+    Returns:
+        tuple | None: (完整路径或 None, 创建时间)；进程不存在或已退出时返回 None
+    """
+    kernel32 = _kernel32()
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return None
+    try:
+        exit_code = wintypes.DWORD(0)
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)) or exit_code.value != STILL_ACTIVE:
+            return None
+        creation, exit_time, kernel, user = (wintypes.FILETIME() for _ in range(4))
+        if not kernel32.GetProcessTimes(handle, ctypes.byref(creation), ctypes.byref(exit_time),
+                                        ctypes.byref(kernel), ctypes.byref(user)):
+            return None
+        create_time = (creation.dwHighDateTime << 32) | creation.dwLowDateTime
+        size = wintypes.DWORD(1024)
+        buffer = ctypes.create_unicode_buffer(size.value)
+        path = buffer.value if kernel32.QueryFullProcessImageNameW(handle, 0, buffer, ctypes.byref(size)) else None
+        return path, create_time
+    finally:
+        kernel32.CloseHandle(handle)
@@ -1,74 +1,240 @@
 """主应用程序类
 封装主循环、根窗口管理以及托盘图标交互
+
+启动时只创建状态监控、切换协调器与托盘图标，托盘可以立即出现；
+CustomTkinter、PIL.ImageTk 与主控面板的整套控件在首次打开主界面时
+才导入并在主线程中构建 (默认最小化启动时，启动阶段完全不需要它们)。
+
+启动与界面构建都按依赖图 (core.bootstrap) 执行：首次状态探测、托盘图标
+与根窗口图标的解码在后台线程中进行，与主线程的 Tk 初始化并行。
 """
-import sys
-import os
-import customtkinter as ctk
-from PIL import Image, ImageTk
+import queue
+import threading
 
 from ..config import manager as config_manager
-from ..gui.settings import SettingsWindow
+from ..core import toggle_channel, trace
+from ..core.bootstrap import Bootstrap, main_thread_idle
+from ..core.last_status import LastStatusStore
+from ..core.monitor import StatusMonitor
+from ..core.reconciler import ToggleReconciler
 from ..gui.tray_icon import setup_tray_async
-from ..gui.ctk_styles import DEFAULT_APPEARANCE_MODE, DEFAULT_COLOR_THEME
 from ..gui.common.dpi_fix import enable_dpi_awareness
 from ..utils.win_utils import setup_app_id
 
+# 主线程待处理的界面请求
+UI_SHOW = "show"
+UI_QUIT = "quit"
+
+# 独立面板进程关闭后，等待进行中的切换完成的最长时间 (秒)
+PANEL_EXIT_TIMEOUT = 30.0
+
+
+def _import_ui():
+    """导入界面栈 (CustomTkinter、主题配置与主控面板)"""
+    import customtkinter as ctk
+    from ..gui.ctk_styles import DEFAULT_APPEARANCE_MODE, DEFAULT_COLOR_THEME
+    from ..gui.settings import SettingsWindow
+    return ctk, DEFAULT_APPEARANCE_MODE, DEFAULT_COLOR_THEME, SettingsWindow
+
+
+def _load_root_icon_image():
+    """解码高分辨率图标并缩放到 256x256 (不涉及 Tk，可在后台线程执行)"""
+    try:
+        from PIL import Image
+
+        icon_path_png = config_manager.ASSETS_DIR / "icon.png"
+        if not icon_path_png.exists():
+            return None
+        img = Image.open(icon_path_png)
+        # 保持比例调整到 256x256
+        return img.resize((256, 256), Image.Resampling.LANCZOS)
+    except Exception as e:
+        print(f"加载主程序图标失败: {e}")
+        return None
+
+
 class ProxifierApp:
-    def __init__(self):
-        """初始化应用状态和主窗口"""
-        # 1. 基础系统环境配置
-        enable_dpi_awareness()
-        setup_app_id()
-        
-        # 2. CTk 全局主题配置
-        ctk.set_appearance_mode(DEFAULT_APPEARANCE_MODE)
-        ctk.set_default_color_theme(DEFAULT_COLOR_THEME)
-        
-        # 3. 创建隐藏的根窗口（用于承载主循环和托盘联动）
-        self.root = ctk.CTk()
-        self.root.withdraw()
-        
-        # 4. 配置根窗口图标
-        self._setup_root_icons()
-        
-        # 5. 初始化设置窗口管理器 (持久化)
-        self.settings_window = SettingsWindow(self.root)
-        
-    def _setup_root_icons(self):
-        """为根窗口设置图标，确保任务栏和 Alt-Tab 渲染质量"""
+    @trace.traced("app.init", "startup")
+    def __init__(self, reconciler_factory=None):
+        """初始化应用状态 (不创建任何窗口)
+
+        Args:
+            reconciler_factory: reconciler_factory(targets, monitor) 创建切换协调器，
+                                默认为 ToggleReconciler
+        """
+        self._reconciler_factory = reconciler_factory or ToggleReconciler
+        self.monitor = None
+        self.reconciler = None
+        # 根窗口与主控面板在首次打开主界面时构建
+        self.root = None
+        self.settings_window = None
+        self.ui_bootstrap = None
+        # 根窗口建好之前的界面请求先排队；_ui_lock 保证"读取 root / 入队"与
+        # "设置 root / 取出队列"互斥，请求不会落在两者之间而丢失
+        self._requests = queue.Queue()
+        self._ui_lock = threading.Lock()
+
+        # 启动步骤按依赖图执行，各步骤耗时见 self.bootstrap.format_timeline()
+        self.bootstrap = Bootstrap("startup")
+        # 1. 基础系统环境配置 (须在创建任何窗口之前)
+        self.bootstrap.add("dpi", enable_dpi_awareness)
+        self.bootstrap.add("app_id", setup_app_id)
+        # 2. 应用级状态监控与切换协调器 (托盘与主界面共享)
+        self.bootstrap.add("monitor", self._create_monitor)
+        self.bootstrap.run()
+
+    def _create_monitor(self):
+        targets = lambda: (config_manager.get_service_name(), config_manager.get_proxifier_exe_path())
+        # 载入上次已知状态，托盘与状态面板无需等待第一次探测
+        self.monitor = StatusMonitor(targets, store=LastStatusStore(config_manager.get_last_status_file()))
+        # 切换请求统一交给期望状态协调器
+        self.reconciler = self._reconciler_factory(targets, self.monitor)
+
+    def _start_status_probe(self):
+        """在后台执行首次状态探测，随后开始定期监控 (与托盘、Tk 初始化并行)"""
+        def probe():
+            self.monitor.poll_once()
+            self.monitor.start()
+        self.bootstrap.add("status_probe", probe, after=("monitor",), background=True)
+
+    def show_ui(self):
+        """打开主控面板 (任意线程可调用)"""
+        self._post(UI_SHOW)
+
+    def quit(self):
+        """退出主循环 (任意线程可调用)"""
+        self._post(UI_QUIT)
+
+    def _post(self, request):
+        """根窗口已建好时直接交给主循环，否则排队等待构建完成后处理"""
+        with self._ui_lock:
+            if self.root is None:
+                self._requests.put(request)
+                return
+            self._dispatch(request)
+
+    def _dispatch(self, request):
+        if request == UI_QUIT:
+            self.root.after(0, self.root.quit)
+        else:
+            self.root.after(0, self.settings_window.show)
+
+    @trace.traced("app.build_ui", "startup")
+    def _build_ui(self):
+        """导入并构建 CustomTkinter 界面栈 (主线程，首次打开主界面时调用)
+
+        根窗口图标的解码与缩放在后台线程中进行，与 CustomTkinter 导入、根窗口创建并行。
+        """
+        ui = Bootstrap("ui", origin=self.bootstrap.origin)
+        ui.add("import_ui", _import_ui)
+        ui.add("root_icon_image", _load_root_icon_image, background=True)
+
+        # 1. CTk 全局主题配置
+        def apply_theme():
+            ctk, appearance_mode, color_theme, _ = ui.result("import_ui")
+            ctk.set_appearance_mode(appearance_mode)
+            ctk.set_default_color_theme(color_theme)
+        ui.add("theme", apply_theme, after=("import_ui",))
+
+        # 2. 创建隐藏的根窗口（用于承载主循环）
+        def create_root():
+            root = ui.result("import_ui")[0].CTk()
+            root.withdraw()
+            return root
+        ui.add("root", create_root, after=("theme",))
+
+        # 3. 配置根窗口图标 (图标解码失败不影响后续步骤)
+        ui.add("root_icons", lambda: self._setup_root_icons(ui.result("root"), ui.result("root_icon_image")),
+               after=("root", "root_icon_image"))
+
+        # 4. 初始化设置窗口管理器 (持久化)
+        def create_settings_window():
+            settings_window_class = ui.result("import_ui")[3]
+            return settings_window_class(ui.result("root"), self.monitor, self.reconciler)
+        ui.add("settings_window", create_settings_window, after=("root",))
+
+        self.ui_bootstrap = ui
+        ui.run()
+        ui.report_when_done()
+        with self._ui_lock:
+            self.settings_window = ui.result("settings_window")
+            self.root = ui.result("root")
+            # 构建期间到达的请求
+            while not self._requests.empty():
+                self._dispatch(self._requests.get_nowait())
+
+    def _setup_root_icons(self, root, image=None):
+        """为根窗口设置图标，确保任务栏和 Alt-Tab 渲染质量
+
+        Args:
+            image: 已缩放的高分辨率图标 (PIL Image)，None 时只设置 iconbitmap
+        """
         try:
             icon_path_ico = config_manager.ASSETS_DIR / "icon.ico"
-            icon_path_png = config_manager.ASSETS_DIR / "icon.png"
-            
+
             # 设置标准 iconbitmap
             if icon_path_ico.exists():
-                self.root.iconbitmap(str(icon_path_ico))
-                
-            # 设置高分辨率 wm_iconphoto
-            if icon_path_png.exists():
-                img = Image.open(icon_path_png)
-                # 保持比例调整到 256x256
-                img = img.resize((256, 256), Image.Resampling.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
-                self.root.wm_iconphoto(True, photo)
+                root.iconbitmap(str(icon_path_ico))
+
+            # 设置高分辨率 wm_iconphoto (PhotoImage 须在主线程创建)
+            if image is not None:
+                from PIL import ImageTk
+                photo = ImageTk.PhotoImage(image)
+                root.wm_iconphoto(True, photo)
                 # 必须保持引用，防止垃圾回收
-                self.root._icon_photo = photo
+                root._icon_photo = photo
         except Exception as e:
             print(f"设置主程序图标失败: {e}")
 
     def run(self):
         """启动应用"""
-        # 1. 异步启动托盘图标
-        setup_tray_async(self.settings_window)
-        
+        # 1. 托盘图标与首次状态探测在后台并行开始
+        self._start_status_probe()
+        self.bootstrap.add("tray", lambda: setup_tray_async(self, self.monitor, self.reconciler),
+                           after=("monitor",), background=True)
+        self.bootstrap.run()
+        self.bootstrap.report_when_done()
+
         # 2. 根据配置决定是否初始打开界面
-        start_minimized = config_manager.get_start_minimized()
-        if not start_minimized:
-            # 使用 after 确保其在主循环启动后立即执行
-            self.root.after(100, self.settings_window.show)
-            
-        # 3. 进入主循环
+        if not config_manager.get_start_minimized():
+            self.show_ui()
+
         try:
+            # 3. 等待首次打开主界面 (或退出)，此前不导入 CustomTkinter
+            main_thread_idle()
+            if self._requests.get() == UI_QUIT:
+                return
+            self._build_ui()
+            self.root.after(0, self.settings_window.show)
+
+            # 4. 进入主循环
+            main_thread_idle()
             self.root.mainloop()
         except KeyboardInterrupt:
             pass
+
+
+def run_panel():
+    """独立主控面板进程 (run.py --panel，由纯托盘模式按需启动)
+
+    直接构建并打开主控面板，关闭面板即退出进程。
+    由托盘进程启动时，切换请求经管道交给托盘进程中唯一的协调器执行
+    (见 core.toggle_channel)，两处发起的切换不会各自执行；
+    单独运行时使用本进程的协调器，进行中的切换会先完成，避免驱动停在半途。
+    """
+    reconciler_factory = None
+    if toggle_channel.channel_enabled():
+        reconciler_factory = lambda targets, monitor: toggle_channel.RemoteReconciler(monitor)
+    app = ProxifierApp(reconciler_factory)
+    app._start_status_probe()
+    app.bootstrap.run()
+    app._build_ui()
+    app.settings_window.on_close = app.quit
+    app.root.after(0, app.settings_window.show)
+    try:
+        app.root.mainloop()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        app.monitor.stop()
+        app.reconciler.shutdown(PANEL_EXIT_TIMEOUT)
@@ -1,16 +1,15 @@
 """主控面板 - CustomTkinter 现代化版本"""
 import customtkinter as ctk
 from tkinter import messagebox
-import webbrowser
 from ..config import manager as config_manager
-from ..utils import startup
+from ..core.monitor import StatusMonitor
+from ..core.reconciler import ToggleReconciler
 from .widgets.status_frame import StatusFrame
 from .widgets.config_frame import ConfigFrame
 from .widgets.startup_frame import StartupFrame
 from .widgets.footer_frame import FooterFrame
 from .widgets.header_frame import HeaderFrame
 from .widgets.action_frame import ActionFrame
-from .widgets.about_dialog import AboutDialog
 from .common.styled_window import StyledWindow
 from .ctk_styles import ButtonStyles, Fonts, Sizes, Colors, toggle_appearance_mode, StyledButton
 
@@ -24,15 +23,22 @@ class SettingsWindow:
             cls._instance = super(SettingsWindow, cls).__new__(cls)
         return cls._instance
     
-    def __init__(self, root=None):
+    def __init__(self, root=None, monitor=None, reconciler=None):
         # 确保只初始化一次
         if not hasattr(self, 'initialized'):
             self.root = root  # 外部传入的持久化 root
+            # 应用级状态监控与切换协调器；独立运行面板时自行创建
+            targets = lambda: (config_manager.get_service_name(), config_manager.get_proxifier_exe_path())
+            self.monitor = monitor or StatusMonitor(targets)
+            self.reconciler = reconciler or ToggleReconciler(
+                targets, self.monitor, grace_timeout=config_manager.get_terminate_grace_timeout
+            )
             self.window = None
             self.status_panel = None
             self.config_panel = None
             self.startup_panel = None
             self.initial_config = None
+            self.on_close = None    # 面板关闭后的回调 (独立面板进程用它退出主循环)
             self.initialized = True
     
     def show(self):
@@ -44,6 +50,7 @@ class SettingsWindow:
                     self.window.deiconify()
                     self.window.lift()
                     self.window.focus_force()
+                    self.monitor.set_ui_active(True)
                     return
             except:
                 self.window = None
@@ -68,6 +75,12 @@ class SettingsWindow:
         
         # 拦截关闭事件
         self.window.protocol("WM_DELETE_WINDOW", self._on_close)
+        
+        # 主界面可见期间提高监控频率，获得焦点时进一步提高
+        self.window.bind("<FocusIn>", lambda e: self.monitor.set_ui_focused(True), add="+")
+        self.window.bind("<FocusOut>", lambda e: self.monitor.set_ui_focused(False), add="+")
+        self.monitor.set_ui_active(True)
+        self.monitor.start()
 
     # 原本的 _set_window_icon 和 _center_window 已由 StyledWindow 基类处理
     
@@ -95,7 +108,7 @@ class SettingsWindow:
         
         # 内部卡片
         card_pad_x = 5
-        self.status_panel = StatusFrame(scroll_container, self.initial_config)
+        self.status_panel = StatusFrame(scroll_container, self.initial_config, self.monitor, self.reconciler)
         self.status_panel.pack(fill="x", padx=card_pad_x, pady=Sizes.PADDING_TINY)
         
         self.config_panel = ConfigFrame(scroll_container, self.initial_config)
@@ -133,6 +146,7 @@ class SettingsWindow:
     def _handle_about(self):
         """显示关于弹窗"""
         from .. import __version__, __author__, __github_url__
+        from .widgets.about_dialog import AboutDialog
         AboutDialog(self.window, __version__, __author__, __github_url__)
     
     def _handle_save(self):
@@ -141,6 +155,8 @@ class SettingsWindow:
         success = config_manager.update_config(**new_data)
         
         if success:
+            # 注册表操作只在保存时用到，按需导入 (winreg 仅 Windows 可用)
+            from ..utils import startup
             if new_data["auto_start"]:
                 startup.enable_auto_start()
             else:
@@ -176,6 +192,9 @@ class SettingsWindow:
             pass
         finally:
             self.window = None
+            self.monitor.set_ui_active(False)
+            if self.on_close:
+                self.on_close()
 
 
 def open_settings(root=None):
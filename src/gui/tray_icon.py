@@ -2,17 +2,29 @@
 import threading
 import pystray
 from PIL import Image
-from ..core import service, process
+from ..core import aio, bootstrap, metrics, status_cache, toggle, trace
+from ..core.reconciler import ToggleReconciler
 from ..config import manager as config_manager
-from ..utils import startup
 from ..core.constants import ServiceStatus, UIStrings
 from .. import __version__
 
 class TrayIcon:
     """托盘图标管理类"""
     
-    def __init__(self, settings_window=None):
-        self.settings_window = settings_window
+    def __init__(self, app=None, monitor=None, reconciler=None):
+        """
+        Args:
+            app: 提供 show_ui() / quit() 的应用对象 (ProxifierApp)，主界面按需构建
+            monitor: 应用级 StatusMonitor (可选)
+            reconciler: 切换协调器，默认自行创建
+        """
+        self.app = app
+        self.monitor = monitor
+        self.reconciler = reconciler or ToggleReconciler(
+            lambda: (config_manager.get_service_name(), config_manager.get_proxifier_exe_path()),
+            monitor,
+            grace_timeout=config_manager.get_terminate_grace_timeout
+        )
         self.icon = None
         self.images = {
             "active": None,
@@ -39,11 +51,17 @@ class TrayIcon:
         print(f"警告: 找不到图标文件 {icon_path}，请检查 assets 目录。")
         return Image.new('RGBA', (64, 64), (0, 0, 0, 0))
 
-    def update_state(self, service_status=None):
+    def preload_images(self):
+        """预先解码两种状态的图标 (可在托盘线程启动前于后台线程调用)"""
+        self._create_image(active=True)
+        self._create_image(active=False)
+
+    def update_state(self, service_status=None, stale=False):
         """同步实际服务状态到托盘图标
         
         Args:
             service_status: 可选的服务状态，如果提供则直接使用，避免重复查询
+            stale: 状态是否为尚未确认的上次记录 (在提示文字中标明)
         """
         if not self.icon:
             return
@@ -51,65 +69,139 @@ class TrayIcon:
         # 如果没有提供状态，才查询系统
         if service_status is None:
             service_name = config_manager.get_service_name()
-            service_status = service.get_service_status(service_name)
+            service_status = status_cache.get_service_status(service_name)
+        
+        # 查询超时：保持当前图标，在提示文字中标明状态未能确认
+        title = UIStrings.get_app_title_with_version()
+        if service_status == ServiceStatus.TIMEOUT.value:
+            title += f" ({UIStrings.get_status(ServiceStatus.TIMEOUT)})"
+        elif stale:
+            title += f" ({UIStrings.STATUS_STALE})"
+        if self.icon.title != title:
+            self.icon.title = title
+        
+        # 启停过渡期间与查询超时时保持当前图标，避免闪烁
+        if service_status in (ServiceStatus.START_PENDING.value, ServiceStatus.STOP_PENDING.value,
+                              ServiceStatus.TIMEOUT.value):
+            return
         
         is_active = (service_status == "RUNNING")
         
         new_image = self._create_image(active=is_active)
-        if self.icon.icon != new_image:
+        # 图标已缓存，按对象比较即可 (Image 的 != 会逐像素比较)
+        if self.icon.icon is not new_image:
             self.icon.icon = new_image
 
+    def notify(self, message):
+        """弹出托盘通知 (托盘尚未就绪时忽略)"""
+        if self.icon:
+            self.icon.notify(message, UIStrings.get_app_title_with_version())
+
+    def _notify_interaction(self, action):
+        """用户操作托盘：记录操作次数，并让监控恢复快速轮询"""
+        metrics.counter("toggler_tray_actions_total", "托盘菜单操作次数", {"action": action}).inc()
+        if self.monitor:
+            self.monitor.notify_interaction()
+
+    def _on_status(self, service_status, process_running):
+        """监控线程回调：状态变化时同步图标"""
+        with metrics.histogram("toggler_tray_update_seconds", "托盘图标同步耗时").time():
+            self.update_state(service_status, stale=self.monitor.stale)
+
     def toggle_proxifier(self, icon, item):
-        """切换 Proxifier 状态"""
-        service_name = config_manager.get_service_name()
-        proxifier_exe_path = config_manager.get_proxifier_exe_path()
-        current_status = service.get_service_status(service_name)
-        
-        app_title = UIStrings.get_app_title_with_version()
-        
-        if current_status == "RUNNING":
-            process.kill_proxifier(proxifier_exe_path)
-            if service.stop_service(service_name):
-                icon.notify("Proxifier " + UIStrings.STATUS_MAP[ServiceStatus.STOPPED], app_title)
-            else:
-                icon.notify(UIStrings.NOTIFY_ERROR, app_title)
-        elif current_status in [ServiceStatus.STOPPED.value, ServiceStatus.NOT_INSTALLED.value]:
-            if service.start_service(service_name):
-                if process.start_proxifier(proxifier_exe_path):
-                    icon.notify("Proxifier " + UIStrings.STATUS_MAP[ServiceStatus.RUNNING], app_title)
-                else:
-                    icon.notify("启动 Proxifier 失败！", app_title)
-            else:
-                icon.notify("驱动启动失败！", app_title)
-        else:
-            icon.notify(f"Proxifier 状态未知 ({current_status})", app_title)
-        
-        self.update_state()
+        """切换 Proxifier 状态 (只提交期望状态，结果由 _on_toggle_result 通知)"""
+        trace.instant("tray.toggle", "toggle")
+        self._notify_interaction("toggle")
+        # 决定方向时可能需要实时查询一次状态，不占用托盘消息循环
+        aio.submit(aio.run_blocking(self.reconciler.toggle))
+
+    def _on_toggle_result(self, result, idle):
+        """协调任务回调：只通知合并后的最终结果"""
+        trace.instant("tray.toggle_result", "toggle", outcome=result.outcome, idle=idle)
+        if idle and self.icon:
+            self.icon.notify(self._toggle_message(result), UIStrings.get_app_title_with_version())
+            if not self.monitor:
+                self.update_state()
+
+    @staticmethod
+    def _toggle_message(result):
+        """根据切换结果生成通知文本"""
+        if result.ok:
+            if result.direction == toggle.DIRECTION_OFF:
+                return "Proxifier " + UIStrings.STATUS_MAP[ServiceStatus.STOPPED]
+            message = f"Proxifier {UIStrings.STATUS_MAP[ServiceStatus.RUNNING]}"
+            for step in result.steps:
+                if step.name == toggle.STEP_LAUNCH_PROCESS and not step.rollback:
+                    message += f" (就绪耗时 {step.detail.time_to_ready * 1000:.0f} ms)"
+            return message
+        if result.timed_out:
+            return f"操作超时：{result.error}"
+        if result.cancelled:
+            return f"操作已取消：{result.error}"
+        if result.direction is None:
+            if result.initial_status in [ServiceStatus.START_PENDING.value, ServiceStatus.STOP_PENDING.value]:
+                return f"Proxifier {UIStrings.get_status(result.initial_status)}，请稍后再试"
+            return f"Proxifier 状态未知 ({result.initial_status})"
+        if result.failed_step == toggle.STEP_START_DRIVER:
+            return "驱动启动失败！"
+        if result.failed_step == toggle.STEP_LAUNCH_PROCESS:
+            return f"{result.error}！"
+        return UIStrings.NOTIFY_ERROR
 
     def show_status(self, icon, item):
-        """显示当前状态通知"""
+        """显示当前状态通知 (查询在后台事件循环上完成，不阻塞托盘菜单)"""
+        self._notify_interaction("status")
+        aio.submit(self._show_status(icon))
+
+    async def _show_status(self, icon):
         service_name = config_manager.get_service_name()
         proxifier_exe_path = config_manager.get_proxifier_exe_path()
         
-        status = service.get_service_status(service_name)
-        process_running = process.is_proxifier_running(proxifier_exe_path)
+        snapshot = await aio.run_blocking(status_cache.get_snapshot, [service_name], [proxifier_exe_path])
+        status = snapshot.service_status(service_name)
+        process_running = snapshot.is_running(proxifier_exe_path)
         
         status_text = f"{UIStrings.SERVICE_NAME}: {UIStrings.get_status(status)}\n{UIStrings.PROCESS_STATUS}: {'是' if process_running else '否'}"
         icon.notify(status_text, UIStrings.get_app_title_with_version())
 
     def open_main_ui(self, icon, item):
         """打开主控面板"""
-        if self.settings_window:
-            self.settings_window.root.after(0, self.settings_window.show)
+        self._notify_interaction("main_ui")
+        if self.app:
+            self.app.show_ui()
 
     def quit_app(self, icon, item):
-        """彻底退出程序"""
-        icon.stop()
-        if self.settings_window and self.settings_window.root:
-            self.settings_window.root.after(0, self.settings_window.root.quit)
+        """彻底退出程序
+
+        进行中的切换先完成 (最长 reconciler.SHUTDOWN_TIMEOUT 秒) 再退出，
+        避免驱动与进程停在半途；等待在后台线程中进行，不阻塞托盘消息循环。
+        """
+        if self.monitor:
+            self.monitor.stop()
+
+        def shutdown():
+            if self.reconciler.is_busy():
+                self.notify("正在等待切换完成后退出")
+            self.reconciler.shutdown()
+            icon.stop()
+            if self.app:
+                self.app.quit()
+        threading.Thread(target=shutdown, name="tray-quit", daemon=False).start()
+
+    def export_metrics(self, icon, item):
+        """把性能指标导出到配置目录 (metrics.json / metrics.prom，开启追踪时还有 trace.json)"""
+        try:
+            json_path, _ = metrics.dump(config_manager.CONFIG_DIR)
+            if trace.is_enabled():
+                trace.export(config_manager.CONFIG_DIR / "trace.json")
+            icon.notify(f"性能指标已导出: {json_path}", UIStrings.get_app_title_with_version())
+        except Exception as e:
+            print(f"导出性能指标失败: {e}")
 
     def toggle_auto_start(self, icon, item):
         """托盘快捷切换：开机自启动"""
+        # 注册表操作只在此处用到，按需导入 (winreg 仅 Windows 可用)
+        from ..utils import startup
         current_state = config_manager.get_auto_start()
         new_state = not current_state
         if config_manager.update_config(auto_start=new_state):
@@ -141,32 +233,50 @@ class TrayIcon:
             pystray.MenuItem(UIStrings.TRAY_MINIMIZED, self.toggle_minimize, 
                              checked=lambda item: config_manager.get_start_minimized()),
             pystray.Menu.SEPARATOR,
+            pystray.MenuItem(UIStrings.TRAY_EXPORT_METRICS, self.export_metrics),
             pystray.MenuItem(UIStrings.TRAY_QUIT, self.quit_app)
         )
 
     def run(self):
         """主运行方法 (阻塞)"""
-        image = self._create_image(active=True)
-        menu = self._create_menu()
-        
-        self.icon = pystray.Icon(
-            "Proxifier_Toggler", 
-            image, 
-            f"{UIStrings.APP_TITLE} v{__version__}", 
-            menu
-        )
-        
-        # 初始状态同步
-        self.update_state()
-        self.icon.run()
+        with trace.span("tray.setup", "startup"):
+            # 有上次已知状态时直接以它作为初始图标，避免先显示"运行中"再跳变
+            last_status = self.monitor.last_status if self.monitor else None
+            active = last_status is None or last_status[0] == ServiceStatus.RUNNING.value
+            image = self._create_image(active=active)
+            menu = self._create_menu()
+            
+            self.icon = pystray.Icon(
+                "Proxifier_Toggler", 
+                image, 
+                f"{UIStrings.APP_TITLE} v{__version__}", 
+                menu
+            )
+            
+            # 初始状态同步：由应用级监控推送，托盘无需自行轮询
+            if self.monitor:
+                self.monitor.subscribe(self._on_status)
+            else:
+                self.update_state()
+            self.reconciler.subscribe(self._on_toggle_result)
+        trace.instant("tray.run", "startup")
+        # 纯托盘模式下托盘占用主线程，此后主线程只运行消息循环
+        bootstrap.main_thread_idle()
+        self.icon.run(setup=self._on_visible)
+
+    def _on_visible(self, icon):
+        """托盘消息循环已开始：显示图标并记录里程碑 (在 pystray 的 setup 线程中调用)"""
+        icon.visible = True
+        bootstrap.mark(bootstrap.MILESTONE_TRAY_VISIBLE, self)
 
 # 全局单例/兼容性接口
 _tray_instance = None
 
-def setup_tray_async(settings_window):
+def setup_tray_async(app, monitor=None, reconciler=None):
     """异步启动托盘图标的入口函数"""
     global _tray_instance
-    _tray_instance = TrayIcon(settings_window)
+    _tray_instance = TrayIcon(app, monitor, reconciler)
+    _tray_instance.preload_images()
     
     thread = threading.Thread(target=_tray_instance.run, daemon=True)
     thread.start()
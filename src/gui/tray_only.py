@@ -0,0 +1,151 @@
+"""纯托盘模式 (run.py --tray-only)
+
+托盘图标占用主线程，进程内不创建 Tk 解释器，也不导入 CustomTkinter；
+所有反馈通过托盘通知给出，不弹出消息框。
+主控面板按需在独立的短生命周期子进程中打开 (run.py --panel)，
+关闭面板即结束该进程，界面占用的内存随之释放。
+面板中的切换经管道交给本进程的切换协调器执行 (见 core.toggle_channel)。
+"""
+import os
+import subprocess
+import sys
+import threading
+
+from ..config import manager as config_manager
+from ..core import trace
+from ..core.bootstrap import Bootstrap
+from ..core.last_status import LastStatusStore
+from ..core.monitor import StatusMonitor
+from ..core.reconciler import ToggleReconciler
+from ..core.runner import get_runner
+from ..core.toggle_channel import CHANNEL_ENV, PanelChannel
+from ..gui.tray_icon import TrayIcon
+from ..utils.win_utils import setup_app_id
+
+# 启动主控面板子进程的命令行参数 (见 run.py)
+PANEL_ARG = "--panel"
+
+
+def panel_command():
+    """主控面板子进程的命令行
+
+    打包环境下复用主程序 EXE，源码环境下通过解释器运行 run.py。
+    """
+    if getattr(sys, 'frozen', False):
+        return [sys.executable, PANEL_ARG]
+    return [sys.executable, str(config_manager.PROJECT_ROOT / "run.py"), PANEL_ARG]
+
+
+class TrayOnlyApp:
+    """纯托盘应用：托盘在主线程运行，主控面板在子进程中按需打开"""
+
+    @trace.traced("app.init", "startup")
+    def __init__(self):
+        self.monitor = None
+        self.reconciler = None
+        self.tray = None
+        self.panel = None       # 主控面板子进程 (subprocess.Popen)
+        self.channel = None     # 与面板之间的切换通道
+        self._stopping = False
+        self._lock = threading.Lock()
+
+        # 启动步骤按依赖图执行 (见 core.bootstrap)
+        self.bootstrap = Bootstrap("startup")
+        self.bootstrap.add("app_id", setup_app_id)
+        self.bootstrap.add("monitor", self._create_monitor)
+        self.bootstrap.run()
+
+    def _create_monitor(self):
+        targets = lambda: (config_manager.get_service_name(), config_manager.get_proxifier_exe_path())
+        # 载入上次已知状态，托盘无需等待第一次探测
+        self.monitor = StatusMonitor(targets, store=LastStatusStore(config_manager.get_last_status_file()))
+        self.reconciler = ToggleReconciler(
+            targets, self.monitor, grace_timeout=config_manager.get_terminate_grace_timeout
+        )
+
+    def _create_tray(self):
+        tray = TrayIcon(self, self.monitor, self.reconciler)
+        tray.preload_images()
+        self.tray = tray
+
+    def show_ui(self):
+        """打开主控面板子进程 (已打开时只给出提示)"""
+        with self._lock:
+            if self.panel is not None and self.panel.poll() is None:
+                self._notify("主控面板已打开")
+                return
+            # 子进程不应覆盖本进程的追踪文件
+            env = dict(os.environ)
+            env.pop(trace.TRACE_ENV, None)
+            env[CHANNEL_ENV] = "1"
+            try:
+                # 保留隐藏控制台的标志，但不能带 SW_HIDE 启动信息，否则面板窗口也会被隐藏；
+                # 标准输入输出作为切换通道，面板的切换请求由本进程的协调器执行
+                self.panel = get_runner().spawn(
+                    panel_command(), kind="panel", env=env, startupinfo=None,
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                    text=True, encoding="utf-8", bufsize=1
+                )
+            except OSError as e:
+                print(f"启动主控面板失败: {e}")
+                self._notify(f"启动主控面板失败: {e}")
+                return
+            panel = self.panel
+            self.channel = PanelChannel(panel, self.reconciler)
+        trace.instant("panel.spawn", "ui", pid=panel.pid)
+        # 面板打开期间按界面可见的频率轮询
+        self.monitor.set_ui_active(True)
+        threading.Thread(target=self._watch_panel, args=(panel,), daemon=True).start()
+
+    def _watch_panel(self, panel):
+        """等待面板进程退出，然后同步其间可能发生的配置与状态变化"""
+        returncode = panel.wait()
+        trace.instant("panel.exit", "ui", pid=panel.pid, returncode=returncode)
+        with self._lock:
+            if self.panel is panel:
+                self.panel = None
+                self.channel.close()
+                self.channel = None
+        config_manager.invalidate_cache()
+        self.monitor.set_ui_active(False)
+        self.monitor.notify_interaction()
+        if returncode not in (0, None) and not self._stopping:
+            self._notify(f"主控面板异常退出 (返回码 {returncode})")
+
+    def quit(self):
+        """退出时一并关闭仍在运行的主控面板"""
+        self._stopping = True
+        with self._lock:
+            panel = self.panel
+        if panel is not None and panel.poll() is None:
+            try:
+                panel.terminate()
+            except OSError as e:
+                print(f"关闭主控面板失败: {e}")
+
+    def _notify(self, message):
+        if self.tray is not None:
+            self.tray.notify(message)
+
+    def run(self):
+        """启动应用 (阻塞，托盘占用主线程直至退出)
+
+        纯托盘模式总是最小化启动，不读取 start_minimized 配置。
+        """
+        # 首次状态探测在后台进行，与托盘图标的创建并行
+        def probe():
+            self.monitor.poll_once()
+            self.monitor.start()
+        self.bootstrap.add("status_probe", probe, after=("monitor",), background=True)
+        self.bootstrap.add("tray", self._create_tray, after=("monitor",))
+        self.bootstrap.run()
+        self.bootstrap.report_when_done()
+        try:
+            self.tray.run()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.monitor.stop()
+            # 本进程的协调器同时执行面板转交的切换：等它完成再退出，避免停在半途
+            self.reconciler.shutdown()
+            self.quit()
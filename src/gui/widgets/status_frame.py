@@ -1,8 +1,7 @@
 """状态监控与切换控制板块 - CustomTkinter 现代化版本 (Fluent UI)"""
-import customtkinter as ctk
-import threading
 import time
-from ...core import service, process
+import customtkinter as ctk
+from ...core import aio, metrics, trace
 from ...core.constants import ServiceStatus, UIStrings
 from ..ctk_styles import Fonts, Sizes, Colors, get_status_colors
 
@@ -10,7 +9,7 @@ from ..ctk_styles import Fonts, Sizes, Colors, get_status_colors
 class StatusFrame(ctk.CTkFrame):
     """状态监控与切换控制板块 - Fluent Design 风格"""
     
-    def __init__(self, master, config, **kwargs):
+    def __init__(self, master, config, monitor, reconciler, **kwargs):
         # 应用卡片样式
         kwargs.setdefault("corner_radius", Sizes.CORNER_RADIUS_LARGE)
         kwargs.setdefault("border_width", 0)
@@ -21,6 +20,8 @@ class StatusFrame(ctk.CTkFrame):
         self.pack_propagate(False)
         
         self.config = config
+        self.monitor = monitor
+        self.reconciler = reconciler
         self.is_monitoring = True
         
         # 内部状态
@@ -28,8 +29,13 @@ class StatusFrame(ctk.CTkFrame):
         self.loading_dots = 0
         
         self._setup_ui()
-        self._start_monitor()
+        # 已有 (上次记录的) 状态时直接渲染，不必先显示"正在获取"
+        if self.monitor.last_status is not None:
+            self._render_status(*self.monitor.last_status, stale=self.monitor.stale)
         self._animate_loading()
+        # 订阅应用级状态监控 (不再为每个面板单独开启轮询线程)
+        self._unsubscribe = self.monitor.subscribe(self._on_status)
+        self._unsubscribe_toggle = self.reconciler.subscribe(self._on_toggle_result)
     
     def _setup_ui(self):
         """设置 UI 布局 - Fluent 风格"""
@@ -38,14 +44,14 @@ class StatusFrame(ctk.CTkFrame):
         container.pack(fill="both", expand=True, padx=Sizes.PADDING_LARGE, pady=Sizes.PADDING_SMALL)
         
         # 标题 - 更轻量的样式
-        title_label = ctk.CTkLabel(
+        self.title_label = ctk.CTkLabel(
             container,
             text=UIStrings.CURRENT_STATUS,
             font=("Microsoft YaHei UI", 14, "normal"),
             text_color=(Colors.TEXT_SECONDARY_LIGHT, Colors.TEXT_SECONDARY_DARK),
             anchor="w"
         )
-        title_label.pack(anchor="w", pady=(0, Sizes.PADDING_TINY))
+        self.title_label.pack(anchor="w", pady=(0, Sizes.PADDING_TINY))
         
         # 状态信息区域 - 单行布局，固定高度
         status_row = ctk.CTkFrame(container, fg_color="transparent", height=32)
@@ -182,78 +188,57 @@ class StatusFrame(ctk.CTkFrame):
             self.after(400, self._animate_loading)
     
     def _handle_toggle(self):
-        """处理切换逻辑"""
-        curr_s = self.service_status_label.cget("text")
-        s_name = self.config.get("service_name", "proxifierdrv")
-        p_path = self.config.get("proxifier_exe_path", "")
-        
-        # 禁用按钮并显示处理中状态
-        self.toggle_btn.configure(state="disabled", text=UIStrings.BTN_PROCESSING)
-        
-        def run_toggle():
-            try:
-                if any(x in curr_s for x in ["RUNNING", "运行中", UIStrings.get_status(ServiceStatus.RUNNING)]):
-                    # 关闭流程
-                    process.kill_proxifier(p_path)
-                    time.sleep(0.5)
-                    service.stop_service(s_name)
-                else:
-                    # 开启流程
-                    if service.start_service(s_name):
-                        process.start_proxifier(p_path)
-            except Exception as e:
-                print(f"切换失败: {e}")
-            
-            # 恢复按钮状态
-            self.after(500, lambda: self.toggle_btn.configure(
-                state="normal",
-                text=UIStrings.BTN_TOGGLE_STATE
-            ))
-        
-        threading.Thread(target=run_toggle, daemon=True).start()
+        """处理切换逻辑：只提交期望状态，连续点击会合并为最后一次意图"""
+        self.toggle_btn.configure(text=UIStrings.BTN_PROCESSING)
+        # 决定方向时可能需要实时查询一次状态，不阻塞界面线程
+        aio.submit(aio.run_blocking(self.reconciler.toggle))
     
-    def _start_monitor(self):
-        """开启异步监控线程"""
-        def monitor_loop():
-            while self.is_monitoring:
-                try:
-                    s_name = self.config.get("service_name", "proxifierdrv")
-                    p_path = self.config.get("proxifier_exe_path", "")
-                    
-                    s_status = service.get_service_status(s_name)
-                    p_running = process.is_proxifier_running(p_path)
-                    
-                    # 推送到主线程更新
-                    self.after(0, self._sync_ui, s_status, p_running)
-                except Exception as e:
-                    print(f"监控错误: {e}")
-                
-                time.sleep(2)
-        
-        threading.Thread(target=monitor_loop, daemon=True).start()
+    def _on_toggle_result(self, result, idle):
+        """协调任务回调：全部请求处理完毕后恢复按钮"""
+        if not result.ok and not result.cancelled:
+            print(f"切换失败: {result.error}")
+        if not idle:
+            return
+        try:
+            self.after(0, lambda: self.toggle_btn.configure(text=UIStrings.BTN_TOGGLE_STATE))
+        except Exception:
+            # 窗口已销毁
+            pass
+    
+    def _on_status(self, s_status, p_running):
+        """监控线程回调：推送到主线程更新"""
+        try:
+            self.after(0, self._sync_ui, s_status, p_running, time.perf_counter(), self.monitor.stale)
+        except Exception:
+            # 窗口已销毁
+            pass
     
-    def _sync_ui(self, s_status, p_running):
-        """主线程安全刷新 UI - Fluent 风格语义化状态"""
+    def _sync_ui(self, s_status, p_running, queued_at=None, stale=False):
+        """主线程安全刷新 UI - Fluent 风格语义化状态
+        
+        Args:
+            queued_at: 监控线程投递时的 time.perf_counter()，用于统计排队到主线程的延迟
+            stale: 状态是否为尚未确认的上次记录
+        """
         try:
             if not self.is_monitoring or not self.winfo_exists():
                 return
         except Exception:
             return
         
-        # 检查状态变化
-        status_changed = (self.last_status.get("service") != s_status)
-        
+        start = time.perf_counter()
+        if queued_at is not None:
+            metrics.histogram("toggler_ui_dispatch_seconds", "状态推送排队到主线程的延迟").observe(start - queued_at)
+            trace.instant("ui.dispatch", "ui", queued_ms=(start - queued_at) * 1000)
+        with trace.span("ui.sync_ui", "ui", status=s_status):
+            self._render_status(s_status, p_running, stale)
+        metrics.histogram("toggler_ui_sync_seconds", "状态面板单次刷新耗时").observe(time.perf_counter() - start)
+    
+    def _render_status(self, s_status, p_running, stale=False):
+        """按服务与进程状态刷新指示灯与徽章 (上次记录的状态以次要文字色显示，并在标题中标明)"""
         self.last_status["service"] = s_status
         self.last_status["process"] = "RUNNING" if p_running else "STOPPED"
         
-        # 刷新托盘图标 (传递状态，避免重复查询)
-        if status_changed:
-            try:
-                from ..tray_icon import refresh_tray_icon
-                refresh_tray_icon(s_status)  # 传递状态参数
-            except ImportError:
-                pass
-        
         # 更新服务状态 - 语义化设计
         if s_status == ServiceStatus.RUNNING.value:
             # 成功状态：绿色 + ✓
@@ -276,6 +261,26 @@ class StatusFrame(ctk.CTkFrame):
             self.service_badge.configure(
                 fg_color=self._get_subtle_bg(gray_color)
             )
+        elif s_status in (ServiceStatus.START_PENDING.value, ServiceStatus.STOP_PENDING.value):
+            # 过渡状态：主题蓝 + ⏳ (避免启停过程中闪现"未知状态")
+            self.service_indicator.configure(text_color=Colors.PRIMARY)
+            self.service_status_label.configure(
+                text=f"⏳  {UIStrings.get_status(s_status)}",
+                text_color=Colors.PRIMARY
+            )
+            self.service_badge.configure(
+                fg_color=self._get_subtle_bg(Colors.PRIMARY)
+            )
+        elif s_status == ServiceStatus.TIMEOUT.value:
+            # 查询超时：橙色 + ⌛ (服务控制管理器无响应，状态未能确认)
+            self.service_indicator.configure(text_color=Colors.WARNING)
+            self.service_status_label.configure(
+                text=f"⌛  {UIStrings.get_status(ServiceStatus.TIMEOUT)}",
+                text_color=Colors.WARNING
+            )
+            self.service_badge.configure(
+                fg_color=self._get_subtle_bg(Colors.WARNING)
+            )
         elif s_status == ServiceStatus.NOT_INSTALLED.value:
             # 警告状态：橙色 + ⚠
             self.service_indicator.configure(text_color=Colors.WARNING)
@@ -320,6 +325,27 @@ class StatusFrame(ctk.CTkFrame):
             self.process_badge.configure(
                 fg_color=self._get_subtle_bg(gray_color)
             )
+        
+        # 上次记录：徽章文字改为次要色，标题注明记录时间，等待实时探测确认
+        title = UIStrings.CURRENT_STATUS
+        if stale:
+            secondary = (Colors.TEXT_SECONDARY_LIGHT, Colors.TEXT_SECONDARY_DARK)
+            self.service_status_label.configure(text_color=secondary)
+            self.process_status_label.configure(text_color=secondary)
+            note = " ".join(filter(None, (UIStrings.STATUS_STALE, self._format_observed_at(self.monitor.last_status_at))))
+            title += f"（{note}）"
+        if self.title_label.cget("text") != title:
+            self.title_label.configure(text=title)
+    
+    @staticmethod
+    def _format_observed_at(timestamp):
+        """记录时间：当天只显示时分，否则带上日期"""
+        if timestamp is None:
+            return ""
+        observed = time.localtime(timestamp)
+        if time.strftime("%Y-%m-%d", observed) == time.strftime("%Y-%m-%d"):
+            return time.strftime("%H:%M", observed)
+        return time.strftime("%m-%d %H:%M", observed)
     
     def _get_subtle_bg(self, color):
         """获取轻量化背景色 - 模拟 rgba 透明效果
@@ -345,8 +371,10 @@ class StatusFrame(ctk.CTkFrame):
             return ((Colors.HOVER_LIGHT, Colors.HOVER_DARK))
     
     def stop_monitoring(self):
-        """停止监控"""
+        """停止监控 (取消订阅，监控线程本身由应用持有)"""
         self.is_monitoring = False
+        self._unsubscribe()
+        self._unsubscribe_toggle()
     
     def update_config(self, new_config):
         """更新配置"""
@@ -354,3 +382,5 @@ class StatusFrame(ctk.CTkFrame):
         self.last_status = {"service": "LOADING", "process": "LOADING"}
         if self.winfo_exists():
             self._animate_loading()
+        # 配置可能已变化，立即重新获取并推送状态
+        self.monitor.refresh(force_publish=True)
@@ -2,17 +2,61 @@
 Proxifier Toggler - 主程序入口
 一个简单的系统托盘工具，用于快速切换 Proxifier 的开关状态
 """
+import atexit
 import sys
 import os
 import ctypes
 
 
-def main():
+def main(mode="default"):
     """主函数入口
     
     负责环境检查、权限请求以及启动主应用程序类。
+    
+    Args:
+        mode: "default" 托盘 + 按需构建的主界面；
+              "tray-only" 纯托盘，主界面在子进程中打开；
+              "panel" 由纯托盘模式启动的独立主控面板进程
     """
-    # 0. 单实例互斥锁检查 (防止多进程冲突)
+    # 按需开启时间线追踪 (run.py --trace)，退出时导出
+    from src.core import trace
+    trace_path = trace.enable_from_env()
+    if trace_path:
+        atexit.register(trace.export, trace_path)
+    
+    # 0. 单实例互斥锁检查 (防止多进程冲突；面板进程属于已运行的实例)
+    if mode != "panel":
+        _ensure_single_instance()
+    
+    # 1. 环境预检查 (开发模式跳过管理员检查)
+    skip_admin = os.environ.get('SKIP_ADMIN_CHECK') == '1'
+    if not skip_admin:
+        from src.utils.admin import run_as_admin
+        run_as_admin()
+    
+    # 2. 启动常驻状态探测进程 (避免每次查询都创建 sc / tasklist 子进程)
+    from src.core import probe_worker
+    with trace.span("startup.probe_worker", "startup"):
+        probe_worker.install()
+    
+    # 3. 启动应用
+    if mode == "panel":
+        from src.gui.app import run_panel
+        run_panel()
+        return
+    if mode == "tray-only":
+        with trace.span("startup.import_gui", "startup"):
+            from src.gui.tray_only import TrayOnlyApp
+        TrayOnlyApp().run()
+        return
+    with trace.span("startup.import_gui", "startup"):
+        from src.gui.app import ProxifierApp
+    app = ProxifierApp()
+    app.run()
+
+
+def _ensure_single_instance():
+    """已有实例在运行时提示并退出"""
     mutex_name = "Global\\ProxifierTogglerMutex"
     mutex = ctypes.windll.kernel32.CreateMutexW(None, False, mutex_name)
     if ctypes.windll.kernel32.GetLastError() == 183:  # ERROR_ALREADY_EXISTS
@@ -24,17 +68,8 @@ def main():
             0x40  # MB_ICONINFORMATION
         )
         sys.exit(0)
-    
-    # 1. 环境预检查 (开发模式跳过管理员检查)
-    skip_admin = os.environ.get('SKIP_ADMIN_CHECK') == '1'
-    if not skip_admin:
-        from src.utils.admin import run_as_admin
-        run_as_admin()
-    
-    # 2. 启动应用
-    from src.gui.app import ProxifierApp
-    app = ProxifierApp()
-    app.run()
+    # 互斥锁句柄随进程存活，进程退出时由系统释放
+    return mutex
 
 
 if __name__ == "__main__":